@@ -0,0 +1,14 @@
+"""
+### Benchmarks
+Headless performance checks for the bit engine, run them from the project root
+
+```
+python -m benchmarks.bench_write_pattern
+```
+
+The hot path suite reports JSON and fails on regressions against a saved baseline
+
+```
+python -m benchmarks.suite --baseline benchmarks/baseline.json
+```
+"""
@@ -0,0 +1,113 @@
+"""
+Frame time of the game thread with placement hints off, computed inline and on the worker.
+
+Every frame does a fixed amount of pure Python work, a stand-in for update and render that
+never releases the GIL, then sleeps to the next frame like clock.tick. Every `spawn_every`
+frames a piece spawns and needs a hint. Inline, predict runs inside that frame. On the
+worker it is submitted and collected on a later frame, like the spawner does. The busy part
+of every frame is timed, a frame over its budget is a dropped frame. The spawn frame and
+the one after it, where a worker still predicting competes for the GIL, are also reported
+on their own.
+"""
+import time
+import argparse
+import tempfile
+
+from bitEngine.core.predictor_worker import PatternPredictorWorker
+
+from .bench_predict_batch import random_boards
+from .bench_write_pattern import PIECES
+from .suite import make_predictor
+
+
+def busy(iterations: int) -> int:
+    total = 0
+    for n in range(iterations):
+        total += n & 7
+    return total
+
+
+def calibrate(work_ms: float) -> int:
+    """ Iterations of busy() that take `work_ms` with nothing else running """
+    iterations = 100_000
+    elapsed = float("inf")
+    for _ in range(5):
+        start = time.perf_counter()
+        busy(iterations)
+        elapsed = min(elapsed, time.perf_counter() - start)
+    return max(1, int(iterations * work_ms / (elapsed * 1e3)))
+
+
+def run_frames(mode: str, predictor, frames: int, iterations: int, spawn_every: int, fps: int, rows: int, columns: int) -> dict:
+    """ Busy time per frame in milliseconds and the frames that ran past their budget """
+    budget = 1 / fps
+    boards = random_boards(frames // spawn_every + 1, rows, columns).tolist()
+    worker = PatternPredictorWorker(predictor) if mode == "worker" else None
+    pending = None
+
+    busy_times = []
+    next_frame = time.perf_counter()
+    for frame in range(frames):
+        start = time.perf_counter()
+
+        if worker is not None and pending is not None and pending.done():
+            worker.result(pending)
+            pending = None
+
+        if mode != "off" and frame % spawn_every == 0:
+            board, piece = boards[frame // spawn_every], PIECES[frame % len(PIECES)]
+            if worker is None:
+                predictor.predict(board, piece, columns, rows, next_queue = ["T", "I", "O"])
+            else:
+                pending = worker.submit(board, piece, columns, rows, next_queue = ["T", "I", "O"])
+
+        busy(iterations)
+        busy_times.append(time.perf_counter() - start)
+
+        # * like clock.tick, sleep off the rest of the frame
+        next_frame += budget
+        time.sleep(max(0.0, next_frame - time.perf_counter()))
+        next_frame = max(next_frame, time.perf_counter())
+
+    if worker is not None:
+        worker.close()
+
+    def median(times):
+        return sorted(times)[len(times) // 2] * 1e3
+
+    return {
+        "mode": mode,
+        "p50": median(busy_times),
+        "p99": sorted(busy_times)[min(len(busy_times) - 1, int(0.99 * len(busy_times)))] * 1e3,
+        "spawn": median(busy_times[0::spawn_every]),
+        "after": median(busy_times[1::spawn_every]),
+        "over": sum(1 for elapsed in busy_times if elapsed > budget)
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description = __doc__)
+    parser.add_argument("--frames", type = int, default = 1_200)
+    parser.add_argument("--work-ms", type = float, nargs = "+", default = [2.0, 4.0, 7.0])
+    parser.add_argument("--spawn-every", type = int, default = 12)
+    parser.add_argument("--fps", type = int, default = 120)
+    parser.add_argument("--corpus", type = int, default = 1_000)
+    parser.add_argument("--rows", type = int, default = 20)
+    parser.add_argument("--columns", type = int, default = 10)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        predictor = make_predictor(directory, args.corpus)
+
+        print(f"{'work ms':>8} {'mode':>8} {'p50 ms':>8} {'p99 ms':>8} {'spawn ms':>9} {'after ms':>9} {'over':>6}")
+        for work_ms in args.work_ms:
+            iterations = calibrate(work_ms)
+            for mode in ("off", "inline", "worker"):
+                result = run_frames(mode, predictor, args.frames, iterations, args.spawn_every, args.fps, args.rows, args.columns)
+                print(f"{work_ms:>8.1f} {result['mode']:>8} {result['p50']:>8.2f} {result['p99']:>8.2f} {result['spawn']:>9.2f} {result['after']:>9.2f} {result['over']:>6}")
+
+        predictor.journal.close()
+
+
+if __name__ == "__main__":
+    main()
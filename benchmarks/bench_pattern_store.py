@@ -0,0 +1,99 @@
+"""
+Disk size and load time of the pattern corpus: indented JSON, pickle and the binary store.
+
+Entries are distinct dicts with a surface and a real timestamp, like the ones
+write_pattern produces, so pickle gets no help from shared objects.
+"""
+import os
+import json
+import time
+import pickle
+import argparse
+import tempfile
+
+from datetime import datetime, timedelta
+
+from bitEngine.utils import BitPatternFileManager
+
+from .bench_write_pattern import synthetic_corpus
+
+
+def corpus(size: int) -> list:
+    """ `size` independent entries shaped like write_pattern's """
+    start = datetime(2025, 1, 1)
+    patterns = []
+
+    for i, entry in enumerate(synthetic_corpus(size)):
+        patterns.append({
+            "piece": entry["piece"],
+            "landed_coordinates": [list(cell) for cell in entry["landed_coordinates"]],
+            "rotation": entry["rotation"],
+            "lines_cleared": entry["lines_cleared"],
+            "next_pieces_queue": list(entry["next_pieces_queue"]),
+            "surface": "".join(str((i + column) % 5) for column in range(9)),
+            "timestamp": (start + timedelta(milliseconds=731 * i)).isoformat(),
+            "reason": "auto"
+        })
+
+    return patterns
+
+
+def timed(function) -> float:
+    start = time.perf_counter()
+    function()
+    return time.perf_counter() - start
+
+
+def bench_size(size: int, directory: str) -> dict:
+    """ Saves one corpus three ways and times loading each back """
+    patterns = corpus(size)
+
+    json_file = os.path.join(directory, f"pattern_{size}.json")
+    pickle_file = os.path.join(directory, f"pattern_{size}.pkl")
+    store = BitPatternFileManager(os.path.join(directory, f"pattern_{size}.bin"))
+
+    with open(json_file, "w", encoding="utf-8") as file:
+        json.dump(patterns, file, indent=2)
+    with open(pickle_file, "wb") as file:
+        pickle.dump(patterns, file)
+    store.save(patterns)
+    del patterns
+
+    def load_json():
+        with open(json_file, "r", encoding="utf-8") as file:
+            json.load(file)
+
+    def load_pickle():
+        with open(pickle_file, "rb") as file:
+            pickle.load(file)
+
+    return {
+        "size": size,
+        "json_bytes": os.path.getsize(json_file) / size,
+        "pickle_bytes": os.path.getsize(pickle_file) / size,
+        "store_bytes": os.path.getsize(store.file_name) / size,
+        "json_ms": timed(load_json) * 1e3,
+        "pickle_ms": timed(load_pickle) * 1e3,
+        "store_ms": timed(store.load) * 1e3,
+        "columns_ms": timed(store.read_columns) * 1e3
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description = __doc__)
+    parser.add_argument("--sizes", type = int, nargs = "+", default = [10_000, 100_000, 1_000_000])
+    args = parser.parse_args()
+
+    print(f"{'corpus':>10} | {'B/entry json':>12} {'pickle':>8} {'store':>8} | {'load ms json':>12} {'pickle':>10} {'store':>10} {'columns':>10}")
+
+    with tempfile.TemporaryDirectory() as directory:
+        for size in args.sizes:
+            result = bench_size(size, directory)
+            print(
+                f"{result['size']:>10} | {result['json_bytes']:>12.1f} {result['pickle_bytes']:>8.1f} {result['store_bytes']:>8.1f} | "
+                f"{result['json_ms']:>12.1f} {result['pickle_ms']:>10.1f} {result['store_ms']:>10.1f} {result['columns_ms']:>10.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
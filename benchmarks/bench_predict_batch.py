@@ -0,0 +1,118 @@
+"""
+Throughput of PatternNGrams.predict_batch against a per-board predict loop.
+
+Both run on the same random boards, pieces, previous pieces and queues, and every
+batched choice is checked against the placement the loop returned for that board.
+"""
+import os
+import sys
+import time
+import argparse
+import tempfile
+
+import numpy as np
+
+from bitEngine.core.batch_predict import REASONS
+from bitEngine.core.bitboard import BitBoard
+from bitEngine.core.geometry import PIECE_GEOMETRY
+from bitEngine.core.ngrams import PatternNGrams
+from bitEngine.utils import BitPatternFileManager, BitPatternRecords
+
+from .bench_write_pattern import PIECES, synthetic_corpus
+
+
+def random_boards(count: int, rows: int, columns: int, seed: int = 11) -> np.ndarray:
+    """ Ragged stacks with a few holes, some bottom rows one cell short of a line """
+    rng = np.random.default_rng(seed)
+
+    heights = rng.integers(0, rows // 2 + 2, (count, 1, columns))
+    depth = np.arange(rows)[None, :, None]
+    boards = ((depth >= rows - heights) & (rng.random((count, rows, columns)) < 0.85)).astype(np.uint8)
+
+    near_full = rng.random((count, 4)) < 0.3
+    for offset in range(4):
+        chosen = np.nonzero(near_full[:, offset])[0]
+        boards[chosen, rows - 1 - offset] = 1
+        boards[chosen, rows - 1 - offset, rng.integers(0, columns, len(chosen))] = 0
+
+    return boards
+
+
+def bench_size(predictor: PatternNGrams, count: int, rows: int, columns: int) -> dict:
+    """ Times one batch of `count` boards against the same boards predicted one by one """
+    rng = np.random.default_rng(count)
+    boards = random_boards(count, rows, columns)
+    pieces = np.array(PIECES)[rng.integers(0, len(PIECES), count)]
+    prev_pieces = np.array(PIECES)[rng.integers(0, len(PIECES), count)]
+    queues = np.array(PIECES)[rng.integers(0, len(PIECES), (count, 3))]
+
+    start = time.perf_counter()
+    batch = predictor.predict_batch(boards, pieces, prev_pieces, queues)
+    batch_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    looped = [
+        predictor.predict(boards[n].tolist(), pieces[n], columns, rows, prev_pieces[n], list(queues[n]))
+        for n in range(count)
+    ]
+    loop_time = time.perf_counter() - start
+
+    mismatches = 0
+    for n, suggestion in enumerate(looped):
+        chosen = batch.chosen[n]
+        placement = None
+        if chosen["row"] >= 0:
+            placement = BitBoard.coordinates(PIECE_GEOMETRY[pieces[n]][chosen["rotation"]], int(chosen["column"]), int(chosen["row"]))
+        if suggestion["reason"] != REASONS[chosen["reason"]] or suggestion["placement"] != placement:
+            mismatches += 1
+
+    return {
+        "boards": count,
+        "loop_ms": loop_time * 1e3,
+        "batch_ms": batch_time * 1e3,
+        "boards_per_s": count / batch_time,
+        "speedup": loop_time / batch_time,
+        "mismatches": mismatches
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description = __doc__)
+    parser.add_argument("--boards", type = int, nargs = "+", default = [1_000, 10_000, 50_000])
+    parser.add_argument("--corpus", type = int, default = 10_000)
+    parser.add_argument("--rows", type = int, default = 20)
+    parser.add_argument("--columns", type = int, default = 10)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        predictor = PatternNGrams(
+            corpus_file = os.path.join(directory, "pattern.json"),
+            pickle_file = os.path.join(directory, "pattern.pkl"),
+            journal_file = os.path.join(directory, "pattern.journal"),
+            index_file = os.path.join(directory, "pattern_index.pkl"),
+            model_file = os.path.join(directory, "ngrams.pkl"),
+            store_file = os.path.join(directory, "pattern.bin"),
+            fsync_policy = "never",
+            compact_threshold = sys.maxsize
+        )
+        predictor.wait_ready()
+        predictor.patterns = BitPatternRecords(BitPatternFileManager.encode(synthetic_corpus(args.corpus)))
+        predictor.index.build_placements(predictor.patterns.placements())
+        predictor._build_model(predictor.patterns)
+
+        # * predict_batch has no lookahead, compare choice against choice
+        predictor.planner = None
+
+        # * warm up numpy and the model export
+        predictor.predict_batch(random_boards(16, args.rows, args.columns), ["T"] * 16)
+
+        print(f"{'boards':>8} {'loop ms':>10} {'batch ms':>10} {'boards/s':>12} {'speedup':>8} {'mismatches':>11}")
+        for count in args.boards:
+            result = bench_size(predictor, count, args.rows, args.columns)
+            print(f"{result['boards']:>8} {result['loop_ms']:>10.1f} {result['batch_ms']:>10.1f} {result['boards_per_s']:>12.0f} {result['speedup']:>7.1f}x {result['mismatches']:>11}")
+
+        predictor.journal.close()
+
+
+if __name__ == "__main__":
+    main()
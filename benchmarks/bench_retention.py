@@ -0,0 +1,76 @@
+"""
+Memory of PatternNGrams under continuous play with a retention policy.
+
+Writes fresh landings without end and prints stats() with the traced Python heap
+every `--every` writes. With a record cap the corpus, the index and the model tables
+should level off once the cap is reached instead of growing with the writes.
+"""
+import os
+import random
+import argparse
+import tempfile
+import tracemalloc
+
+from bitEngine.core.ngrams import PatternNGrams
+from bitEngine.core.retention import RetentionPolicy
+
+from .bench_write_pattern import PIECES
+
+
+def landing(rng: random.Random, i: int) -> dict:
+    """ A landing that is new to the corpus, with a random surface and queue """
+    piece = rng.choice(PIECES)
+    return {
+        "piece": piece,
+        "landed_coords": [(x + i % 7, y + i // 7) for x, y in PatternNGrams.SHAPES[piece]],
+        "rotation": rng.randrange(4),
+        "next_queue": [rng.choice(PIECES) for _ in range(3)],
+        "surface": "".join(rng.choice("01234") for _ in range(9)),
+        "reason": "benchmark"
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description = __doc__)
+    parser.add_argument("--writes", type = int, default = 10_000)
+    parser.add_argument("--every", type = int, default = 1_000)
+    parser.add_argument("--max-records", type = int, default = 2_000)
+    parser.add_argument("--half-life", type = int, default = None)
+    args = parser.parse_args()
+
+    rng = random.Random(15)
+
+    with tempfile.TemporaryDirectory() as directory:
+        predictor = PatternNGrams(
+            corpus_file = os.path.join(directory, "pattern.json"),
+            pickle_file = os.path.join(directory, "pattern.pkl"),
+            journal_file = os.path.join(directory, "pattern.journal"),
+            index_file = os.path.join(directory, "pattern_index.pkl"),
+            model_file = os.path.join(directory, "ngrams.pkl"),
+            store_file = os.path.join(directory, "pattern.bin"),
+            fsync_policy = "never",
+            retention = RetentionPolicy(max_records = args.max_records, half_life = args.half_life)
+        )
+        predictor.wait_ready()
+
+        tracemalloc.start()
+        print(f"{'writes':>8} {'records':>8} {'evicted':>8} {'contexts':>9} {'pairs':>8} {'model KB':>9} {'heap KB':>9} {'store KB':>9}")
+
+        for i in range(1, args.writes + 1):
+            predictor.write_pattern(**landing(rng, i))
+
+            if i % args.every == 0:
+                stats = predictor.stats()
+                heap, _ = tracemalloc.get_traced_memory()
+                store = os.path.getsize(predictor.store.file_name) if predictor.store.exists() else 0
+                print(
+                    f"{i:>8} {stats['records']:>8} {stats['evicted']:>8} {stats['contexts']:>9} {stats['context_pairs']:>8} "
+                    f"{stats['model_bytes'] / 1024:>9.0f} {heap / 1024:>9.0f} {store / 1024:>9.0f}"
+                )
+
+        tracemalloc.stop()
+        predictor.close()
+
+
+if __name__ == "__main__":
+    main()
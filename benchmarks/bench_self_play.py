@@ -0,0 +1,63 @@
+"""
+Headless self play throughput, landings per hour.
+
+Every player runs the real grid, spawner and line cleaner logic without a window.
+One process first, then the whole generate() path across worker processes,
+which includes joining the chunks onto a binary store and saving it.
+"""
+import os
+import time
+import argparse
+import tempfile
+
+from bitEngine.core.self_play import play_landings, generate
+
+
+def bench_player(player: str, landings: int, lookahead: int) -> dict:
+    """ Landings per hour of one process """
+    options = {} if player == "random" else {"lookahead": lookahead}
+
+    start = time.perf_counter()
+    columns = play_landings(landings, 0, player = player, **options)
+    elapsed = time.perf_counter() - start
+
+    return {
+        "player": player,
+        "workers": 1,
+        "landings": columns["count"],
+        "per_hour": columns["count"] / elapsed * 3600,
+        "lines": int(columns["lines_cleared"].sum())
+    }
+
+
+def bench_generate(landings: int, workers: int, directory: str) -> dict:
+    """ Landings per hour into the store, greedy player """
+    store_file = os.path.join(directory, f"pattern_{workers}.bin")
+
+    start = time.perf_counter()
+    added = generate(store_file, landings, workers = workers, chunk = max(1, landings // (4 * workers)))
+    elapsed = time.perf_counter() - start
+
+    return {"player": "greedy", "workers": workers, "landings": added, "per_hour": added / elapsed * 3600, "lines": None}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description = __doc__)
+    parser.add_argument("--landings", type = int, default = 10_000)
+    parser.add_argument("--lookahead", type = int, default = 0)
+    parser.add_argument("--workers", type = int, nargs = "+", default = [1, os.cpu_count() or 1])
+    args = parser.parse_args()
+
+    print(f"{'player':>8} {'workers':>8} {'landings':>9} {'per hour':>12} {'lines':>7}")
+
+    results = [bench_player(player, args.landings, args.lookahead) for player in ("random", "greedy")]
+    with tempfile.TemporaryDirectory() as directory:
+        results += [bench_generate(args.landings, workers, directory) for workers in sorted(set(args.workers))]
+
+    for result in results:
+        lines = "-" if result["lines"] is None else result["lines"]
+        print(f"{result['player']:>8} {result['workers']:>8} {result['landings']:>9} {result['per_hour'] / 1e6:>11.2f}M {lines:>7}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""
+Startup cost of PatternNGrams across corpus sizes.
+
+`open` is the constructor, which only maps the binary store, `ready` is the
+background warm-up (checksum, index, journal, models). The first start trains the
+models and saves a snapshot, the second restarts from it. The eager path,
+loading every entry as a dict and rebuilding the models from them, is shown for contrast.
+"""
+import os
+import sys
+import time
+import argparse
+import tempfile
+
+from bitEngine.core.ngrams import PatternNGrams
+from bitEngine.core.ngram_model import ColumnNGramModel, PlacementNGramModel
+from bitEngine.utils import BitPatternFileManager
+
+from .bench_pattern_store import corpus
+
+
+def bench_size(size: int, directory: str) -> dict:
+    """ Times opening a saved corpus of `size` entries until the predictor is usable and until it is warm """
+    store_file = os.path.join(directory, f"pattern_{size}.bin")
+    BitPatternFileManager(store_file).save(corpus(size))
+
+    def start_up() -> tuple:
+        start = time.perf_counter()
+        predictor = PatternNGrams(
+            corpus_file = os.path.join(directory, f"pattern_{size}.json"),
+            pickle_file = os.path.join(directory, f"pattern_{size}.pkl"),
+            journal_file = os.path.join(directory, f"pattern_{size}.journal"),
+            index_file = os.path.join(directory, f"pattern_index_{size}.pkl"),
+            model_file = os.path.join(directory, f"ngrams_{size}.pkl"),
+            store_file = store_file,
+            fsync_policy = "never",
+            compact_threshold = sys.maxsize
+        )
+        opened = time.perf_counter() - start
+
+        predictor.wait_ready()
+        ready = time.perf_counter() - start
+        predictor.journal.close()
+        return opened, ready
+
+    opened, ready = start_up()
+    _, restarted = start_up()
+
+    start = time.perf_counter()
+    patterns = BitPatternFileManager(store_file).load()
+    ColumnNGramModel().rebuild(patterns)
+    PlacementNGramModel().rebuild(patterns)
+    eager = time.perf_counter() - start
+
+    return {
+        "size": size,
+        "open_ms": opened * 1e3,
+        "ready_ms": ready * 1e3,
+        "restart_ms": restarted * 1e3,
+        "eager_ms": eager * 1e3
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description = __doc__)
+    parser.add_argument("--sizes", type = int, nargs = "+", default = [1_000, 10_000, 100_000, 1_000_000])
+    args = parser.parse_args()
+
+    print(f"{'corpus':>10} {'open ms':>10} {'ready ms':>10} {'restart ms':>11} {'eager ms':>10}")
+
+    with tempfile.TemporaryDirectory() as directory:
+        for size in args.sizes:
+            result = bench_size(size, directory)
+            print(f"{result['size']:>10} {result['open_ms']:>10.2f} {result['ready_ms']:>10.1f} {result['restart_ms']:>11.1f} {result['eager_ms']:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""
+Scaling of the sharded column model training across worker processes.
+
+Every run is checked against the single-process build: same pairs, same counts and
+the same Counter order, so most_common breaks ties the same way.
+"""
+import os
+import time
+import argparse
+import tempfile
+
+from bitEngine.core.training import train_column_model
+from bitEngine.utils import BitPatternFileManager
+
+from .bench_pattern_store import corpus
+
+
+def same_model(first, second) -> bool:
+    return (
+        list(first.counts) == list(second.counts)
+        and all(list(first.counts[key].items()) == list(second.counts[key].items()) for key in first.counts)
+        and first.last_piece == second.last_piece
+    )
+
+
+def bench_size(size: int, workers: list, directory: str) -> list:
+    """ Trains one saved corpus of `size` entries with every worker count """
+    store_file = os.path.join(directory, f"pattern_{size}.bin")
+    BitPatternFileManager(store_file).save(corpus(size))
+
+    results = []
+    baseline = None
+    for count in workers:
+        start = time.perf_counter()
+        model = train_column_model(store_file, workers = count)
+        elapsed = time.perf_counter() - start
+
+        if baseline is None:
+            baseline = (model, elapsed)
+        results.append({
+            "size": size,
+            "workers": count,
+            "ms": elapsed * 1e3,
+            "speedup": baseline[1] / elapsed,
+            "identical": same_model(baseline[0], model)
+        })
+
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description = __doc__)
+    parser.add_argument("--sizes", type = int, nargs = "+", default = [100_000, 1_000_000])
+    parser.add_argument("--workers", type = int, nargs = "+", default = list(range(1, (os.cpu_count() or 1) + 1)))
+    args = parser.parse_args()
+
+    print(f"{'corpus':>10} {'workers':>8} {'ms':>10} {'speedup':>8} {'identical':>10}")
+
+    with tempfile.TemporaryDirectory() as directory:
+        for size in args.sizes:
+            for result in bench_size(size, args.workers, directory):
+                print(f"{result['size']:>10} {result['workers']:>8} {result['ms']:>10.1f} {result['speedup']:>7.2f}x {str(result['identical']):>10}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""
+Per-landing cost of PatternNGrams.write_pattern across corpus sizes.
+
+The journal, the hash index and the incremental model update should keep the
+per-write latency flat, the full `_build_model` rebuild is shown for contrast.
+Compaction runs at the predictor's own threshold, the max shows what the landing
+that starts one pays.
+"""
+import os
+import time
+import random
+import argparse
+import tempfile
+
+from statistics import mean, quantiles
+
+from bitEngine.core.ngrams import PatternNGrams
+from bitEngine.utils import BitPatternFileManager, BitPatternRecords
+
+
+PIECES = list(PatternNGrams.SHAPES.keys())
+
+
+def synthetic_corpus(size: int, seed: int = 7, pool_size: int = 1_000) -> list:
+    """ A corpus of `size` entries drawn from a small pool, so a million of them still fit in memory """
+    rng = random.Random(seed)
+
+    pool = []
+    for _ in range(pool_size):
+        piece = rng.choice(PIECES)
+        col = rng.randrange(0, 8)
+        row = rng.randrange(2, 20)
+        pool.append({
+            "piece": piece,
+            "landed_coordinates": [[x + col, y + row - 2] for x, y in PatternNGrams.SHAPES[piece]],
+            "rotation": rng.randrange(4),
+            "lines_cleared": 0,
+            "next_pieces_queue": [rng.choice(PIECES)],
+            "timestamp": "2025-01-01T00:00:00",
+            "reason": "benchmark"
+        })
+
+    return [pool[rng.randrange(pool_size)] for _ in range(size)]
+
+
+def bench_size(size: int, writes: int, directory: str) -> dict:
+    """ Times `writes` fresh landings on top of a corpus of `size` entries """
+    predictor = PatternNGrams(
+        corpus_file = os.path.join(directory, f"pattern_{size}.json"),
+        pickle_file = os.path.join(directory, f"pattern_{size}.pkl"),
+        journal_file = os.path.join(directory, f"pattern_{size}.journal"),
+        index_file = os.path.join(directory, f"pattern_index_{size}.pkl"),
+        model_file = os.path.join(directory, f"ngrams_{size}.pkl"),
+        store_file = os.path.join(directory, f"pattern_{size}.bin"),
+        fsync_policy = "never"
+    )
+    predictor.wait_ready()
+
+    predictor.patterns = BitPatternRecords(BitPatternFileManager.encode(synthetic_corpus(size)))
+    predictor.index.build_placements(predictor.patterns.placements())
+
+    start = time.perf_counter()
+    predictor._build_model(predictor.patterns)
+    rebuild = time.perf_counter() - start
+
+    rng = random.Random(size)
+    latencies = []
+
+    for i in range(writes):
+        piece = rng.choice(PIECES)
+        # * far right columns are never used by the synthetic pool, so every write is new
+        coords = [(x + 100 + i, y) for x, y in PatternNGrams.SHAPES[piece]]
+
+        start = time.perf_counter()
+        predictor.write_pattern(piece, coords, rotation = 0, next_queue = [rng.choice(PIECES)], reason = "benchmark")
+        latencies.append(time.perf_counter() - start)
+
+    predictor.close()
+
+    cuts = quantiles(latencies, n = 100)
+    return {
+        "size": size,
+        "mean_us": mean(latencies) * 1e6,
+        "p50_us": cuts[49] * 1e6,
+        "p99_us": cuts[98] * 1e6,
+        "max_us": max(latencies) * 1e6,
+        "rebuild_ms": rebuild * 1e3
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description = __doc__)
+    parser.add_argument("--sizes", type = int, nargs = "+", default = [1_000, 10_000, 100_000, 1_000_000])
+    parser.add_argument("--writes", type = int, default = 2_000)
+    args = parser.parse_args()
+
+    print(f"{'corpus':>10} {'mean us':>10} {'p50 us':>10} {'p99 us':>10} {'max us':>10} {'full rebuild ms':>16}")
+
+    with tempfile.TemporaryDirectory() as directory:
+        for size in args.sizes:
+            result = bench_size(size, args.writes, directory)
+            print(f"{result['size']:>10} {result['mean_us']:>10.1f} {result['p50_us']:>10.1f} {result['p99_us']:>10.1f} {result['max_us']:>10.1f} {result['rebuild_ms']:>16.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,280 @@
+"""
+Micro-benchmarks of the predictor and grid hot paths, headless.
+
+Every case runs on fixed seeded boards and pieces. A sample times `batch` calls,
+ops/s comes from the mean and p50 / p95 / p99 are per call, in microseconds.
+--json writes the results, --save records them as the baseline and --baseline
+compares against one: a case whose median call got slower by more than --threshold
+fails the run, the median shrugs off the odd garbage collection pause.
+Baselines are machine specific, record one on the machine that compares against it.
+"""
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import platform
+import tempfile
+
+from datetime import datetime
+
+# * nothing here opens a window, keep pygame quiet and off the display
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+
+from bitEngine.core.ngrams import PatternNGrams
+from bitEngine.core.self_play import HeadlessEngine
+from bitEngine.core.tetris_logic.core_grid import BitLogicGrid, BitLogicLineCleaner
+from bitEngine.core.tetris_logic.core_tetromino import BitLogicTetromino
+from bitEngine.utils import BitPatternFileManager, BitPatternRecords
+
+from .bench_predict_batch import random_boards
+from .bench_write_pattern import PIECES, synthetic_corpus
+
+
+BASELINE_FILE = os.path.join(os.path.dirname(__file__), "baseline.json")
+
+ROWS, COLUMNS = 20, 10
+
+# * the grid's own default width, grid cases run again on it with the width in their name
+WIDE_COLUMNS = 30
+
+
+def measure(op, samples: int, batch: int = 1, reset = None) -> dict:
+    """ Per call timings of `op(i)`, `reset(i)` runs untimed before every sample """
+    times = []
+    for sample in range(samples):
+        if reset is not None:
+            reset(sample)
+        start = time.perf_counter_ns()
+        for i in range(sample * batch, (sample + 1) * batch):
+            op(i)
+        times.append((time.perf_counter_ns() - start) / batch)
+
+    times.sort()
+
+    def percentile(p):
+        return times[min(len(times) - 1, int(p / 100 * len(times)))] / 1e3
+
+    return {
+        "ops_per_s": 1e9 * len(times) / sum(times),
+        "p50_us": percentile(50),
+        "p95_us": percentile(95),
+        "p99_us": percentile(99),
+        "samples": samples,
+        "batch": batch
+    }
+
+
+# * ---------- Fixtures ----------
+def boards(count: int = 256, columns: int = COLUMNS) -> list:
+    """ Seeded list-of-lists boards, the top rows are always free to spawn in """
+    return random_boards(count, ROWS, columns).tolist()
+
+
+def spawn_coordinates(piece: str, column: int, columns: int = COLUMNS) -> list:
+    template = PatternNGrams.SHAPES[piece]
+    column = min(column, columns - 1 - max(x for x, _ in template))
+    return [(x + column, y) for x, y in template]
+
+
+def make_predictor(directory: str, size: int, **options) -> PatternNGrams:
+    """ Warm predictor over `size` synthetic entries, nothing is written to the real data folder """
+    predictor = PatternNGrams(
+        corpus_file = os.path.join(directory, f"pattern_{size}.json"),
+        pickle_file = os.path.join(directory, f"pattern_{size}.pkl"),
+        journal_file = os.path.join(directory, f"pattern_{size}.journal"),
+        index_file = os.path.join(directory, f"pattern_index_{size}.pkl"),
+        model_file = os.path.join(directory, f"ngrams_{size}.pkl"),
+        store_file = os.path.join(directory, f"pattern_{size}.bin"),
+        fsync_policy = "never",
+        compact_threshold = sys.maxsize,
+        **options
+    )
+    predictor.wait_ready()
+    predictor.patterns = BitPatternRecords(BitPatternFileManager.encode(synthetic_corpus(size)))
+    predictor.index.build_placements(predictor.patterns.placements())
+    predictor._build_model(predictor.patterns)
+    return predictor
+
+
+def make_grid(board: list) -> BitLogicGrid:
+    grid = BitLogicGrid(None, len(board), len(board[0]))
+    for y, row in enumerate(board):
+        for x, cell in enumerate(row):
+            if cell:
+                grid.set_cell(x, y, 1)
+    return grid
+
+
+# * ---------- Predictor cases ----------
+def predictor_cases(sizes: list, samples: int, directory: str) -> dict:
+    rng = random.Random(19)
+    fixtures = boards()
+    requests = [(fixtures[n % len(fixtures)], rng.choice(PIECES), rng.choice(PIECES), [rng.choice(PIECES) for _ in range(3)])
+                for n in range(samples)]
+    drops = [(board, spawn_coordinates(piece, rng.randrange(COLUMNS))) for board, piece, _, _ in requests]
+
+    results = {}
+    for size in sizes:
+        predictor = make_predictor(directory, size)
+
+        def predict(i):
+            board, piece, prev_piece, queue = requests[i % len(requests)]
+            predictor.predict(board, piece, COLUMNS, ROWS, prev_piece, queue)
+
+        def write(i):
+            piece = PIECES[i % len(PIECES)]
+            # * far right columns are never used by the synthetic pool, so every write is new
+            predictor.write_pattern(piece, [(x + 100 + i, y) for x, y in PatternNGrams.SHAPES[piece]], next_queue = [piece], reason = "benchmark")
+
+        results[f"predict[{size}]"] = measure(predict, samples)
+        results[f"write_pattern[{size}]"] = measure(write, samples, batch = 8)
+        results[f"_build_model[{size}]"] = measure(lambda i: predictor._build_model(predictor.patterns), max(3, 10_000 // size))
+        predictor.journal.close()
+
+    placements = [predictor._drop(board, coords, COLUMNS, ROWS) for board, coords in drops]
+    results["_drop"] = measure(lambda i: predictor._drop(*drops[i % len(drops)], COLUMNS, ROWS), samples, batch = 16)
+    results["_completes_line"] = measure(lambda i: predictor._completes_line(drops[i % len(drops)][0], placements[i % len(drops)], ROWS, COLUMNS), samples, batch = 16)
+    return results
+
+
+# * ---------- Grid cases ----------
+def grid_cases(samples: int, columns: int = COLUMNS) -> dict:
+    rng = random.Random(23)
+    fixtures = boards(64, columns)
+    grids = [make_grid(board) for board in fixtures]
+    pieces = [(rng.choice(PIECES), rng.randrange(columns)) for _ in range(samples)]
+
+    def spawned(i):
+        piece, column = pieces[i % len(pieces)]
+        grid = grids[i % len(grids)]
+        tetromino = BitLogicTetromino(grid, piece, spawn_coordinates(piece, column, columns))
+        tetromino.indicator = True
+        return tetromino
+
+    falling = [spawned(i) for i in range(len(pieces))]
+
+    results = {}
+    results["tetromino.check_collision"] = measure(lambda i: falling[i % len(falling)].check_collision(falling[i % len(falling)].coordinates, dy = 1), samples, batch = 16)
+    results["tetromino.drop_distance"] = measure(lambda i: falling[i % len(falling)].drop_distance(), samples, batch = 4)
+    # * the ghost is cached per position and board, this is the cost of a render frame once it was worked out
+    results["tetromino.get_ghost_coords"] = measure(lambda i: falling[i % len(falling)].get_ghost_coords(), samples, batch = 4)
+
+    # * hard drop locks the piece into the grid, it is taken out again and a fresh one spawned before every sample
+    current = []
+
+    def place(i):
+        if current:
+            current[0].grid_logic.set_cells(current[0].coordinates, 0)
+            current[0].grid_logic.take_lock_events()
+            current.clear()
+        current.append(spawned(i))
+
+    results["tetromino.hard_drop"] = measure(lambda i: current[0].hard_drop(), samples, reset = place)
+
+    # * every full row of the stacks is one cell short so checking never clears
+    cleaners = []
+    for board in fixtures:
+        grid = make_grid(board)
+        for y, row in enumerate(grid.cells):
+            if row == grid.full_mask:
+                grid.set_cell(0, y, 0)
+        cleaners.append((BitLogicLineCleaner(HeadlessEngine(), grid, ROWS), grid.cells[:]))
+
+    # * a piece locks on the free top rows before every sample, the stack is put back first
+    def lock(i):
+        cleaner, cells = cleaners[i % len(cleaners)]
+        cleaner.grid_logic.cells[:] = cells
+        tetromino = falling[i % len(falling)]
+        tetromino.grid_logic = cleaner.grid_logic
+        cleaner.grid_logic.lock(tetromino)
+
+    results["line_cleaner.check_clearing"] = measure(lambda i: cleaners[i % len(cleaners)][0].check_clearing(), samples, reset = lock)
+    results["line_cleaner.update_idle"] = measure(lambda i: cleaners[i % len(cleaners)][0].update(), samples, batch = 16)
+
+    # * the two bottom rows go, a fresh copy of the board is put back before every sample
+    def refill(i):
+        grids[i % len(grids)] = make_grid(fixtures[i % len(fixtures)])
+
+    results["grid.clear_rows"] = measure(lambda i: grids[i % len(grids)].clear_rows({ROWS - 2, ROWS - 1}), samples, reset = refill)
+    results["grid.set_cell"] = measure(lambda i: grids[i % len(grids)].set_cell(i % columns, 0, i // len(grids) % 2), samples, batch = 16)
+
+    if columns == COLUMNS:
+        return results
+    return {f"{name}[{columns}]": result for name, result in results.items()}
+
+
+# * ---------- Baseline ----------
+def compare(results: dict, baseline: dict, threshold: float) -> list:
+    """ Cases whose median speed fell below (1 - threshold) of the baseline, as (name, ratio) """
+    regressions = []
+    for name, result in results.items():
+        before = baseline.get(name)
+        if before is None:
+            continue
+        ratio = before["p50_us"] / result["p50_us"]
+        result["baseline_ratio"] = ratio
+        if ratio < 1 - threshold:
+            regressions.append((name, ratio))
+    return regressions
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description = __doc__)
+    parser.add_argument("--sizes", type = int, nargs = "+", default = [1_000, 10_000])
+    parser.add_argument("--samples", type = int, default = 500)
+    parser.add_argument("--wide", type = int, default = WIDE_COLUMNS, help = "board width of the second grid run, 0 to skip it")
+    parser.add_argument("--json", default = None, help = "write the results here, - for stdout")
+    parser.add_argument("--baseline", default = None, help = f"compare against a saved run, e.g. {BASELINE_FILE}")
+    parser.add_argument("--save", default = None, help = "save this run as a baseline")
+    parser.add_argument("--threshold", type = float, default = 0.25, help = "allowed speed drop before a case fails")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        results = predictor_cases(args.sizes, args.samples, directory)
+    results.update(grid_cases(args.samples))
+    if args.wide:
+        results.update(grid_cases(args.samples, args.wide))
+
+    regressions = []
+    if args.baseline:
+        with open(args.baseline, "r", encoding = "utf-8") as file:
+            regressions = compare(results, json.load(file)["results"], args.threshold)
+
+    report = {
+        "meta": {
+            "date": datetime.now().isoformat(timespec = "seconds"),
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "sizes": args.sizes,
+            "wide": args.wide,
+            "samples": args.samples
+        },
+        "results": results
+    }
+
+    print(f"{'case':>30} {'ops/s':>12} {'p50 us':>10} {'p95 us':>10} {'p99 us':>10} {'vs base':>8}", file = sys.stderr)
+    for name, result in results.items():
+        ratio = f"{result['baseline_ratio']:.2f}x" if "baseline_ratio" in result else "-"
+        print(f"{name:>30} {result['ops_per_s']:>12.0f} {result['p50_us']:>10.1f} {result['p95_us']:>10.1f} {result['p99_us']:>10.1f} {ratio:>8}", file = sys.stderr)
+
+    if args.json == "-":
+        json.dump(report, sys.stdout, indent = 2)
+        print()
+    elif args.json:
+        with open(args.json, "w", encoding = "utf-8") as file:
+            json.dump(report, file, indent = 2)
+
+    if args.save:
+        with open(args.save, "w", encoding = "utf-8") as file:
+            json.dump(report, file, indent = 2)
+
+    for name, ratio in regressions:
+        print(f"Regression: {name} runs at {ratio:.2f}x of the baseline.", file = sys.stderr)
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,330 @@
+# batch_predict.py
+"""
+Vectorized PatternNGrams.predict over a stack of boards.
+
+Boards come in as one (N, rows, columns) array. Skylines, hard drops and line
+completions are computed for every rotation and column of every board at once, the
+placement model is exported to sorted arrays so its contexts, backoff and scores are
+looked up with searchsorted instead of one dict probe per board.
+"""
+from typing import NamedTuple
+
+import numpy as np
+
+from .geometry import DISTINCT_ROTATIONS, PIECE_GEOMETRY
+from .ngram_model import PIECE_CODES
+
+# one slot per (rotation, column), slot = rotation * columns + column
+CANDIDATE_DTYPE = np.dtype([
+    ("rotation", "u1"),
+    ("column", "i2"),
+    ("row", "i2"),            # top row the piece rests on, -1 when it does not fit
+    ("lines_cleared", "u1"),
+    ("valid", "?"),           # fits and is the first rotation with this shape
+    ("score", "f4")           # PlacementNGramModel.probability of the placement
+])
+
+CHOICE_DTYPE = np.dtype([
+    ("rotation", "u1"),
+    ("column", "i2"),
+    ("row", "i2"),
+    ("lines_cleared", "u1"),
+    ("reason", "u1"),         # index into REASONS
+    ("score", "f4")
+])
+
+REASONS = ("none", "line_clear", "ngram_backoff", "ngram_fallback")
+
+_CODE_LUT = np.zeros(128, dtype=np.int64)
+for _piece, _code in PIECE_CODES.items():
+    _CODE_LUT[ord(_piece)] = _code
+_PIECES = {code: piece for piece, code in PIECE_CODES.items()}
+
+
+class BatchPrediction(NamedTuple):
+    candidates: np.ndarray  # (N, 4 * columns) CANDIDATE_DTYPE
+    chosen: np.ndarray      # (N,) CHOICE_DTYPE, what predict would have returned for each board
+
+
+def piece_codes(pieces):
+    """Piece letters -> PIECE_CODES, anything else (None, "") -> 0."""
+    letters = np.ascontiguousarray(pieces, dtype="U1")
+    return _CODE_LUT[np.minimum(letters.view(np.uint32), 127)]
+
+
+def _queue_codes(next_queues, count):
+    if next_queues is None:
+        return np.zeros((count, 4), dtype=np.int64)
+    try:
+        queues = np.asarray(next_queues, dtype="U1").reshape(count, -1)[:, :4]
+    except ValueError:
+        # * ragged queues are padded with "" one by one
+        queues = np.array([(list(queue or []) + [""] * 4)[:4] for queue in next_queues], dtype="U1")
+    codes = np.zeros((count, 4), dtype=np.int64)
+    codes[:, :queues.shape[1]] = piece_codes(queues)
+    return codes
+
+
+def _column(values, sentinel=None):
+    """array.array -> independent numpy copy, with an optional trailing sentinel that index -1 lands on."""
+    column = np.frombuffer(values, dtype=values.typecode) if len(values) else np.zeros(0, dtype=values.typecode)
+    if sentinel is not None:
+        return np.append(column, np.array(sentinel, dtype=column.dtype))
+    return column.copy()
+
+
+# --- Board geometry ---
+def profile(filled):
+    """(N, rows, columns) bool -> column heights (N, columns) and filled cells per row (N, rows)."""
+    count, rows, columns = filled.shape
+    dtype = np.min_scalar_type(max(rows, columns))
+
+    # * a handful of whole-stack passes over rows / columns beats reductions along a short axis
+    heights = np.zeros((count, columns), dtype=dtype)
+    for y in range(rows):
+        np.maximum(heights, filled[:, y] * dtype.type(rows - y), out=heights)
+
+    fill = np.zeros((count, rows), dtype=dtype)
+    for x in range(columns):
+        fill += filled[:, :, x]
+    return heights.astype(np.int64), fill.astype(np.int64)
+
+
+def drops(heights, fill, codes):
+    """(N, 4 * columns) landing row, lines cleared and validity of every placement of each board's piece."""
+    count, columns = heights.shape
+    rows = fill.shape[1]
+
+    # * boards are grouped by piece so every orientation works on one contiguous slice
+    order = np.argsort(codes, kind="stable")
+    bounds = np.searchsorted(codes[order], np.arange(len(PIECE_CODES) + 2))
+    tops = (rows - heights[order]).astype(np.int16)
+
+    # * cells still missing per row, rows above the board (a piece that does not fit) never complete
+    gaps = np.full((count, rows + 4), columns + 1, dtype=np.int16)
+    gaps[:, 4:] = columns - fill[order]
+
+    landing = np.full((count, 4, columns), -1, dtype=np.int16)
+    lines = np.zeros((count, 4, columns), dtype=np.uint8)
+    valid = np.zeros((count, 4, columns), dtype=bool)
+
+    for piece, code in PIECE_CODES.items():
+        first, last = bounds[code], bounds[code + 1]
+        if first == last:
+            continue
+        piece_tops, piece_gaps = tops[first:last], gaps[first:last].ravel()
+        base = np.arange(last - first)[:, None] * (rows + 4) + 4
+
+        orientations = PIECE_GEOMETRY[piece]
+        for rotation in DISTINCT_ROTATIONS[piece]:
+            orientation = orientations[rotation]
+            span = columns - orientation.width + 1
+            if span <= 0:
+                continue
+            # * the piece rests where the first column of its profile touches the skyline
+            y = piece_tops[:, 0:span] - np.int16(1 + orientation.bottom[0])
+            for dx in range(1, orientation.width):
+                np.minimum(y, piece_tops[:, dx:dx + span] - np.int16(1 + orientation.bottom[dx]), out=y)
+            fits = y >= 0
+
+            at = base + y
+            cleared = np.zeros(y.shape, dtype=np.uint8)
+            for dy, cells in enumerate(orientation.row_counts):
+                cleared += piece_gaps[at + dy] == cells
+
+            landing[first:last, rotation, :span] = np.where(fits, y, -1)
+            lines[first:last, rotation, :span] = cleared * fits
+            valid[first:last, rotation, :span] = fits
+
+        # * a repeated rotation lands exactly like the first one with its shape
+        for rotation, orientation in enumerate(orientations):
+            if rotation not in DISTINCT_ROTATIONS[piece]:
+                twin = next(r for r in DISTINCT_ROTATIONS[piece] if set(orientations[r].cells) == set(orientation.cells))
+                landing[first:last, rotation] = landing[first:last, twin]
+                lines[first:last, rotation] = lines[first:last, twin]
+
+    # * back to the caller's board order
+    restore = np.empty_like(order)
+    restore[order] = np.arange(count)
+    return landing.reshape(count, -1)[restore], lines.reshape(count, -1)[restore], valid.reshape(count, -1)[restore]
+
+
+# --- Model lookups ---
+def _context_keys(model, codes, heights, prev_codes, queue_codes):
+    """(N, levels) PlacementNGramModel.context_keys, computed with int64 arithmetic when the keys fit."""
+    count, columns = heights.shape
+    history = [PIECE_CODES.get(piece, 0) for piece in model.history] + [0] * model.order
+    steps = np.clip(heights[:, 1:] - heights[:, :-1], -2, 2) + 2
+
+    surf_bits = (5 ** max(columns - 1, 0)).bit_length()
+    if 4 + 15 + 3 * model.order + surf_bits > 60:
+        # * too wide for int64, Python's int hash has to do it
+        keys = np.empty((count, 3 + model.order), dtype=np.int64)
+        for n in range(count):
+            surface = "".join(map(str, steps[n].tolist()))
+            prev = _PIECES.get(int(prev_codes[n])) or (model.history[0] if model.history else None)
+            queue = [_PIECES.get(int(code)) for code in queue_codes[n] if code]
+            keys[n] = model.context_keys(_PIECES.get(int(codes[n])), surface, queue, [prev] + model.history[1:])
+        return keys
+
+    if columns > 1:
+        surf = steps @ (5 ** np.arange(columns - 2, -1, -1, dtype=np.int64)) + 1
+    else:
+        surf = np.zeros(count, dtype=np.int64)
+
+    queued = np.zeros(count, dtype=np.int64)
+    for i in range(4):
+        queued |= queue_codes[:, i] << (3 * i)
+
+    packed = [codes, codes | (surf << 3), codes | (queued << 3) | (surf << 15)]
+    fields = codes | (queued << 3)
+    for i in range(model.order):
+        previous = np.where(prev_codes > 0, prev_codes, history[0]) if i == 0 else history[i]
+        fields = fields | (previous << (15 + 3 * i))
+        packed.append(fields | (surf << (15 + 3 * model.order)))
+
+    # * hash() of a non-negative int below 2 ** 61 - 1 is the int itself
+    return np.stack([(key << 4) | level for level, key in enumerate(packed)], axis=1)
+
+
+def _lookup(keys, queries):
+    """Row of every query in an unsorted int64 key column, -1 when absent."""
+    if not len(keys):
+        return np.full(queries.shape, -1, dtype=np.int64)
+    order = np.argsort(keys, kind="stable")
+    sorted_keys = keys[order]
+    at = np.minimum(np.searchsorted(sorted_keys, queries), len(keys) - 1)
+    return np.where(sorted_keys[at] == queries, order[at], -1)
+
+
+def scores(model, context_rows, slot_codes, num_outcomes=160):
+    """Interpolated absolute-discount probability of every slot, plus the Katz backoff choice per board."""
+    # * context row -1 (unseen) picks the zeroed sentinel at the end of every column
+    contexts, pairs = model.contexts.fields, model.pairs.fields
+    total = _column(contexts["total"], 0).astype(np.float64)
+    distinct = _column(contexts["distinct"], 0).astype(np.float64)
+    best = _column(contexts["best"], 0).astype(np.int64)
+
+    # * (context row, outcome code) -> count, as one sorted composite key
+    stride = model.max_code + 1
+    composite = _column(pairs["context"]).astype(np.int64) * stride + _column(pairs["code"])
+    order = np.argsort(composite, kind="stable")
+    composite = np.append(composite[order], -1)
+    pair_counts = np.append(_column(pairs["count"])[order], 0)
+    known = slot_codes <= model.max_code
+
+    count = context_rows.shape[0]
+    probability = np.full((count, slot_codes.size), 1.0 / num_outcomes, dtype=np.float32)
+    choice = np.full(count, -1, dtype=np.int64)
+
+    for level in range(context_rows.shape[1]):
+        rows = context_rows[:, level]
+        level_total = total[rows]
+
+        # * deeper levels overwrite shallower ones, the deepest qualifying context wins
+        qualifies = (rows >= 0) & (level_total >= model.min_count)
+        choice = np.where(qualifies, best[rows], choice)
+
+        # * only boards whose context was seen move, and each distinct context is scored once
+        boards = np.nonzero(level_total > 0)[0]
+        if not len(boards):
+            continue
+        everyone = len(boards) == count
+        unique, inverse = np.unique(rows if everyone else rows[boards], return_inverse=True)
+
+        queries = unique[:, None] * stride + slot_codes
+        at = np.minimum(np.searchsorted(composite[:-1], queries), len(composite) - 1)
+        seen = np.where((composite[at] == queries) & known, pair_counts[at], 0)
+
+        own = (np.maximum(seen - model.DISCOUNT, 0) / total[unique][:, None]).astype(np.float32)
+        weight = (model.DISCOUNT * distinct[unique] / total[unique]).astype(np.float32)[:, None]
+        if everyone:
+            probability *= weight[inverse]
+            probability += own[inverse]
+        else:
+            probability[boards] = own[inverse] + weight[inverse] * probability[boards]
+
+    return probability, choice
+
+
+def _fallback_columns(col_model):
+    """(prev code, cur code) -> most common column of the column model, -1 when never seen."""
+    table = np.full((8, 8), -1, dtype=np.int64)
+    for (prev, cur), counter in col_model.items():
+        if prev in PIECE_CODES and cur in PIECE_CODES and counter:
+            table[PIECE_CODES[prev], PIECE_CODES[cur]] = counter.most_common(1)[0][0]
+    return table
+
+
+_WIDTHS = np.zeros((8, 4), dtype=np.int64)
+for _piece, _orientations in PIECE_GEOMETRY.items():
+    _WIDTHS[PIECE_CODES[_piece]] = [o.width for o in _orientations]
+
+
+# --- Entry point ---
+def predict_batch(model, col_model, boards, pieces, prev_pieces=None, next_queues=None, last_piece=None):
+    """Score every placement of every board and pick what PatternNGrams.predict would pick.
+
+    `last_piece` stands in for any board without a previous piece, like
+    PatternNGrams.last_piece_seen does, but it is never advanced between boards.
+    """
+    boards = np.asarray(boards)
+    if boards.ndim != 3:
+        raise ValueError(f"boards must be (N, rows, columns), got shape {boards.shape}")
+    count, rows, columns = boards.shape
+
+    codes = piece_codes(pieces).reshape(count)
+    prev_codes = piece_codes(prev_pieces).reshape(count) if prev_pieces is not None else np.zeros(count, dtype=np.int64)
+    queue_codes = _queue_codes(next_queues, count)
+
+    heights, fill = profile(boards != 0)
+    landing, lines, valid = drops(heights, fill, codes)
+
+    # * model scores of every slot, slot = rotation * columns + column
+    slot_rotations = np.repeat(np.arange(4), columns)
+    slot_columns = np.tile(np.arange(columns), 4)
+    context_rows = _lookup(_column(model.contexts.keys), _context_keys(model, codes, heights, prev_codes, queue_codes))
+    probability, choice = scores(model, context_rows, (slot_columns << 2) | slot_rotations)
+
+    candidates = np.empty((count, 4 * columns), dtype=CANDIDATE_DTYPE)
+    candidates["rotation"] = slot_rotations
+    candidates["column"] = slot_columns
+    candidates["row"] = landing
+    candidates["lines_cleared"] = lines
+    candidates["valid"] = valid
+    candidates["score"] = probability
+
+    # 3. column model fallback, rotation 0
+    prev_or_last = np.where(prev_codes > 0, prev_codes, PIECE_CODES.get(last_piece, 0))
+    column = np.maximum(_fallback_columns(col_model)[prev_or_last, codes], 0)
+    rotation = np.zeros(count, dtype=np.int64)
+    reason = np.full(count, REASONS.index("ngram_fallback"))
+
+    # 2. placement model backoff
+    backoff = choice >= 0
+    column = np.where(backoff, choice >> 2, column)
+    rotation = np.where(backoff, choice & 3, rotation)
+    reason = np.where(backoff, REASONS.index("ngram_backoff"), reason)
+
+    # * pieces past the right edge are shifted back, like PatternNGrams._place
+    column = np.clip(np.minimum(column, columns - _WIDTHS[codes, rotation]), 0, columns - 1)
+    slot = rotation * columns + column
+
+    # 1. the first placement that clears a line beats both
+    clears = valid & (lines > 0)
+    line_clear = clears.any(axis=1)
+    slot = np.where(line_clear, clears.argmax(axis=1), slot)
+    reason = np.where(line_clear, REASONS.index("line_clear"), reason)
+
+    picked = candidates[np.arange(count), slot]
+    known = codes > 0
+
+    chosen = np.empty(count, dtype=CHOICE_DTYPE)
+    chosen["rotation"] = picked["rotation"]
+    chosen["column"] = picked["column"]
+    chosen["row"] = np.where(known, picked["row"], -1)
+    chosen["lines_cleared"] = picked["lines_cleared"]
+    chosen["reason"] = np.where(known, reason, REASONS.index("none"))
+    chosen["score"] = picked["score"]
+
+    return BatchPrediction(candidates, chosen)
@@ -0,0 +1,158 @@
+# beam_search.py
+import time
+from collections import OrderedDict
+from operator import sub
+from typing import NamedTuple, Optional, Tuple
+
+from .bitboard import BitBoard
+from .geometry import PIECE_GEOMETRY
+
+
+class PlanNode(NamedTuple):
+    score: float
+    lines: int
+    bits: BitBoard
+    moves: Tuple[Tuple[str, int, int, int, int], ...]  # (piece, rotation, column, row, lines cleared)
+
+
+class BeamSearchPlanner:
+    """Depth-limited beam search over the current piece and the visible queue.
+
+    Every level places the next queued piece in each (rotation, column) of every board in
+    the beam and keeps the `width` best results. Boards reached twice at the same depth are
+    merged, and static board evaluations are kept in a bounded LRU transposition table
+    shared between searches. The search stops at `time_budget_ms` or after `max_nodes` placed
+    boards, whichever comes first, and plans with what it has. It is pure Python and holds the
+    GIL while it runs, the defaults keep one search near 2 ms, a quarter of a 120 Hz frame.
+    """
+
+    # aggregate height, holes, bumpiness per board, lines per cleared line along the plan
+    HEIGHT, HOLES, BUMPINESS, LINES = -0.51, -0.36, -0.18, 0.76
+
+    def __init__(self, width=4, depth=None, time_budget_ms=2.0, max_nodes=128, table_size=8192, clock=time.perf_counter):
+        self.width = width
+        self.depth = depth
+        self.time_budget_ms = time_budget_ms
+        self.max_nodes = max_nodes  # None for no cap
+        self.table_size = table_size
+        self.clock = clock
+
+        self.table = OrderedDict()  # board key -> static evaluation, least recently used first
+        self.hits = 0
+        self.misses = 0
+
+        # filled in by the last search
+        self.searched_depth = 0
+        self.expanded = 0
+        self.nodes = 0
+        self.timed_out = False
+        self.capped = False
+
+    # --- Evaluation ---
+    def evaluate(self, bits: BitBoard, key=None) -> float:
+        key = key or bits.key()
+        score = self.table.get(key)
+        if score is not None:
+            self.table.move_to_end(key)
+            self.hits += 1
+            return score
+
+        self.misses += 1
+        tops = bits.tops
+        height = bits.rows * bits.columns - sum(tops)
+        bumpiness = sum(map(abs, map(sub, tops, tops[1:])))
+        score = self.HEIGHT * height + self.HOLES * bits.holes() + self.BUMPINESS * bumpiness
+
+        self.table[key] = score
+        if len(self.table) > self.table_size:
+            self.table.popitem(last=False)
+        return score
+
+    def _child(self, node: PlanNode, piece: str, rotation: int, column: int, y: int) -> Tuple[PlanNode, Tuple[int, ...]]:
+        """Node after placing `piece`, with the key of its board for the transposition merge."""
+        orientation = PIECE_GEOMETRY[piece][rotation]
+        cleared = node.bits.cleared_rows(orientation, column, y)
+        bits = node.bits.place(orientation, column, y).clear(cleared)
+        key = bits.key()
+        lines = node.lines + len(cleared)
+        move = (piece, rotation, column, y, len(cleared))
+        return PlanNode(self.evaluate(bits, key) + self.LINES * lines, lines, bits, node.moves + (move,)), key
+
+    @staticmethod
+    def steps(moves):
+        """Plan moves as predict-style dicts."""
+        return [{
+            "piece": piece,
+            "rotation": rotation,
+            "column": column,
+            "row": y,
+            "placement": BitBoard.coordinates(PIECE_GEOMETRY[piece][rotation], column, y),
+            "lines_cleared": lines
+        } for piece, rotation, column, y, lines in moves]
+
+    # --- Search ---
+    def search(self, bits: BitBoard, pieces, root: Optional[Tuple[int, int, int]] = None):
+        """Best sequence of placement steps for `pieces` in order, [] when the first one has nowhere to go.
+
+        `root` pins the first piece to a (rotation, column, row) placement and only plans the rest.
+        """
+        pieces = [piece for piece in pieces if piece in PIECE_GEOMETRY]
+        depth = len(pieces) if self.depth is None else min(self.depth, len(pieces))
+        deadline = self.clock() + self.time_budget_ms / 1000
+
+        self.searched_depth = 0
+        self.expanded = 0
+        self.nodes = 0
+        self.timed_out = False
+        self.capped = False
+        max_nodes = float("inf") if self.max_nodes is None else self.max_nodes
+        if not depth:
+            return []
+
+        beam = [PlanNode(0.0, 0, bits, ())]
+        if root is not None:
+            beam = [self._child(beam[0], pieces[0], *root)[0]]
+            self.searched_depth = 1
+
+        for level in range(self.searched_depth, depth):
+            piece = pieces[level]
+            merged = {}  # transposition at this depth: board key -> best node reaching it
+
+            for node in beam:
+                self.expanded += 1
+                for rotation, column, y in node.bits.placements(piece):
+                    if self.clock() > deadline:
+                        self.timed_out = True
+                        break
+                    if self.nodes >= max_nodes:
+                        self.capped = True
+                        break
+                    self.nodes += 1
+                    child, key = self._child(node, piece, rotation, column, y)
+                    known = merged.get(key)
+                    if known is None or child.score > known.score:
+                        merged[key] = child
+                if self.timed_out or self.capped:
+                    break
+
+            if not merged:
+                break
+            # * a level cut short by the budget or the cap still beats the one before it, its best parents went first
+            beam = sorted(merged.values(), key=lambda node: node.score, reverse=True)[:self.width]
+            self.searched_depth = level + 1
+            if self.timed_out or self.capped:
+                break
+
+        return self.steps(max(beam, key=lambda node: node.score).moves)
+
+    def stats(self):
+        return {
+            "searched_depth": self.searched_depth,
+            "expanded": self.expanded,
+            "nodes": self.nodes,
+            "timed_out": self.timed_out,
+            "capped": self.capped,
+            "table_size": len(self.table),
+            "table_hits": self.hits,
+            "table_misses": self.misses
+        }
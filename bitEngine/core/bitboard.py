@@ -0,0 +1,130 @@
+# bitboard.py
+from itertools import compress
+from typing import List, Optional, Tuple
+
+from .geometry import DISTINCT_ROTATIONS, PIECE_GEOMETRY, PieceOrientation
+
+
+class BitBoard:
+    """Board as one int bitmask per row (bit x = column x) with a column-height skyline.
+
+    `tops[x]` is the row of the highest filled cell in column x (`rows` when empty), so a
+    piece dropped from above lands in O(piece width) without walking down row by row.
+    `fill[y]` counts the filled cells of row y, a placement completes row y when its own
+    cells on that row make up the difference, so line checks only touch the piece's rows.
+    """
+
+    __slots__ = ("rows", "columns", "full", "cells", "tops", "fill")
+
+    def __init__(self, rows: int, columns: int, cells: Optional[List[int]] = None) -> None:
+        self.rows = rows
+        self.columns = columns
+        self.full = (1 << columns) - 1
+        self.cells = list(cells) if cells is not None else [0] * rows
+        self.tops = self._skyline()
+        self.fill = [mask.bit_count() for mask in self.cells]
+
+    @classmethod
+    def from_board(cls, board, columns: int, rows: int) -> "BitBoard":
+        """Build from a list-of-lists board where any non-zero cell is filled."""
+        bits = [1 << x for x in range(columns)]
+        cells = [sum(compress(bits, row)) for row in board[:rows]]
+        return cls(rows, columns, cells)
+
+    def _skyline(self) -> List[int]:
+        tops = [self.rows] * self.columns
+        remaining = self.full
+        for y, mask in enumerate(self.cells):
+            hit = mask & remaining
+            if hit:
+                remaining &= ~hit
+                while hit:
+                    low = hit & -hit
+                    tops[low.bit_length() - 1] = y
+                    hit ^= low
+                if not remaining:
+                    break
+        return tops
+
+    # --- Placement ---
+    def drop(self, orientation: PieceOrientation, column: int) -> Optional[int]:
+        """Top row where the piece comes to rest when dropped at `column`, None if it does not fit."""
+        if column < 0 or column + orientation.width > self.columns:
+            return None
+        tops = self.tops
+        y = min(tops[column + dx] - 1 - low for dx, low in enumerate(orientation.bottom))
+        return y if y >= 0 else None
+
+    def fits(self, orientation: PieceOrientation, column: int, y: int) -> bool:
+        if column < 0 or y < 0 or column + orientation.width > self.columns or y + orientation.height > self.rows:
+            return False
+        cells = self.cells
+        return not any(cells[y + dy] & (row << column) for dy, row in enumerate(orientation.row_masks))
+
+    def completes_line(self, orientation: PieceOrientation, column: int, y: int) -> bool:
+        fill, columns = self.fill, self.columns
+        return any(fill[y + dy] + count == columns for dy, count in enumerate(orientation.row_counts))
+
+    def cleared_rows(self, orientation: PieceOrientation, column: int, y: int) -> Tuple[int, ...]:
+        """Exact rows a legal placement completes, top to bottom."""
+        fill, columns = self.fill, self.columns
+        return tuple(y + dy for dy, count in enumerate(orientation.row_counts) if fill[y + dy] + count == columns)
+
+    def placements(self, piece: str) -> List[Tuple[int, int, int]]:
+        """Every (rotation, column, row) a piece can be hard dropped to, one per distinct shape."""
+        found = []
+        orientations = PIECE_GEOMETRY[piece]
+        tops = self.tops
+        for rotation in DISTINCT_ROTATIONS[piece]:
+            orientation = orientations[rotation]
+            span = self.columns - orientation.width + 1
+            if span <= 0:
+                continue
+            # * one shifted skyline per piece column, the landing row is their column-wise minimum
+            lanes = [[top - low - 1 for top in tops[dx:dx + span]] for dx, low in enumerate(orientation.bottom)]
+            for column, y in enumerate(map(min, *lanes) if len(lanes) > 1 else lanes[0]):
+                if y >= 0:
+                    found.append((rotation, column, y))
+        return found
+
+    def place(self, orientation: PieceOrientation, column: int, y: int) -> "BitBoard":
+        """New board with the piece locked in, the receiver is left untouched."""
+        board = BitBoard.__new__(BitBoard)
+        board.rows, board.columns, board.full = self.rows, self.columns, self.full
+        board.cells, board.fill, board.tops = self.cells[:], self.fill[:], self.tops[:]
+
+        # * only the piece's rows and columns change, no rescan of the skyline
+        for dy, row in enumerate(orientation.row_masks):
+            board.cells[y + dy] |= row << column
+            board.fill[y + dy] += orientation.row_counts[dy]
+        for dx, top in enumerate(orientation.top):
+            board.tops[column + dx] = min(board.tops[column + dx], y + top)
+        return board
+
+    def clear(self, rows) -> "BitBoard":
+        """New board with `rows` removed and everything above them shifted down."""
+        if not rows:
+            return self
+        removed = set(rows)
+        kept = [mask for y, mask in enumerate(self.cells) if y not in removed]
+        return BitBoard(self.rows, self.columns, [0] * (self.rows - len(kept)) + kept)
+
+    def key(self) -> Tuple[int, ...]:
+        """Hashable identity of the cells, equal boards share a key."""
+        return tuple(self.cells)
+
+    # --- Features ---
+    def heights(self) -> List[int]:
+        return [self.rows - top for top in self.tops]
+
+    def holes(self) -> int:
+        """Empty cells with a filled cell somewhere above them."""
+        covered = holes = 0
+        for mask in self.cells[min(self.tops):]:
+            holes += (covered & ~mask).bit_count()
+            covered |= mask
+        return holes
+
+    @staticmethod
+    def coordinates(orientation: PieceOrientation, column: int, y: int) -> List[Tuple[int, int]]:
+        return [(x + column, dy + y) for x, dy in orientation.cells]
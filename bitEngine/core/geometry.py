@@ -0,0 +1,104 @@
+# geometry.py
+"""
+Piece geometry shared by the logic, predictor and interface layers.
+
+Everything is computed once at import and exposed read-only, hot paths index into
+these tables instead of rotating or measuring pieces themselves. Rotation r of a
+piece is its template turned r times with (x, y) -> (-y, x), then moved back to the
+top-left corner; the cell order is kept, so cell i of any rotation is the same block.
+"""
+from types import MappingProxyType
+from typing import Mapping, NamedTuple, Tuple
+
+Cell = Tuple[int, int]
+
+# --- Piece templates ---
+PIECE_SHAPES: Mapping[str, Tuple[Cell, ...]] = MappingProxyType({
+    "O": ((0, 0), (1, 0), (0, 1), (1, 1)),
+    "I": ((0, 0), (1, 0), (2, 0), (3, 0)),
+    "T": ((1, 0), (0, 1), (1, 1), (2, 1)),
+    "L": ((0, 0), (0, 1), (0, 2), (1, 2)),
+    "J": ((1, 0), (1, 1), (1, 2), (0, 2)),
+    "S": ((1, 0), (2, 0), (0, 1), (1, 1)),
+    "Z": ((0, 0), (1, 0), (1, 1), (2, 1))
+})
+
+
+class PieceOrientation(NamedTuple):
+    """One rotation of a piece, every offset is relative to its top-left corner."""
+    piece: str
+    rotation: int
+    cells: Tuple[Cell, ...]
+    width: int
+    height: int
+    row_masks: Tuple[int, ...]             # bit dx set for every cell on row dy
+    row_counts: Tuple[int, ...]            # cells on row dy
+    bottom: Tuple[int, ...]                # lowest dy in every column dx, the drop profile
+    top: Tuple[int, ...]                   # highest dy in every column dx
+    pivots: Tuple[Tuple[Cell, Cell], ...]  # [x parity][y parity] of the corner -> pivot offset
+
+
+def _rotate(cells):
+    rotated = [(-y, x) for x, y in cells]
+    min_x = min(x for x, _ in rotated)
+    min_y = min(y for _, y in rotated)
+    return tuple((x - min_x, y - min_y) for x, y in rotated)
+
+
+def _pivot_offset(parity, span):
+    # * pieces snap their pivot with round(), which rounds halves to even, so the offset
+    # * from the corner depends on whether the corner sits on an even or odd cell
+    return round(parity + (span - 1) / 2) - parity
+
+
+def _orientation(piece, rotation, cells):
+    width = max(x for x, _ in cells) + 1
+    height = max(y for _, y in cells) + 1
+
+    row_masks = [0] * height
+    bottom = [0] * width
+    top = [height] * width
+    for x, y in cells:
+        row_masks[y] |= 1 << x
+        bottom[x] = max(bottom[x], y)
+        top[x] = min(top[x], y)
+
+    pivots = tuple(
+        tuple((_pivot_offset(px, width), _pivot_offset(py, height)) for py in (0, 1))
+        for px in (0, 1)
+    )
+    row_counts = tuple(mask.bit_count() for mask in row_masks)
+    return PieceOrientation(piece, rotation, cells, width, height, tuple(row_masks), row_counts, tuple(bottom), tuple(top), pivots)
+
+
+def _build():
+    geometry = {}
+    for piece, shape in PIECE_SHAPES.items():
+        cells = shape
+        orientations = []
+        for rotation in range(4):
+            orientations.append(_orientation(piece, rotation, cells))
+            cells = _rotate(cells)
+        geometry[piece] = tuple(orientations)
+    return geometry
+
+
+# piece -> its 4 rotations
+PIECE_GEOMETRY: Mapping[str, Tuple[PieceOrientation, ...]] = MappingProxyType(_build())
+
+# piece -> rotation indexes with a distinct shape, O has 1, I S Z have 2
+DISTINCT_ROTATIONS: Mapping[str, Tuple[int, ...]] = MappingProxyType({
+    piece: tuple(r for r, o in enumerate(orientations)
+                 if all(set(o.cells) != set(orientations[prev].cells) for prev in range(r)))
+    for piece, orientations in PIECE_GEOMETRY.items()
+})
+
+
+def orientation(piece: str, rotation: int = 0) -> PieceOrientation:
+    return PIECE_GEOMETRY[piece][rotation % 4]
+
+
+def pivot(orientation: PieceOrientation, origin_x: int, origin_y: int) -> Cell:
+    """Grid pivot of a piece whose top-left corner sits at (origin_x, origin_y)."""
+    dx, dy = orientation.pivots[origin_x & 1][origin_y & 1]
+    return origin_x + dx, origin_y + dy
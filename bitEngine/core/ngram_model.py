@@ -0,0 +1,622 @@
+# ngram_model.py
+import copy
+from array import array
+from collections import Counter, defaultdict
+from typing import NamedTuple, Optional, Tuple
+
+import numpy as np
+
+from ..utils import BitPatternFileManager
+
+
+def landing_columns(columns):
+    """(leftmost landed column, has coordinates) of every record in stored pattern columns."""
+    cells = columns["cells"]
+    leftmost = np.zeros(columns["count"], dtype=np.int64)
+    landed = cells > 0
+    starts = np.cumsum(cells, dtype=np.int64) - cells
+    if landed.any():
+        # * records without cells are empty segments, reducing from landed starts only skips them
+        leftmost[landed] = np.minimum.reduceat(columns["coordinates"][:, 0], starts[landed])
+    return leftmost, landed
+
+
+class ColumnNGramModel:
+    """(prev_piece, cur_piece) -> Counter(col) counts, updated one landing at a time."""
+
+    def __init__(self):
+        self.counts = defaultdict(Counter)
+        self.last_piece = None  # piece of the newest observed entry, in corpus order
+
+    @staticmethod
+    def landing_column(entry):
+        """Leftmost landed column of an entry, None when it has nothing to count."""
+        coords = entry.get("landed_coordinates", [])
+        if not coords or entry.get("piece") is None:
+            return None
+        return min(x for x, _ in coords)
+
+    # --- Incremental updates ---
+    def observe(self, entry):
+        """Count the entry against the previously observed piece, O(1)."""
+        cur = entry.get("piece")
+        col = self.landing_column(entry)
+        if col is not None and self.last_piece is not None:
+            self.counts[(self.last_piece, cur)][col] += 1
+        self.last_piece = cur
+
+    def retract(self, entry, prev_piece):
+        """Undo the count `entry` contributed when it followed `prev_piece`, O(1)."""
+        cur = entry.get("piece")
+        col = self.landing_column(entry)
+        if col is None or prev_piece is None:
+            return False
+
+        key = (prev_piece, cur)
+        counter = self.counts.get(key)
+        if not counter or counter[col] <= 0:
+            return False
+
+        counter[col] -= 1
+        if counter[col] <= 0:
+            del counter[col]
+        if not counter:
+            del self.counts[key]
+        return True
+
+    def decay(self):
+        """Halve every count, pairs that drop to zero are forgotten."""
+        for key in list(self.counts):
+            counter = self.counts[key]
+            for col in list(counter):
+                counter[col] //= 2
+                if not counter[col]:
+                    del counter[col]
+            if not counter:
+                del self.counts[key]
+
+    # --- Full rebuild, kept for verification ---
+    def rebuild(self, patterns):
+        """Recount the whole corpus from scratch."""
+        self.counts.clear()
+        self.last_piece = None
+        for entry in patterns:
+            self.observe(entry)
+
+    def rebuild_columns(self, columns):
+        """rebuild() straight from stored pattern columns, no entry dicts are built."""
+        ColumnCounts.from_columns(columns).apply(self)
+
+    def verify(self, patterns):
+        """True when the incremental counts match a fresh rebuild of `patterns`."""
+        fresh = ColumnNGramModel()
+        fresh.rebuild(patterns)
+        return dict(fresh.counts) == dict(self.counts) and fresh.last_piece == self.last_piece
+
+    def copy(self):
+        """Independent copy of the counts, saved while new landings keep counting into this one."""
+        model = ColumnNGramModel()
+        model.counts.update((key, counter.copy()) for key, counter in self.counts.items())
+        model.last_piece = self.last_piece
+        return model
+
+
+class ColumnCounts(NamedTuple):
+    """Mergeable ColumnNGramModel counts of a contiguous run of stored records.
+
+    Keys pack (prev piece, cur piece, leftmost column), see `pack`. The pair that straddles
+    two runs is only known when they are merged, so every run keeps its first record (`head`)
+    and last piece. merge() is associative and an empty run is its identity.
+    """
+    keys: np.ndarray
+    counts: np.ndarray
+    firsts: np.ndarray  # corpus position of each key's first occurrence, keeps Counter order
+    start: int  # corpus position of the run's first record
+    head: Optional[Tuple[str, Optional[int]]]  # (piece, leftmost column or None) of the first record
+    last_piece: Optional[str]
+
+    @staticmethod
+    def pack(prev, cur, column):
+        return ((prev << 8 | cur) << 16) + column + 0x8000
+
+    @classmethod
+    def empty(cls, start=0):
+        nothing = np.zeros(0, dtype=np.int64)
+        return cls(nothing, nothing, nothing, start, None, None)
+
+    @classmethod
+    def from_columns(cls, columns, start=0):
+        """Counts of the records in `columns`, which sit at corpus position `start`."""
+        if not columns["count"]:
+            return cls.empty(start)
+
+        pieces = columns["piece"].astype(np.int64)
+        leftmost, landed = landing_columns(columns)
+        chosen = np.nonzero(landed[1:])[0] + 1
+        keys, first, tally = np.unique(cls.pack(pieces[chosen - 1], pieces[chosen], leftmost[chosen]),
+                                       return_index=True, return_counts=True)
+        head = (chr(pieces[0]), int(leftmost[0]) if landed[0] else None)
+        return cls(keys, tally.astype(np.int64), chosen[first] + start, start, head, chr(pieces[-1]))
+
+    def merge(self, other):
+        """Counts of this run followed directly by `other`."""
+        if self.head is None:
+            return other
+        if other.head is None:
+            return self
+
+        keys, counts, firsts = [self.keys, other.keys], [self.counts, other.counts], [self.firsts, other.firsts]
+        piece, column = other.head
+        if column is not None:
+            keys.append(np.array([self.pack(ord(self.last_piece), ord(piece), column)], dtype=np.int64))
+            counts.append(np.ones(1, dtype=np.int64))
+            firsts.append(np.array([other.start], dtype=np.int64))
+
+        keys, inverse = np.unique(np.concatenate(keys), return_inverse=True)
+        merged_counts = np.zeros(len(keys), dtype=np.int64)
+        np.add.at(merged_counts, inverse, np.concatenate(counts))
+        merged_firsts = np.full(len(keys), np.iinfo(np.int64).max)
+        np.minimum.at(merged_firsts, inverse, np.concatenate(firsts))
+        return ColumnCounts(keys, merged_counts, merged_firsts, self.start, self.head, other.last_piece)
+
+    def apply(self, model):
+        """Replace the counts of a ColumnNGramModel, in the same order observe would have added them."""
+        model.counts.clear()
+        for i in np.argsort(self.firsts, kind="stable").tolist():
+            key = int(self.keys[i])
+            model.counts[(chr(key >> 24), chr(key >> 16 & 0xFF))][(key & 0xFFFF) - 0x8000] = int(self.counts[i])
+        model.last_piece = self.last_piece
+
+
+# --- Variable-order placement model ---
+PIECE_CODES = {piece: code for code, piece in enumerate("OITLJSZ", start=1)}
+
+
+_PIECE_LUT = np.zeros(256, dtype=np.int64)
+for _piece, _code in PIECE_CODES.items():
+    _PIECE_LUT[ord(_piece)] = _code
+
+
+def surface_signature(board, columns, rows, exclude=()):
+    """Compact board surface: neighbouring column height steps clipped to -2..2, one digit per step."""
+    exclude = set(map(tuple, exclude))
+    heights = []
+    for x in range(columns):
+        height = 0
+        for y in range(rows):
+            if board[y][x] != 0 and (x, y) not in exclude:
+                height = rows - y
+                break
+        heights.append(height)
+    return heights_signature(heights)
+
+
+def heights_signature(heights):
+    """surface_signature of a board given its column heights."""
+    return "".join(str(max(-2, min(2, b - a)) + 2) for a, b in zip(heights, heights[1:]))
+
+
+class IntCountTable:
+    """Open-addressing int key -> row table, rows live densely in flat integer arrays.
+
+    Keys are never deleted, a row whose counts drop to zero is simply reused if the key comes back.
+    """
+
+    EMPTY = -1
+
+    def __init__(self, fields, capacity=1024):
+        self.keys = array("q")
+        self.fields = {name: array(typecode) for name, typecode in fields}
+        self._slots = array("i", [self.EMPTY]) * capacity
+        self._shift = 64 - (capacity.bit_length() - 1)
+
+    def _slot(self, key):
+        return ((key * 0x9E3779B97F4A7C15) & 0xFFFFFFFFFFFFFFFF) >> self._shift
+
+    def find(self, key):
+        """Row of key, or -1."""
+        slots, keys = self._slots, self.keys
+        mask = len(slots) - 1
+        i = self._slot(key)
+        while True:
+            row = slots[i]
+            if row == self.EMPTY or keys[row] == key:
+                return row
+            i = (i + 1) & mask
+
+    def insert(self, key):
+        """Row of key, appending a zeroed row when it is new."""
+        row = self.find(key)
+        if row != self.EMPTY:
+            return row
+
+        row = len(self.keys)
+        self.keys.append(key)
+        for values in self.fields.values():
+            values.append(0)
+
+        if len(self.keys) * 4 > len(self._slots) * 3:
+            self._grow()
+        else:
+            self._place(key, row)
+        return row
+
+    def extend(self, keys, **values):
+        """Append rows for keys that are not in the table yet, with their field values."""
+        for name, column in self.fields.items():
+            column.extend(values[name].tolist() if name in values else [0] * len(keys))
+        self.keys.extend(keys)
+
+        capacity = len(self._slots)
+        while len(self.keys) * 4 > capacity * 3:
+            capacity *= 2
+        if capacity != len(self._slots):
+            self._slots = array("i", [self.EMPTY]) * capacity
+            self._shift = 64 - (capacity.bit_length() - 1)
+            start = 0
+        else:
+            start = len(self.keys) - len(keys)
+        self._place_rows(start)
+
+    def _place(self, key, row):
+        slots = self._slots
+        mask = len(slots) - 1
+        i = self._slot(key)
+        while slots[i] != self.EMPTY:
+            i = (i + 1) & mask
+        slots[i] = row
+
+    def _place_rows(self, start=0):
+        """_place every row from `start` on at once. Each round every free slot goes to one of the rows
+        probing it and the others step on, a row only passes slots that are taken, like _place."""
+        slots = np.frombuffer(self._slots, dtype=np.intc)
+        mask = len(slots) - 1
+        rows = np.arange(start, len(self.keys), dtype=np.int64)
+        keys = np.frombuffer(self.keys, dtype=np.int64)[start:].view(np.uint64)
+        probe = ((keys * np.uint64(0x9E3779B97F4A7C15)) >> np.uint64(self._shift)).astype(np.int64)
+
+        while len(rows):
+            free = slots[probe] == self.EMPTY
+            # * rows probing the same free slot all write it, the one that stuck is placed
+            slots[probe[free]] = rows[free]
+            waiting = slots[probe] != rows
+            rows, probe = rows[waiting], (probe[waiting] + 1) & mask
+
+    def _grow(self):
+        capacity = len(self._slots) * 2
+        self._slots = array("i", [self.EMPTY]) * capacity
+        self._shift = 64 - (capacity.bit_length() - 1)
+        self._place_rows()
+
+    def __len__(self):
+        return len(self.keys)
+
+    def copy(self):
+        """Independent copy, one memory copy per array."""
+        table = copy.copy(self)
+        table.keys = self.keys[:]
+        table.fields = {name: values[:] for name, values in self.fields.items()}
+        table._slots = self._slots[:]
+        return table
+
+    def nbytes(self):
+        arrays = [self.keys, self._slots, *self.fields.values()]
+        return sum(len(values) * values.itemsize for values in arrays)
+
+
+class PlacementNGramModel:
+    """k-order (column, rotation) model with absolute-discount (Katz-style) backoff.
+
+    The context of a landing is (piece, surface, next queue, h1 .. hk) where h1 is the piece
+    landed just before it. Level j uses the first j + 1 fields, so backing off drops the oldest
+    history first and the surface last. Counts live in two IntCountTable: one row per context
+    (total, distinct outcomes, cached best outcome) and one row per (context, outcome) pair.
+    """
+
+    DISCOUNT = 0.75
+
+    def __init__(self, order=2, min_count=1):
+        self.order = order
+        self.min_count = min_count
+        self.contexts = IntCountTable((("total", "I"), ("distinct", "H"), ("best", "H")))
+        self.pairs = IntCountTable((("context", "I"), ("code", "H"), ("count", "I")))
+        self.max_code = 0
+        self.history = []  # most recent piece first, at most `order` long
+
+    # --- Encoding ---
+    @staticmethod
+    def outcome(column, rotation):
+        return (int(column) << 2) | (int(rotation) & 3)
+
+    @staticmethod
+    def decode(code):
+        """outcome code -> (column, rotation)"""
+        return code >> 2, code & 3
+
+    def context_keys(self, piece, surface=None, queue=None, history=None):
+        """Hashed key of every level, lowest order first."""
+        if history is None:
+            history = self.history
+
+        cur = PIECE_CODES.get(piece, 0)
+        surf = int(surface, 5) + 1 if surface else 0
+        queued = 0
+        for i, nxt in enumerate((queue or [])[:4]):
+            queued |= PIECE_CODES.get(nxt, 0) << (3 * i)
+
+        packed = [cur, cur | (surf << 3), cur | (queued << 3) | (surf << 15)]
+        fields = cur | (queued << 3)
+        for i in range(self.order):
+            previous = history[i] if i < len(history) else None
+            fields |= PIECE_CODES.get(previous, 0) << (15 + 3 * i)
+            packed.append(fields | (surf << (15 + 3 * self.order)))
+
+        # * int hashing is stable across runs, the level is mixed in so prefixes never collide
+        return [hash((key << 4) | level) for level, key in enumerate(packed)]
+
+    @staticmethod
+    def _pair_key(context_key, code):
+        return hash((context_key << 12) | code)
+
+    # --- Incremental updates ---
+    def observe(self, entry):
+        """Count one landing at every level and push its piece onto the history."""
+        self.add(entry, self.history)
+        self._push(entry.get("piece"))
+
+    def add(self, entry, history):
+        """Count one landing under an explicit piece history, the model's own history is left alone."""
+        return self._count_entry(entry, history, 1)
+
+    def retract(self, entry, history):
+        """Undo one landing, `history` is the piece history it was observed with."""
+        return self._count_entry(entry, history, -1)
+
+    def _count_entry(self, entry, history, delta):
+        code = self._entry_outcome(entry)
+        if code is None:
+            return False
+        for key in self.context_keys(entry.get("piece"), entry.get("surface"), entry.get("next_pieces_queue"), history):
+            self._add(key, code, delta)
+        return True
+
+    def decay(self):
+        """Halve every count. Flooring keeps each context's best outcome on top, only totals and distinct move."""
+        contexts, pairs = self.contexts, self.pairs
+        if not len(pairs):
+            return
+
+        counts = np.frombuffer(pairs.fields["count"], dtype=pairs.fields["count"].typecode)
+        counts //= 2
+        owner = np.frombuffer(pairs.fields["context"], dtype=pairs.fields["context"].typecode)
+        total = np.bincount(owner, weights=counts, minlength=len(contexts)).astype(np.int64)
+        distinct = np.bincount(owner, weights=counts > 0, minlength=len(contexts)).astype(np.int64)
+        contexts.fields["total"] = array(contexts.fields["total"].typecode, total.tolist())
+        contexts.fields["distinct"] = array(contexts.fields["distinct"].typecode, distinct.tolist())
+
+    def prune(self):
+        """Drop zero-count rows once they outnumber the live ones, keeps the tables bounded under eviction and decay."""
+        counts = np.frombuffer(self.pairs.fields["count"], dtype=self.pairs.fields["count"].typecode)
+        live = np.nonzero(counts)[0]
+        if len(live) * 2 >= len(counts):
+            return False
+
+        contexts = self.contexts
+        owner = np.frombuffer(self.pairs.fields["context"], dtype=self.pairs.fields["context"].typecode)[live]
+        codes = np.frombuffer(self.pairs.fields["code"], dtype=self.pairs.fields["code"].typecode)[live]
+        kept, renumbered = np.unique(owner, return_inverse=True)
+
+        def column(name):
+            return np.frombuffer(contexts.fields[name], dtype=contexts.fields[name].typecode)[kept]
+
+        keys = np.frombuffer(contexts.keys, dtype=np.int64)[kept]
+        total, distinct, best = column("total"), column("distinct"), column("best")
+
+        self.contexts = IntCountTable((("total", "I"), ("distinct", "H"), ("best", "H")))
+        self.pairs = IntCountTable((("context", "I"), ("code", "H"), ("count", "I")))
+        self.contexts.extend(keys.tolist(), total=total, distinct=distinct, best=best)
+        pair_keys = [self._pair_key(key, code) for key, code in zip(keys[renumbered].tolist(), codes.tolist())]
+        self.pairs.extend(pair_keys, context=renumbered, code=codes, count=counts[live])
+        return True
+
+    def rebuild(self, patterns):
+        self.__init__(self.order, self.min_count)
+        for entry in patterns:
+            self.observe(entry)
+
+    def rebuild_columns(self, columns):
+        """rebuild() straight from stored pattern columns, counts are aggregated with numpy."""
+        self.__init__(self.order, self.min_count)
+        if not columns["count"]:
+            return
+
+        leftmost, landed = landing_columns(columns)
+        records = np.nonzero(landed)[0]
+        if len(records):
+            codes = leftmost[records] << 2 | (columns["rotation"][records].astype(np.int64) & 3)
+            self._fill(self._column_keys(columns, records), codes, records)
+        self.history = [chr(piece) for piece in columns["piece"][::-1][:self.order].tolist()]
+
+    def _column_keys(self, columns, records):
+        """context_keys of the given records, each with the pieces stored before it as history."""
+        count = columns["count"]
+        pieces = _PIECE_LUT[columns["piece"]]
+
+        lengths = columns["surface_length"].astype(np.int64)
+        lengths[lengths == BitPatternFileManager.NO_SURFACE] = 0
+        longest = int(lengths.max())
+
+        if 4 + 15 + 3 * self.order + (5 ** longest).bit_length() > 60:
+            # * too wide for int64, Python's int hash has to do it
+            surfaces = columns["surface"].tobytes().decode("ascii")
+            queues = columns["queue"].tobytes().decode("ascii")
+            surface_starts = np.cumsum(lengths) - lengths
+            queue_lengths = columns["queue_length"].astype(np.int64)
+            queue_starts = np.cumsum(queue_lengths) - queue_lengths
+            letters = columns["piece"].tobytes().decode("ascii")
+
+            keys = np.empty((len(records), 3 + self.order), dtype=np.int64)
+            for n, r in enumerate(records.tolist()):
+                surface = surfaces[surface_starts[r]:surface_starts[r] + lengths[r]]
+                queue = queues[queue_starts[r]:queue_starts[r] + queue_lengths[r]]
+                history = letters[max(0, r - self.order):r][::-1]
+                keys[n] = self.context_keys(letters[r], surface, queue, history)
+            return keys
+
+        surf = np.zeros(count, dtype=np.int64)
+        surfaced = lengths > 0
+        if surfaced.any():
+            ends = np.cumsum(lengths)
+            owner = np.repeat(np.arange(count), lengths)
+            powers = 5 ** (ends[owner] - 1 - np.arange(len(owner)))
+            weighted = (columns["surface"].astype(np.int64) - ord("0")) * powers
+            surf[surfaced] = np.add.reduceat(weighted, (ends - lengths)[surfaced]) + 1
+
+        queue_lengths = columns["queue_length"].astype(np.int64)
+        queue_starts = np.cumsum(queue_lengths) - queue_lengths
+        queued = np.zeros(count, dtype=np.int64)
+        for i in range(4):
+            has = queue_lengths > i
+            queued[has] |= _PIECE_LUT[columns["queue"][queue_starts[has] + i]] << (3 * i)
+
+        packed = [pieces, pieces | (surf << 3), pieces | (queued << 3) | (surf << 15)]
+        fields = pieces | (queued << 3)
+        for i in range(self.order):
+            previous = np.zeros(count, dtype=np.int64)
+            previous[i + 1:] = pieces[:count - i - 1]
+            fields = fields | (previous << (15 + 3 * i))
+            packed.append(fields | (surf << (15 + 3 * self.order)))
+
+        # * hash() of a non-negative int below 2 ** 61 - 1 is the int itself
+        return np.stack([(key[records] << 4) | level for level, key in enumerate(packed)], axis=1)
+
+    def _fill(self, keys, codes, positions):
+        """Load the count tables of a fresh model from every (context keys, outcome) landing at once."""
+        levels = keys.shape[1]
+        context = keys.ravel()
+        code = np.repeat(codes, levels)
+        position = np.repeat(positions, levels)
+
+        order = np.lexsort((position, code, context))
+        context, code, position = context[order], code[order], position[order]
+
+        starts = np.nonzero(np.r_[True, (context[1:] != context[:-1]) | (code[1:] != code[:-1])])[0]
+        pair_context, pair_code = context[starts], code[starts]
+        pair_count = np.diff(np.r_[starts, len(context)])
+        pair_last = position[np.r_[starts[1:], len(context)] - 1]
+
+        firsts = np.nonzero(np.r_[True, pair_context[1:] != pair_context[:-1]])[0]
+        distinct = np.diff(np.r_[firsts, len(pair_context)])
+        total = np.add.reduceat(pair_count, firsts)
+
+        # * observe hands best over only on a strictly higher count, so the first outcome to reach the top count keeps it
+        ranked = np.lexsort((pair_last, -pair_count, pair_context))
+        best = pair_code[ranked[np.r_[True, pair_context[ranked][1:] != pair_context[ranked][:-1]]]]
+
+        self.contexts.extend(pair_context[firsts].tolist(), total=total, distinct=distinct, best=best)
+        pair_keys = [self._pair_key(key, c) for key, c in zip(pair_context.tolist(), pair_code.tolist())]
+        self.pairs.extend(pair_keys, context=np.repeat(np.arange(len(firsts)), distinct), code=pair_code, count=pair_count)
+        self.max_code = int(pair_code.max())
+
+    def copy(self):
+        """Independent copy of the count tables and history, saved while new landings keep counting into this one."""
+        model = PlacementNGramModel(self.order, self.min_count)
+        model.contexts, model.pairs = self.contexts.copy(), self.pairs.copy()
+        model.max_code = self.max_code
+        model.history = list(self.history)
+        return model
+
+    def verify(self, patterns):
+        """True when the incremental counts match a fresh rebuild of `patterns`."""
+        fresh = PlacementNGramModel(self.order, self.min_count)
+        fresh.rebuild(patterns)
+        return fresh.counts() == self.counts() and fresh.history == self.history
+
+    def counts(self):
+        """{(context key, outcome code): count} of every non-zero pair, for checks and tooling."""
+        pairs, contexts = self.pairs.fields, self.contexts.keys
+        return {(contexts[pairs["context"][row]], pairs["code"][row]): pairs["count"][row]
+                for row in range(len(self.pairs)) if pairs["count"][row]}
+
+    def _push(self, piece):
+        if self.order:
+            self.history = [piece] + self.history[:self.order - 1]
+
+    @classmethod
+    def _entry_outcome(cls, entry):
+        coords = entry.get("landed_coordinates", [])
+        if not coords or entry.get("piece") is None:
+            return None
+        return cls.outcome(min(x for x, _ in coords), entry.get("rotation", 0))
+
+    def _add(self, key, code, delta):
+        contexts, pairs = self.contexts, self.pairs
+        if delta > 0:
+            context = contexts.insert(key)
+            pair = pairs.insert(self._pair_key(key, code))
+            pairs.fields["context"][pair] = context
+            pairs.fields["code"][pair] = code
+            self.max_code = max(self.max_code, code)
+        else:
+            context = contexts.find(key)
+            pair = pairs.find(self._pair_key(key, code)) if context != -1 else -1
+            if pair == -1:
+                return
+
+        counts = pairs.fields["count"]
+        before = counts[pair]
+        after = max(0, before + delta)
+        counts[pair] = after
+
+        ctx = contexts.fields
+        ctx["total"][context] += after - before
+        ctx["distinct"][context] += (after > 0) - (before > 0)
+
+        # * keep the cached argmax in step, a retraction may hand it to another outcome
+        best = ctx["best"][context]
+        if delta > 0:
+            if before == 0 and ctx["distinct"][context] == 1 or after > self._count(key, best):
+                ctx["best"][context] = code
+        elif code == best:
+            best_count = 0
+            for other in range(self.max_code + 1):
+                count = self._count(key, other)
+                if count > best_count:
+                    ctx["best"][context], best_count = other, count
+
+    def _count(self, key, code):
+        pair = self.pairs.find(self._pair_key(key, code))
+        return self.pairs.fields["count"][pair] if pair != -1 else 0
+
+    # --- Queries ---
+    def predict(self, piece, surface=None, queue=None, history=None):
+        """Katz backoff: best (column, rotation) of the deepest context seen at least min_count times."""
+        contexts = self.contexts
+        total, best = contexts.fields["total"], contexts.fields["best"]
+        for key in reversed(self.context_keys(piece, surface, queue, history)):
+            row = contexts.find(key)
+            if row != -1 and total[row] >= self.min_count:
+                return self.decode(best[row])
+        return None
+
+    def probability(self, column, rotation, piece, surface=None, queue=None, history=None, num_outcomes=160):
+        """Interpolated absolute-discount probability of a placement, backing off to uniform."""
+        code = self.outcome(column, rotation)
+        contexts = self.contexts
+        probability = 1.0 / num_outcomes
+        for key in self.context_keys(piece, surface, queue, history):
+            row = contexts.find(key)
+            if row == -1 or not contexts.fields["total"][row]:
+                continue
+            total = contexts.fields["total"][row]
+            distinct = contexts.fields["distinct"][row]
+            seen = self._count(key, code)
+            probability = max(seen - self.DISCOUNT, 0) / total + (self.DISCOUNT * distinct / total) * probability
+        return probability
+
+    def nbytes(self):
+        """Approximate memory held by the count tables."""
+        return self.contexts.nbytes() + self.pairs.nbytes()
+
+    def __len__(self):
+        return len(self.contexts)
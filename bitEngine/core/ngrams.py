@@ -2,129 +2,487 @@
 import json
 import os
 import pickle
-from collections import Counter, defaultdict
+import threading
 from datetime import datetime
 
+from .batch_predict import predict_batch
+from .beam_search import BeamSearchPlanner
+from .bitboard import BitBoard
+from .geometry import PIECE_GEOMETRY, PIECE_SHAPES
+from .ngram_model import ColumnNGramModel, PlacementNGramModel, heights_signature
+from .pattern_index import PatternIndex
+from .retention import RetentionPolicy
+from ..utils import BitJournalFileManager, BitPatternFileManager, BitPatternRecords, BitPickleFileManager
+
+
+def pattern_entry(piece, landed_coords, rotation=0, lines_cleared=0, next_queue=None, reason="manual", surface=None):
+    """One corpus record, stamped with the current time."""
+    return {
+        "piece": piece,
+        "landed_coordinates": landed_coords,
+        "rotation": rotation,
+        "lines_cleared": lines_cleared,
+        "next_pieces_queue": next_queue if next_queue is not None else [],
+        "surface": surface,
+        "timestamp": datetime.now().isoformat(),
+        "reason": reason
+    }
+
 
 class PatternNGrams:
-    def __init__(self, corpus_file="data/training_data/pattern.json", pickle_file="data/pickles/pattern.pkl"):
+    def __init__(self, corpus_file="data/training_data/pattern.json", pickle_file="data/pickles/pattern.pkl",
+                 journal_file="data/training_data/pattern.journal", fsync_policy="interval", compact_threshold=512,
+                 index_file="data/pickles/pattern_index.pkl", order=2, store_file="data/training_data/pattern.bin",
+                 model_file="data/pickles/ngrams.pkl", retention=None):
+        # corpus_file / pickle_file are only read, to migrate a corpus saved before the binary store
         self.corpus_file = corpus_file
         self.pickle_file = pickle_file
-        # (prev_piece, cur_piece) -> Counter(col)
-        self.col_model = defaultdict(Counter)
+        self.index_file = index_file
+        self.store = BitPatternFileManager(store_file)
+        # trained models of a store prefix, startup only replays the records stored after it
+        self.snapshots = BitPickleFileManager(model_file)
+        # (prev_piece, cur_piece) -> Counter(col), updated incrementally per landing
+        self.model = ColumnNGramModel()
+        self.col_model = self.model.counts
+        # (piece, surface, next queue, last `order` pieces) -> (column, rotation), with backoff
+        self.placement_model = PlacementNGramModel(order)
         self.last_piece_seen = None
-        self.patterns = []  # stores raw pattern entries
+        # stored entries stay in the mapped store file, a dict is only built when one is read
+        self.patterns = BitPatternRecords()
+        # canonical placement hash -> position in patterns, answers "seen this placement?" in O(1)
+        self.index = PatternIndex()
+        # looks ahead over the visible queue from the suggested placement, fills predict's "plan"
+        self.planner = BeamSearchPlanner()
+        # bumped on every model change, a fold copying the models with the lock released checks it
+        self.model_version = 0
+
+        # oldest records beyond these limits are evicted and retracted from the models
+        self.retention = retention or RetentionPolicy()
+        self._landings = 0
+        self._decays = 0
+
+        # Journal records pending a compaction before it runs in the background
+        self.compact_threshold = compact_threshold
+        self._lock = threading.RLock()
+        self._planning = threading.Lock()
+        self._compaction = None
 
         # Ensure directories exist
         os.makedirs(os.path.dirname(corpus_file), exist_ok=True)
         os.makedirs(os.path.dirname(pickle_file), exist_ok=True)
 
+        # Landings are appended here, the snapshot is only rewritten by compact()
+        self.journal = BitJournalFileManager(journal_file, fsync_policy)
+
         # Load dataset
         self._load()
 
     # --- Load / Save ---
     def _load(self):
-        """Load from pickle if available, otherwise from JSON."""
-        if os.path.exists(self.pickle_file):
-            with open(self.pickle_file, "rb") as f:
-                self.patterns = pickle.load(f)
-        elif os.path.exists(self.corpus_file):
-            with open(self.corpus_file, "r", encoding="utf-8") as f:
-                self.patterns = json.load(f)
-        else:
-            self.patterns = []
+        """Map the binary snapshot and hand everything else to a warm-up thread, O(1) in the corpus size.
+
+        Until ready is set predictions come from empty models and new landings are only journaled.
+        """
+        self.ready = threading.Event()
+        self._early = []  # landings written before the warm-up finished, folded in by it
+        self._warm_up_error = None
+
+        columns = None
+        if self.store.exists():
+            try:
+                columns = self.store.open_columns()
+            except ValueError as e:
+                if not self._has_legacy():
+                    raise
+                print(f"[ngrams] {e} Falling back to the legacy snapshot.")
+        self.patterns = BitPatternRecords(columns)
+
+        self._warming = threading.Thread(target=self._warm_up, args=(columns,), name="PatternNGramsWarmUp", daemon=True)
+        self._warming.start()
+
+    def _has_legacy(self):
+        return os.path.exists(self.pickle_file) or os.path.exists(self.corpus_file)
+
+    def _warm_up(self, columns):
+        """Check the snapshot, migrate a pickle / JSON one, replay the journal and build the models off the game thread."""
+        try:
+            if columns is not None and not self.store.verify(columns):
+                # A damaged store falls back to the older snapshot, with nothing to fall back on it is an error
+                message = f"{self.store.file_name} is truncated or corrupted, checksum mismatch."
+                if not self._has_legacy():
+                    raise ValueError(message)
+                print(f"[ngrams] {message} Falling back to the legacy snapshot.")
+                columns = None
+
+            migrate = columns is None and self._has_legacy()
+            if migrate and os.path.exists(self.pickle_file):
+                with open(self.pickle_file, "rb") as f:
+                    columns = self.store.encode(pickle.load(f))
+            elif migrate:
+                with open(self.corpus_file, "r", encoding="utf-8") as f:
+                    columns = self.store.encode(json.load(f))
+            patterns = BitPatternRecords(columns)
+
+            index = PatternIndex()
+            if not index.load(self.index_file, len(patterns)):
+                index.build_placements(patterns.placements())
+                index.save(self.index_file, len(patterns))
+
+            # A journal left over from a crashed compaction may already be in the snapshot,
+            # the duplicate check keeps the replay idempotent
+            for entry in self.journal.replay():
+                if index.add(entry["piece"], entry["landed_coordinates"], entry["rotation"]):
+                    patterns.append(entry)
+
+            if migrate:
+                self.store.save(patterns)
+                index.save(self.index_file, len(patterns))
+
+            model, placement_model = self._restore_models(patterns)
+            for entry in patterns.tail:
+                model.observe(entry)
+                placement_model.observe(entry)
+
+            with self._lock:
+                # Landings journaled while warming up may also have been replayed above
+                for entry in self._early:
+                    if index.add(entry["piece"], entry["landed_coordinates"], entry["rotation"]):
+                        patterns.append(entry)
+                        model.observe(entry)
+                        placement_model.observe(entry)
+                self._early = []
+
+                self.patterns, self.index = patterns, index
+                self.model, self.col_model, self.placement_model = model, model.counts, placement_model
+                self.last_piece_seen = model.last_piece
+                self.model_version += 1
+                self._enforce_retention()
+        except Exception as e:
+            self._warm_up_error = e
+            print(f"[ngrams] Warm-up failed: {e}")
+        finally:
+            self.ready.set()
+
+    def _restore_models(self, patterns):
+        """Models of the stored records: the saved snapshot plus whatever was stored after it, or a full build."""
+        count = patterns.base["count"]
+        snapshot = self.snapshots.load_processed_ngrams()
+
+        trained = 0
+        if snapshot is not None and snapshot["high_water_mark"] <= count:
+            model = snapshot["models"]["col_model"]
+            placement_model = snapshot["models"]["placement_model"]
+            same_shape = (placement_model.order, placement_model.min_count) == (self.placement_model.order, self.placement_model.min_count)
+            if same_shape and snapshot["checksum"] == patterns.checksum(snapshot["high_water_mark"]):
+                trained = snapshot["high_water_mark"]
+
+        if not trained:
+            model = ColumnNGramModel()
+            placement_model = PlacementNGramModel(self.placement_model.order, self.placement_model.min_count)
+            model.rebuild_columns(patterns.base)
+            placement_model.rebuild_columns(patterns.base)
+        elif trained < count:
+            for entry in self.store.to_patterns(patterns.slice_columns(trained, count)):
+                model.observe(entry)
+                placement_model.observe(entry)
+
+        if trained < count:
+            self._save_models({"col_model": model, "placement_model": placement_model, "last_piece_seen": model.last_piece},
+                              patterns, count)
+        return model, placement_model
+
+    def _save_models(self, models, patterns, count):
+        self.snapshots.save_processed_ngrams(models, patterns.checksum(count), count)
+
+    def wait_ready(self, timeout=None):
+        """Block until the warm-up is done, re-raises whatever stopped it."""
+        if not self.ready.wait(timeout):
+            return False
+        if self._warm_up_error is not None:
+            raise self._warm_up_error
+        return True
 
-        self._build_model(self.patterns)
+    def _save(self, patterns=None, index_keys=None):
+        """Save the binary snapshot, the file is replaced atomically."""
+        if patterns is None:
+            patterns = self.patterns
 
-    def _save(self):
-        """Save JSON + Pickle."""
-        with open(self.corpus_file, "w", encoding="utf-8") as f:
-            json.dump(self.patterns, f, indent=2)
+        self.store.save(patterns)
+        self.index.save(self.index_file, len(patterns), index_keys)
 
-        with open(self.pickle_file, "wb") as f:
-            pickle.dump(self.patterns, f)
+    # --- Compaction ---
+    def compact(self, background=False):
+        """Fold the journal into the snapshot, optionally on a background thread.
+
+        The caller only rotates the journal, the snapshot is taken and saved by the fold.
+        """
+        self.wait_ready()
+        while True:
+            with self._lock:
+                running = self._compaction
+                if running is None or not running.is_alive():
+                    rotated = self.journal.rotate()
+                    break
+                if background:
+                    return False
+            # * fold() takes the lock for its snapshot and rebase, wait for it with the lock released
+            running.join()
+
+        def fold():
+            # A snapshot taken after the rotation also holds landings journaled since, replaying them is idempotent
+            snapshot, index_keys, models = self._freeze()
+            self._save(snapshot, index_keys)
+            self.journal.discard(rotated)
+
+            # Map the new snapshot so the entries folded into it can leave memory
+            columns = self.store.open_columns()
+            with self._lock:
+                self.patterns = patterns = self.patterns.rebase(columns, snapshot)
+            self._save_models(models, patterns, len(snapshot))
+
+        if background:
+            self._compaction = threading.Thread(target=fold, name="PatternNGramsCompaction", daemon=True)
+            self._compaction.start()
+        else:
+            fold()
+        return True
+
+    def _freeze(self, attempts=3):
+        """Corpus snapshot, index keys and model copies of one moment, for a fold to save while landings go on.
+
+        The placement tables are copied with the lock released. A landing during the copy shows up
+        as a newer model version and the copy is taken again, the last attempt copies under the lock.
+        """
+        def frozen(placement_model):
+            # the index keys are taken with the snapshot, the fold saves the first len(snapshot) of them
+            models = {"col_model": self.model.copy(), "placement_model": placement_model, "last_piece_seen": self.model.last_piece}
+            return self.patterns.snapshot(), self.index.keys(), models
+
+        for attempt in range(attempts):
+            with self._lock:
+                # * keeps the tables bounded under eviction and decay, the copies leave the zero rows behind
+                self.placement_model.prune()
+                version, live = self.model_version, self.placement_model
+                if attempt == attempts - 1:
+                    return frozen(live.copy())
+
+            copied = live.copy()
+            with self._lock:
+                if self.model_version == version:
+                    return frozen(copied)
+
+    def close(self):
+        """Compact whatever is journaled or evicted and release the journal, call on shutdown.
+
+        A failed warm-up is logged instead of raised, the journal is still closed.
+        """
+        self.ready.wait()
+        try:
+            if self._warm_up_error is not None:
+                # * the store did not load, a fold would save it again under a fresh checksum,
+                # * the journal keeps the landings for the next start instead
+                print(f"[ngrams] Warm-up failed, the journal is left uncompacted: {self._warm_up_error}")
+            elif self.journal.num_records or self.journal.pending_files() or self.patterns.start:
+                self.compact()
+            if self._compaction is not None:
+                self._compaction.join()
+        finally:
+            self.journal.close()
 
     def _build_model(self, patterns):
-        """Rebuild n-gram model from patterns."""
-        self.col_model.clear()
-        prev = None
-        for entry in patterns:
-            cur = entry.get("piece")
-            coords = entry.get("landed_coordinates", [])
-            if not coords or cur is None:
-                prev = cur
-                continue
-
-            xs = [x for x, _ in coords]
-            col = min(xs)
-
-            if prev is not None:
-                self.col_model[(prev, cur)][col] += 1
-            prev = cur
-        self.last_piece_seen = prev
+        """Rebuild n-gram model from patterns, only needed at load and for verification."""
+        self.model.rebuild(patterns)
+        self.placement_model.rebuild(patterns)
+        self.last_piece_seen = self.model.last_piece
+        self.model_version += 1
+
+    def observe(self, entry):
+        """Add one landing to the n-gram models without touching the rest of the corpus."""
+        self.model.observe(entry)
+        self.placement_model.observe(entry)
+        self.last_piece_seen = self.model.last_piece
+        self.model_version += 1
+
+    def retract(self, entry, history):
+        """Remove the counts one landing added, history lists the pieces before it, newest first."""
+        self.model_version += 1
+        self.placement_model.retract(entry, history)
+        return self.model.retract(entry, history[0] if history else None)
+
+    def verify_model(self):
+        """Check the incrementally maintained counts against a full rebuild."""
+        self.wait_ready()
+        with self._lock:
+            return self.model.verify(self.patterns) and self.placement_model.verify(self.patterns)
 
     # --- Write Pattern ---
     def write_pattern(self, piece, landed_coords, rotation=0, lines_cleared=0,
-                      next_queue=None, reason="manual"):
-        """Write new pattern if not duplicate."""
-        if next_queue is None:
-            next_queue = []
-
-        # Prevent duplicates
-        for p in self.patterns:
-            if p["piece"] == piece and p["landed_coordinates"] == landed_coords and p["rotation"] == rotation:
+                      next_queue=None, reason="manual", surface=None):
+        """Write new pattern if not duplicate, surface is the board signature before the landing.
+
+        Returns None while the corpus is still warming up, the duplicate check happens when it is folded in.
+        """
+        entry = pattern_entry(piece, landed_coords, rotation, lines_cleared, next_queue, reason, surface)
+        with self._lock:
+            if not self.ready.is_set():
+                self.journal.append(entry)
+                self._early.append(entry)
+                return None
+
+            # Prevent duplicates
+            if not self.index.add(piece, landed_coords, rotation):
                 return False
-
-        entry = {
-            "piece": piece,
-            "landed_coordinates": landed_coords,
-            "rotation": rotation,
-            "lines_cleared": lines_cleared,
-            "next_pieces_queue": next_queue,
-            "timestamp": datetime.now().isoformat(),
-            "reason": reason
-        }
-        self.patterns.append(entry)
-        self._save()
-        self._build_model(self.patterns)
+            self.patterns.append(entry)
+            self.journal.append(entry)
+            self.observe(entry)
+            self._age()
+            self._enforce_retention()
+
+        if self.journal.num_records >= self.compact_threshold:
+            self.compact(background=True)
         return True
 
+    # --- Retention ---
+    def _age(self):
+        """Count a landing towards the decay half-life, halving every count when it is reached."""
+        half_life = self.retention.half_life
+        self._landings += 1
+        if half_life and self._landings % half_life == 0:
+            self.model.decay()
+            self.placement_model.decay()
+            self.placement_model.prune()
+            self._decays += 1
+            self.model_version += 1
+
+    def _enforce_retention(self):
+        """Evict the records the retention policy no longer keeps, call with the lock held."""
+        count = self.retention.excess(self.patterns, datetime.now())
+        if count:
+            self._evict(count)
+        return count
+
+    def _evict(self, count):
+        """Drop the oldest `count` records and retract them, the models stay equal to a rebuild over the rest."""
+        order = self.placement_model.order
+        survivors = len(self.patterns) - count
+
+        if count >= survivors:
+            # Cheaper to recount what is left, decayed counts start over
+            self.patterns.drop(count)
+            self.index.evict(count)
+            columns = self.patterns.columns()
+            self.model.rebuild_columns(columns)
+            self.placement_model.rebuild_columns(columns)
+        else:
+            # The first survivors lose the evicted pieces from their history, they are counted again without them
+            # * the column model needs the first survivor even when the placement model keeps no history
+            entries = self.patterns.head(count + max(order, 1))
+            pieces = [entry["piece"] for entry in entries]
+            for i, entry in enumerate(entries[:count]):
+                self.placement_model.retract(entry, pieces[max(0, i - order):i][::-1])
+                self.model.retract(entry, pieces[i - 1] if i else None)
+            self.model.retract(entries[count], pieces[count - 1])
+            for j in range(count, count + order):
+                self.placement_model.retract(entries[j], pieces[max(0, j - order):j][::-1])
+                self.placement_model.add(entries[j], pieces[max(count, j - order):j][::-1])
+
+            self.patterns.drop(count)
+            self.index.evict(count)
+            self.placement_model.history = self.placement_model.history[:survivors]
+        self.last_piece_seen = self.model.last_piece
+        self.model_version += 1
+
+    def stats(self):
+        """Corpus, index and model sizes, for watching memory on long-running boxes."""
+        with self._lock:
+            patterns = self.patterns
+            return {
+                "ready": self.ready.is_set(),
+                "records": len(patterns),
+                "stored_records": patterns.base["count"] - patterns.start,
+                "pending_records": len(patterns.tail),
+                "evicted": patterns.evicted,
+                "decays": self._decays,
+                "oldest_timestamp": patterns[0]["timestamp"] if len(patterns) else None,
+                "index_entries": len(self.index),
+                "column_pairs": sum(len(counter) for counter in self.model.counts.values()),
+                "contexts": len(self.placement_model.contexts),
+                "context_pairs": len(self.placement_model.pairs),
+                "model_bytes": self.placement_model.nbytes(),
+                "journal_records": self.journal.num_records
+            }
+
+    def has_seen(self, piece, landed_coords, rotation=0):
+        """O(1) lookup: was this exact placement stored already."""
+        return self.index.seen(piece, landed_coords, rotation)
+
     # --- Board Formatter (for saving states) ---
     def format_board(self, board):
         return ["".join(str(cell) for cell in row) for row in board]
 
     # --- Piece templates ---
-    SHAPES = {
-        "O": [(0, 0), (1, 0), (0, 1), (1, 1)],
-        "I": [(0, 0), (1, 0), (2, 0), (3, 0)],
-        "T": [(1, 0), (0, 1), (1, 1), (2, 1)],
-        "L": [(0, 0), (0, 1), (0, 2), (1, 2)],
-        "J": [(1, 0), (1, 1), (1, 2), (0, 2)],
-        "S": [(1, 0), (2, 0), (0, 1), (1, 1)],
-        "Z": [(0, 0), (1, 0), (1, 1), (2, 1)]
-    }
+    SHAPES = PIECE_SHAPES
 
     # --- Prediction ---
     def predict(self, board, current_piece, columns, rows, prev_piece=None, next_queue=None):
-        """Suggest placement for current_piece."""
+        """Suggest placement for current_piece, safe to call from a worker thread.
+
+        The models are read under the corpus lock and the look-ahead plan is searched once it is
+        released, a landing never waits for the planner.
+        """
         if current_piece not in self.SHAPES:
             return None
 
+        bits = BitBoard.from_board(board, columns, rows)
+        with self._lock:
+            suggestion = self._suggest(bits, current_piece, prev_piece, next_queue)
+
+        # * the planner keeps its own transposition table, searches take turns on it
+        with self._planning:
+            suggestion["plan"] = self.plan(bits, current_piece, suggestion, next_queue)
+        return suggestion
+
+    def plan(self, bits, current_piece, suggestion, next_queue=None):
+        """Suggested placement followed by the best placements of the queued pieces, [] if it does not fit."""
+        placement = suggestion.get("placement")
+        if self.planner is None or not placement:
+            return []
+        root = (suggestion["rotation"], min(x for x, _ in placement), min(y for _, y in placement))
+        return self.planner.search(bits, [current_piece] + list(next_queue or []), root=root)
+
+    def _suggest(self, bits, current_piece, prev_piece=None, next_queue=None):
+        masks = PIECE_GEOMETRY[current_piece]
+
         # 1. Try all rotations to clear line
-        for rotation in range(4):
-            shape = self._rotate_shape(self.SHAPES[current_piece], rotation)
-            for col in range(columns):
-                base_coords = [(x + col, y) for x, y in shape]
-                placement = self._drop(board, base_coords, columns, rows)
-                if placement and self._completes_line(board, placement, rows, columns):
-                    return {
-                        "placement": placement,
-                        "rotation": rotation,
-                        "column": col,
-                        "reason": "line_clear"
-                    }
-
-        # 2. Fallback to n-gram
+        for rotation, col, y in bits.placements(current_piece):
+            if bits.completes_line(masks[rotation], col, y):
+                cleared = bits.cleared_rows(masks[rotation], col, y)
+                return {
+                    "placement": bits.coordinates(masks[rotation], col, y),
+                    "rotation": rotation,
+                    "column": col,
+                    "reason": "line_clear",
+                    "lines_cleared": len(cleared),
+                    "cleared_rows": cleared
+                }
+
+        # 2. Variable-order placement model, backing off down to the piece alone
+        history = list(self.placement_model.history)
+        if prev_piece is not None:
+            history = [prev_piece] + history[1:]
+        surface = heights_signature(bits.heights())
+        suggestion = self.placement_model.predict(current_piece, surface, next_queue, history)
+
+        if suggestion is not None:
+            chosen_col, rotation = suggestion
+            self.last_piece_seen = current_piece
+            return {
+                "rotation": rotation,
+                "reason": "ngram_backoff",
+                **self._place(bits, masks[rotation], chosen_col)
+            }
+
+        # 3. Fallback to n-gram
         key = None
         if prev_piece is not None:
             key = (prev_piece, current_piece)
@@ -136,16 +494,38 @@ class PatternNGrams:
         else:
             chosen_col = 0
 
-        shape = self.SHAPES[current_piece]
-        base_coords = [(x + chosen_col, y) for x, y in shape]
-        placement = self._drop(board, base_coords, columns, rows)
-
         self.last_piece_seen = current_piece
         return {
-            "placement": placement,
             "rotation": 0,
-            "column": chosen_col,
-            "reason": "ngram_fallback"
+            "reason": "ngram_fallback",
+            **self._place(bits, masks[0], chosen_col)
+        }
+
+    def predict_batch(self, boards, pieces, prev_pieces=None, next_queues=None):
+        """predict for a (N, rows, columns) stack of boards, see batch_predict.predict_batch.
+
+        Stateless: last_piece_seen is read for boards without a prev piece but never advanced.
+        """
+        with self._lock:
+            return predict_batch(self.placement_model, self.col_model, boards, pieces,
+                                 prev_pieces, next_queues, self.last_piece_seen)
+
+    def _place(self, bits, orientation, col):
+        """Hard drop on the bitboard, pieces past the right edge are shifted back like _drop does.
+
+        The column is the shifted one, the column the placement is actually in.
+        """
+        col = max(0, min(col, bits.columns - orientation.width))
+        y = bits.drop(orientation, col)
+        if y is None:
+            return {"column": col, "placement": None, "lines_cleared": 0, "cleared_rows": ()}
+
+        cleared = bits.cleared_rows(orientation, col, y)
+        return {
+            "column": col,
+            "placement": bits.coordinates(orientation, col, y),
+            "lines_cleared": len(cleared),
+            "cleared_rows": cleared
         }
 
     # --- Drop Simulation ---
@@ -163,21 +543,20 @@ class PatternNGrams:
             y_offset += 1
 
     # --- Helpers ---
-    def _rotate_shape(self, coords, times=0):
-        rotated = coords
-        for _ in range(times):
-            rotated = [(-y, x) for (x, y) in rotated]
-            min_x = min(x for x, _ in rotated)
-            min_y = min(y for _, y in rotated)
-            rotated = [(x - min_x, y - min_y) for x, y in rotated]
-        return rotated
-
     def _completes_line(self, board, placement, rows, cols):
-        sim = [row[:] for row in board]
+        return bool(self.cleared_rows(board, placement, rows, cols))
+
+    def cleared_rows(self, board, placement, rows, cols):
+        """Rows the placement completes, only the piece's own rows are counted and nothing is copied.
+
+        Works whether or not the board already holds the piece, cells it covers are not counted twice.
+        """
+        added = {}
         for x, y in placement:
-            if 0 <= x < cols and 0 <= y < rows:
-                sim[y][x] = 1
-        return any(all(sim[y][x] != 0 for x in range(cols)) for y in range(rows))
+            if 0 <= y < rows:
+                added[y] = added.get(y, 0) + (0 <= x < cols and board[y][x] == 0)
+
+        return tuple(y for y in sorted(added) if sum(1 for cell in board[y] if cell != 0) + added[y] == cols)
 
     # --- Debug Testing API ---
     def simulate(self, board, piece, columns, rows):
@@ -0,0 +1,110 @@
+# pattern_index.py
+import hashlib
+import os
+import pickle
+from array import array
+
+
+class PatternIndex:
+    """Content-addressed index of stored placements, canonical hash -> corpus position."""
+
+    VERSION = 2
+    # keys written per file write when saving, the game thread gets the GIL back between them
+    CHUNK = 1 << 16
+
+    def __init__(self):
+        self.positions = {}
+        # one key per corpus entry, only ever appended to in place, evict and rebuilds swap in a new array
+        self._keys = array("Q")
+        self.evicted = 0  # entries dropped from the front, positions are counted from the first one ever
+
+    @staticmethod
+    def key(piece, landed_coords, rotation=0):
+        """Canonical hash of (piece, normalized coordinates, rotation), stable across runs."""
+        cells = sorted((int(x), int(y)) for x, y in landed_coords)
+        text = f"{piece}|{int(rotation)}|" + ";".join(f"{x},{y}" for x, y in cells)
+        return int.from_bytes(hashlib.blake2b(text.encode("ascii"), digest_size=8).digest(), "little")
+
+    def add(self, piece, landed_coords, rotation=0):
+        """Index the next corpus entry, returns False (and indexes nothing) when it was already seen."""
+        key = self.key(piece, landed_coords, rotation)
+        if key in self.positions:
+            return False
+        self._append(key)
+        return True
+
+    def _append(self, key):
+        self.positions.setdefault(key, self.evicted + len(self._keys))
+        self._keys.append(key)
+
+    def evict(self, count):
+        """Forget the oldest `count` entries, their placements may be stored again."""
+        for position, key in enumerate(self._keys[:count], start=self.evicted):
+            if self.positions.get(key) == position:
+                del self.positions[key]
+        self._keys = self._keys[count:]
+        self.evicted += count
+
+    def get(self, piece, landed_coords, rotation=0):
+        """Corpus position of a placement, or None if it was never stored."""
+        position = self.positions.get(self.key(piece, landed_coords, rotation))
+        return None if position is None else position - self.evicted
+
+    def seen(self, piece, landed_coords, rotation=0):
+        return self.key(piece, landed_coords, rotation) in self.positions
+
+    def build(self, patterns):
+        """Rebuild from raw pattern entries, duplicates point at their first occurrence."""
+        self.build_placements((entry["piece"], entry["landed_coordinates"], entry["rotation"]) for entry in patterns)
+
+    def build_placements(self, placements):
+        """Rebuild from (piece, landed coordinates, rotation) triples, e.g. BitPatternRecords.placements()."""
+        self.positions.clear()
+        self._keys = array("Q")
+        self.evicted = 0
+        for piece, landed_coords, rotation in placements:
+            self._append(self.key(piece, landed_coords, rotation))
+
+    def __len__(self):
+        return len(self._keys)
+
+    # --- Persistence ---
+    def keys(self):
+        """The key array itself, O(1). Take it under the same lock as the corpus snapshot, its first
+        len(snapshot) keys stay those of the snapshot however many entries are added or evicted after."""
+        return self._keys
+
+    def save(self, index_file, count=None, keys=None):
+        """Persist the first `count` keys of `keys`, an array from keys(), safe to call while the game thread keeps adding."""
+        if keys is None:
+            keys = self._keys
+        if count is None:
+            count = len(keys)
+        with open(index_file + ".tmp", "wb") as f:
+            pickle.dump({"version": self.VERSION, "count": count}, f)
+            for start in range(0, count, self.CHUNK):
+                f.write(keys[start:min(start + self.CHUNK, count)])
+        os.replace(index_file + ".tmp", index_file)
+
+    def load(self, index_file, expected_count):
+        """Load a persisted index, False if it is missing or does not match the snapshot."""
+        if not os.path.exists(index_file):
+            return False
+        keys = array("Q")
+        try:
+            with open(index_file, "rb") as f:
+                data = pickle.load(f)
+                if not isinstance(data, dict) or data.get("version") != self.VERSION or data.get("count") != expected_count:
+                    return False
+                keys.frombytes(f.read())
+        except (OSError, EOFError, ValueError, pickle.UnpicklingError):
+            return False
+        if len(keys) != expected_count:
+            return False
+
+        self._keys = keys
+        self.evicted = 0
+        self.positions = {}
+        for position, key in enumerate(self._keys):
+            self.positions.setdefault(key, position)
+        return True
@@ -0,0 +1,110 @@
+# predictor_worker.py
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import CancelledError, Future, ThreadPoolExecutor
+
+
+class PatternPredictorWorker:
+    """Runs PatternNGrams.predict off the game thread, every request returns a Future.
+
+    predict is pure Python and holds the GIL, so the worker does not run it in parallel with
+    the game thread, it runs it while the game thread sleeps in clock.tick. That takes it off
+    the spawn frame as long as a frame's work leaves idle time and stays under the interpreter
+    switch interval (5 ms), past that the worker takes the GIL mid-frame and the frame pays
+    for the prediction as if it ran inline. benchmarks/bench_hint_worker.py measures both.
+    """
+
+    def __init__(self, predictor, max_queue=4, max_workers=1, latency_window=512):
+        self.predictor = predictor
+        self.max_queue = max_queue
+
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="PatternPredictor")
+        self._lock = threading.Lock()
+        self._pending = OrderedDict()  # future -> submit time, oldest first
+        self._latencies = deque(maxlen=latency_window)
+
+        self.submitted = 0
+        self.completed = 0
+        self.dropped = 0
+        self.stale = 0
+        self.errors = 0
+
+    def submit(self, board, piece, columns, rows, prev_piece=None, next_queue=None):
+        """Queue a prediction on a snapshot of the board, None when the queue is full and nothing could be dropped."""
+        snapshot = [row[:] for row in board]
+        queue = list(next_queue) if next_queue is not None else None
+
+        with self._lock:
+            if len(self._pending) >= self.max_queue and not self._drop_oldest():
+                self.dropped += 1
+                return None
+
+            future = self._executor.submit(self.predictor.predict, snapshot, piece, columns, rows, prev_piece, queue)
+            self._pending[future] = time.perf_counter()
+            self.submitted += 1
+
+        future.add_done_callback(self._finished)
+        return future
+
+    def discard(self, future):
+        """The piece this future was for is gone, cancel it if it has not started and count it as stale."""
+        if future is None:
+            return
+        future.cancel()
+        with self._lock:
+            self.stale += 1
+
+    def _drop_oldest(self):
+        # * the oldest waiting request is for a piece that is already superseded
+        for future in list(self._pending):
+            if future.cancel():
+                self.dropped += 1
+                return True
+        return False
+
+    def _finished(self, future):
+        with self._lock:
+            started = self._pending.pop(future, None)
+            if future.cancelled():
+                return
+            if future.exception() is not None:
+                self.errors += 1
+                return
+            self.completed += 1
+            if started is not None:
+                self._latencies.append(time.perf_counter() - started)
+
+    def stats(self):
+        """Queue depth, request counters and latency percentiles in milliseconds."""
+        with self._lock:
+            latencies = sorted(self._latencies)
+            depth = len(self._pending)
+
+        def percentile(p):
+            if not latencies:
+                return None
+            return latencies[min(len(latencies) - 1, int(p / 100 * len(latencies)))] * 1000
+
+        return {
+            "queue_depth": depth,
+            "submitted": self.submitted,
+            "completed": self.completed,
+            "dropped": self.dropped,
+            "stale": self.stale,
+            "errors": self.errors,
+            "latency_ms": {"p50": percentile(50), "p95": percentile(95), "p99": percentile(99)}
+        }
+
+    @staticmethod
+    def result(future):
+        """(suggestion, error) of a finished future."""
+        try:
+            return future.result(timeout=0), None
+        except CancelledError:
+            return None, None
+        except Exception as error:
+            return None, error
+
+    def close(self):
+        self._executor.shutdown(wait=True, cancel_futures=True)
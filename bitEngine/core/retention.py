@@ -0,0 +1,24 @@
+# retention.py
+from datetime import timedelta
+from typing import NamedTuple, Optional
+
+
+class RetentionPolicy(NamedTuple):
+    """How much of the pattern corpus PatternNGrams keeps, every limit is off by default.
+
+    The oldest records go first. Counts of evicted records are retracted from the models,
+    so without decay the models always equal a rebuild over the records that are kept.
+    """
+    max_records: Optional[int] = None
+    max_age: Optional[timedelta] = None
+    # every `half_life` landings all model counts are halved, older games weigh less
+    half_life: Optional[int] = None
+
+    def excess(self, patterns, now):
+        """Number of oldest records in `patterns` that have to go."""
+        count = 0
+        if self.max_records is not None:
+            count = len(patterns) - self.max_records
+        if self.max_age is not None:
+            count = max(count, patterns.expired(now - self.max_age))
+        return max(0, count)
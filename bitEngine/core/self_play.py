@@ -0,0 +1,256 @@
+# self_play.py
+import os
+import random
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+from .beam_search import BeamSearchPlanner
+from .bitboard import BitBoard
+from .geometry import PIECE_GEOMETRY
+from .ngram_model import heights_signature
+from .ngrams import PatternNGrams, pattern_entry
+from .tetris_logic.core_controller import BitLogicController
+from .tetris_logic.core_grid import BitLogicGrid, BitLogicLineCleaner, BitLogicTetrominoGridSpawner
+from .tetris_logic.core_next_piece_view import BitLogicNextPiece
+from ..utils import BitPatternFileManager, BitPatternRecords, BitPickleFileManager
+
+
+class HeadlessEngine:
+    """The object registry of Bit without a window or a clock, enough for the tetris logic objects."""
+
+    def __init__(self):
+        self.game_objects = []
+
+    def add_object(self, object):
+        self.game_objects.append(object)
+        return object
+
+    def get_objects(self, name=None):
+        if name is None:
+            return self.game_objects
+        return [obj for obj in self.game_objects if obj.__class__.__name__ == name]
+
+    def remove_object(self, object):
+        self.game_objects = [obj for obj in self.game_objects if obj is not object]
+
+
+class LandingRecorder:
+    """Takes PatternNGrams' place in a headless spawner, landings are kept until taken as store columns."""
+
+    # the spawner counts cleared lines through its predictor, the answer does not depend on the corpus
+    cleared_rows = PatternNGrams.cleared_rows
+
+    def __init__(self, reason=None):
+        self.entries = []
+        # replaces the spawner's reason, tells self play records apart from human ones
+        self.reason = reason
+
+    def write_pattern(self, piece, landed_coords, rotation=0, lines_cleared=0,
+                      next_queue=None, reason="manual", surface=None):
+        self.entries.append(pattern_entry(piece, landed_coords, rotation, lines_cleared, next_queue,
+                                          self.reason or reason, surface))
+        return True
+
+    def take(self):
+        """Columns of every landing recorded since the last take."""
+        columns = BitPatternFileManager.encode(self.entries)
+        self.entries = []
+        return columns
+
+    def close(self):
+        pass
+
+
+# --- Players ---
+class GreedyPlayer:
+    """Scripted player, the planner's best placement for the current piece and `lookahead` queued ones."""
+
+    def __init__(self, lookahead=0):
+        self.lookahead = lookahead
+        # * no time budget or node cap, a game replays the same for the same seed however busy the machine is
+        self.planner = BeamSearchPlanner(time_budget_ms=float("inf"), max_nodes=None)
+
+    def choose(self, bits, piece, queue):
+        steps = self.planner.search(bits, [piece] + list(queue)[:self.lookahead])
+        return (steps[0]["rotation"], steps[0]["column"]) if steps else None
+
+
+class RandomPlayer:
+    """Any legal hard drop, uniformly."""
+
+    def choose(self, bits, piece, queue):
+        placements = bits.placements(piece)
+        if not placements:
+            return None
+        rotation, column, _ = random.choice(placements)
+        return rotation, column
+
+
+class ModelPlayer:
+    """Model driven player, the placement n-gram model of a saved snapshot, the planner where it has no answer."""
+
+    def __init__(self, model_file="data/pickles/ngrams.pkl", lookahead=0):
+        snapshot = BitPickleFileManager(model_file).load_processed_ngrams()
+        if snapshot is None:
+            raise FileNotFoundError(f"{model_file} holds no trained model snapshot.")
+
+        self.model = snapshot["models"]["placement_model"]
+        self.history = deque(maxlen=self.model.order)  # most recent piece first, like the model's own
+        self.fallback = GreedyPlayer(lookahead)
+
+    def choose(self, bits, piece, queue):
+        suggestion = self.model.predict(piece, heights_signature(bits.heights()), queue, list(self.history))
+        self.history.appendleft(piece)
+
+        if suggestion is not None:
+            column, rotation = suggestion
+            orientation = PIECE_GEOMETRY[piece][rotation % 4]
+            if column + orientation.width <= bits.columns and bits.drop(orientation, column) is not None:
+                return rotation % 4, column
+        return self.fallback.choose(bits, piece, queue)
+
+
+PLAYERS = {"greedy": GreedyPlayer, "random": RandomPlayer, "model": ModelPlayer}
+
+
+def make_player(name="greedy", **options):
+    if name not in PLAYERS:
+        raise ValueError(f"Unknown self play player {name!r}, expected one of {sorted(PLAYERS)}.")
+    return PLAYERS[name](**options)
+
+
+# --- Games ---
+class SelfPlayGame:
+    """Headless games on the grid, spawner and line cleaner of the real game, stepped once per landing.
+
+    The player's placement is played through a BitLogicController the way the keyboard would:
+    a few rows down, turns, side steps, hard drop. Whatever the piece actually lands on is recorded.
+    A piece landing in the spawn rows ends the game and a fresh one starts.
+    """
+
+    # rows a piece is walked down before turning, the table rotation pivots can reach above the grid
+    TURN_ROWS = 2
+    SPAWN_ROWS = 4
+
+    def __init__(self, player, columns=10, rows=20, max_piece_queue=3, explore=0.0, max_pieces=None):
+        self.player = player
+        self.columns = columns
+        self.rows = rows
+        self.max_piece_queue = max_piece_queue
+        # share of pieces dropped at random instead, keeps a strong player's corpus varied
+        self.explore = explore
+        self.max_pieces = max_pieces
+
+        self.recorder = LandingRecorder("self_play")
+        self.games = 0
+        self.reset()
+
+    def reset(self):
+        self.engine = HeadlessEngine()
+        self.next_piece = BitLogicNextPiece(self.max_piece_queue)
+        self.grid = BitLogicGrid(None, self.rows, self.columns)
+        self.spawner = BitLogicTetrominoGridSpawner(self.engine, self.grid, self.next_piece, predictor=self.recorder, hints=False)
+        self.spawner.tetromino_interface = None
+        self.line_cleaner = BitLogicLineCleaner(self.engine, self.grid, self.grid.rows)
+        self.controller = BitLogicController(self.spawner)
+
+        self.pieces = 0
+        self.over = False
+        self.games += 1
+
+    def step(self):
+        """One game loop pass per piece: record the last landing, spawn, clear lines, then play the new piece."""
+        self.next_piece.update()
+        self.spawner.update()
+
+        if self.over or (self.max_pieces is not None and self.pieces >= self.max_pieces):
+            self.reset()
+            self.next_piece.update()
+            self.spawner.update()
+
+        self.line_cleaner.update()
+
+        self.controller.control(())
+        self.play(self.controller.object)
+        self.pieces += 1
+
+    def play(self, tetromino):
+        target = self.choose(tetromino)
+
+        for _ in range(self.TURN_ROWS):
+            if tetromino.landed:
+                break
+            self.controller.move(0, 1)
+
+        if target is not None and not tetromino.landed:
+            rotation, column = target
+            turns = (tetromino.orientation.rotation - rotation) % 4
+            for _ in range(turns if turns < 3 else 1):
+                self.controller.rotate("clock_wise" if turns < 3 else "counter_clock_wise")
+
+            while not tetromino.landed:
+                x = tetromino.bounding_box()[0]
+                if x == column:
+                    break
+                before = tetromino.coordinates
+                self.controller.move(1 if column > x else -1, 0)
+                if tetromino.coordinates is before:
+                    break
+
+        self.controller.hard_drop()
+        self.over = target is None or min(y for _, y in tetromino.coordinates) < self.SPAWN_ROWS
+
+    def choose(self, tetromino):
+        """(rotation, column) for the piece on the board without it, None when it has nowhere to go."""
+        # * the falling piece is never in the grid's cells
+        bits = BitBoard(self.rows, self.columns, self.grid.cells)
+
+        if self.explore and random.random() < self.explore:
+            return RandomPlayer().choose(bits, tetromino.piece_shape, ())
+        return self.player.choose(bits, tetromino.piece_shape, self.next_piece.peek_next(self.max_piece_queue))
+
+
+def play_landings(landings, seed, player="greedy", columns=10, rows=20, explore=0.0, max_pieces=None, **options):
+    """Worker entry point, plays seeded headless games until `landings` pieces were recorded, returns their columns."""
+    random.seed(seed)
+    game = SelfPlayGame(make_player(player, **options), columns, rows, explore=explore, max_pieces=max_pieces)
+    while len(game.recorder.entries) < landings:
+        game.step()
+    return game.recorder.take()
+
+
+def generate(store_file="data/training_data/pattern.bin", landings=100_000, workers=None, chunk=10_000,
+             checkpoint=100_000, seed=0, **play):
+    """Self play `landings` pieces across worker processes and append them to the binary pattern store.
+
+    Chunks are joined onto the store in seed order as workers finish them, the store is rewritten
+    every `checkpoint` landings, an interrupted run keeps what was saved. Every landing is stored,
+    the duplicate check of write_pattern would cap a corpus at the few thousand distinct placements.
+    Run it with the game closed, PatternNGrams replays the new records on its next start.
+    Returns the number of landings added.
+    """
+    store = BitPatternFileManager(store_file)
+    columns = store.read_columns() if store.exists() else store.encode([])
+
+    sizes = [min(chunk, landings - start) for start in range(0, landings, chunk)]
+    seeds = [seed + i for i in range(len(sizes))]
+    worker = partial(play_landings, **play)
+
+    workers = workers or os.cpu_count() or 1
+    pool = ProcessPoolExecutor(max_workers=workers) if workers > 1 else None
+    pending, added = [], 0
+    try:
+        for part in (pool.map(worker, sizes, seeds) if pool else map(worker, sizes, seeds)):
+            pending.append(part)
+            added += part["count"]
+            if sum(part["count"] for part in pending) >= checkpoint or added == landings:
+                for part in pending:
+                    columns = store.join(columns, part)
+                store.save(BitPatternRecords(columns))
+                pending = []
+    finally:
+        if pool is not None:
+            pool.shutdown(cancel_futures=True)
+
+    return added
@@ -0,0 +1,70 @@
+# simulation.py
+import pygame
+
+
+class SystemClock:
+    """Milliseconds since pygame started, the real time a window runs on."""
+
+    def now(self):
+        return pygame.time.get_ticks()
+
+
+class ManualClock:
+    """Time that only moves when told to, tests and headless runs skip ahead instantly."""
+
+    def __init__(self, start=0):
+        self.time = start
+
+    def now(self):
+        return self.time
+
+    def advance(self, ms):
+        self.time += ms
+
+
+class FixedStepScheduler:
+    """Fixed timestep simulation on an accumulator, decoupled from how often frames render.
+
+    Real time read from `source` is banked every frame and paid out in whole `step_ms` steps.
+    The scheduler is also the clock game logic reads (`now`), and that time only moves by whole
+    steps, so the same steps and inputs give the same game however the frames were paced.
+    At most `max_steps` run per frame, a stalled window skips ahead instead of spiralling into
+    ever longer catch ups.
+    """
+
+    def __init__(self, step_ms=1000 / 120, source=None, max_steps=8):
+        self.step_ms = step_ms
+        self.source = source if source is not None else SystemClock()
+        self.max_steps = max_steps
+
+        self.steps = 0  # fixed steps simulated so far
+        self.accumulator = 0.0
+        self.last = None
+
+    def now(self):
+        """Simulated milliseconds, whole steps only."""
+        return self.steps * self.step_ms
+
+    def due(self):
+        """Whole steps owed for the real time since the last frame."""
+        now = self.source.now()
+        if self.last is not None:
+            self.accumulator += now - self.last
+        self.last = now
+
+        steps = min(int(self.accumulator // self.step_ms), self.max_steps)
+        self.accumulator = min(self.accumulator - steps * self.step_ms, self.step_ms)
+        return steps
+
+    def hold(self):
+        """Let real time pass without owing steps for it, while paused."""
+        self.last = None
+        self.accumulator = 0.0
+
+    def step(self):
+        self.steps += 1
+
+    @property
+    def alpha(self):
+        """How far real time is into the next step, 0 to 1, for smoothing what is drawn."""
+        return self.accumulator / self.step_ms
@@ -30,6 +30,11 @@ class BitLogicController:
         # ? Temporary 
         grid_spawner_logic = self.temporary_object
         grid_spawner_logic.controller = self
+
+        # * every piece starts unturned, rotation_index follows the geometry table rotation of the piece
+        if grid_spawner_logic.spawned_tetromino is not self.object:
+            self.rotation_index = 0
+
         self.object = grid_spawner_logic.spawned_tetromino
         self.apply_controls(events)
 
@@ -38,6 +43,26 @@ class BitLogicController:
     def move(self, dx: int, dy: int) -> None:
         """ changes object coordinates """
         self.object.change_coordinates([(x + dx, y + dy) for x, y in self.object.coordinates], dx = dx, dy = dy)
+
+
+    @controller_validation
+    def rotate(self, direction: str = "clock_wise") -> None:
+        """ turns the object, only turns that went through are counted, a clockwise turn is one table rotation back """
+        if not hasattr(self.object, "rotate"):
+            return
+
+        before = self.object.coordinates
+        self.object.rotate(direction)
+
+        if self.object.coordinates is not before:
+            self.rotation_index = (self.rotation_index + (-1 if direction == "clock_wise" else 1)) % 4
+
+
+    @controller_validation
+    def hard_drop(self) -> None:
+        """ drops the object all the way down """
+        if hasattr(self.object, "hard_drop"):
+            self.object.hard_drop()
     
 
     @controller_validation
@@ -54,18 +79,14 @@ class BitLogicController:
                 if event.key == pygame.K_DOWN:
                     self.move(0, 1)
 
-                if hasattr(self.object, "hard_drop"):
-                    if event.key == pygame.K_SPACE:
-                        self.object.hard_drop()
+                if event.key == pygame.K_SPACE:
+                    self.hard_drop()
 
-                if hasattr(self.object, "rotate"):
-                    if event.key == pygame.K_x:
-                        self.object.rotate("clock_wise")
-                        self.rotation_index = (self.rotation_index + 1) % 4
+                if event.key == pygame.K_x:
+                    self.rotate("clock_wise")
                        
-                    if event.key == pygame.K_z:
-                        self.object.rotate("counter_clock_wise")
-                        self.rotation_index = (self.rotation_index - 1) % 4
+                if event.key == pygame.K_z:
+                    self.rotate("counter_clock_wise")
 
 if __name__ == "__main__":
       pass
@@ -1,17 +1,26 @@
 import os
-import copy
 import json
 import random
 
-from typing import Literal, List
+from functools import lru_cache
+from typing import Literal, List, Set, Tuple
 
 from .core_tetromino import BitLogicTetromino
 from .core_next_piece_view import BitLogicNextPiece
 from ..ngrams import PatternNGrams
+from ..ngram_model import surface_signature
+from ..predictor_worker import PatternPredictorWorker
 
 from bitEngine.ui.tetris_ui import BitInterfaceTetromino
 
 
+@lru_cache(maxsize=None)
+def zobrist_table(rows: int, columns: int, seed: int = 0x7E7215) -> Tuple[Tuple[int, ...], ...]:
+    """ One random 64 bit key per cell, fixed seed so a board hashes the same in every run """
+    rng = random.Random(seed)
+    return tuple(tuple(rng.getrandbits(64) for _ in range(columns)) for _ in range(rows))
+
+
 class BitLogicGrid:
     """ Collision logics """
     def __init__(self, window, rows: int = 20, columns: int = 30) -> None:
@@ -20,15 +29,143 @@ class BitLogicGrid:
         self.rows = rows
         self.columns = columns
 
-        self.cell_coordinates = [[0 for _ in range(columns)] for _ in range(rows)]
+        # * one int bitmask per row of the locked cells, bit x is column x, a row is full when it equals full_mask
+        # * the falling piece is not in here, it is an orientation and an origin until it locks
+        self.cells = [0] * rows
+        self.full_mask = (1 << columns) - 1
+
+        # * row of the highest locked cell in every column, rows when the column is empty
+        self.tops = [rows] * columns
+
+        # * list-of-lists copy of the cells built when asked for, dropped on every write
+        self.board_state = None
+
+        # * locked layer, color and n gram word of every cell a locked piece left behind, None where there is none
+        self.locked_colors = [[None for _ in range(columns)] for _ in range(rows)]
+        self.locked_words = [[None for _ in range(columns)] for _ in range(rows)]
+
+        # * xor of the keys of every filled cell, every write goes through set_cell(s) or clear_rows to keep it in step
+        self.zobrist = zobrist_table(rows, columns)
+        self.state_hash = 0
+
+        # * pieces that locked since the line cleaner last looked
+        self.lock_events = []
         
         self.offset_x = 0
         self.offset_y = 0
 
     
-    def get_board_state(self) -> List:
-        """ Returns the whole board state """
-        return self.cell_coordinates
+    def get_board_state(self) -> Tuple[Tuple[int, ...], ...]:
+        """ Returns the whole board state, a read only rows of 0 and 1 view of the cells """
+        if self.board_state is None:
+            columns = range(self.columns)
+            self.board_state = tuple(tuple(row >> x & 1 for x in columns) for row in self.cells)
+        return self.board_state
+
+
+    @property
+    def cell_coordinates(self) -> Tuple[Tuple[int, ...], ...]:
+        """ Board as rows of cells, kept for the callers from before the masks """
+        return self.get_board_state()
+
+
+    def set_cell(self, x: int, y: int, value: int = 1) -> None:
+        """ Writes one cell, the hash only changes when the cell goes from empty to filled or back """
+        # * rows above the grid hold nothing, a negative index would land in the bottom rows
+        if y < 0:
+            return
+
+        row = self.cells[y]
+        if (row >> x & 1) != (value != 0):
+            self.cells[y] = row ^ (1 << x)
+            self.state_hash ^= self.zobrist[y][x]
+            self.board_state = None
+
+            if value and y < self.tops[x]:
+                self.tops[x] = y
+            elif not value and y == self.tops[x]:
+                self.tops[x] = self._column_top(x)
+
+
+    def set_cells(self, coordinates: List[Tuple[int, int]], value: int = 1) -> None:
+        """ set_cell for a whole piece, one call per move instead of one per cell """
+        cells, zobrist, state_hash, tops = self.cells, self.zobrist, self.state_hash, self.tops
+        for x, y in coordinates:
+            if y < 0:
+                continue
+            row = cells[y]
+            if (row >> x & 1) != (value != 0):
+                cells[y] = row ^ (1 << x)
+                state_hash ^= zobrist[y][x]
+
+                if value and y < tops[x]:
+                    tops[x] = y
+                elif not value and y == tops[x]:
+                    tops[x] = self._column_top(x)
+        self.state_hash = state_hash
+        self.board_state = None
+
+
+    def _column_top(self, x: int) -> int:
+        """ Row of the highest locked cell of one column, scanned from the top """
+        bit = 1 << x
+        return next((y for y, row in enumerate(self.cells) if row & bit), self.rows)
+
+
+    def lock(self, tetromino) -> None:
+        """ A piece landed, its cells join the grid and the locked layer, the line cleaner takes the event """
+        # * a piece can lock while still poking out of the top, rows above the grid hold nothing
+        # * and a negative index would write into the bottom rows instead
+        coordinates = [(x, y) for x, y in tetromino.coordinates if y >= 0]
+        self.set_cells(coordinates, 1)
+        for x, y in coordinates:
+            self.locked_colors[y][x] = tetromino.color
+            self.locked_words[y][x] = tetromino.word
+        self.lock_events.append(tetromino)
+
+
+    def take_lock_events(self) -> List:
+        """ Pieces locked since the last call """
+        locked = self.lock_events
+        self.lock_events = []
+        return locked
+
+
+    def full_rows(self, rows) -> List[int]:
+        """ Rows out of the given ones the locked pieces filled completely, top to bottom """
+        return [y for y in sorted(rows) if self.cells[y] == self.full_mask]
+
+
+    def clear_rows(self, rows: Set[int]) -> None:
+        """ Removes rows of the locked layer, every row above them moves down """
+        if not rows:
+            return
+
+        first = min(rows)
+
+        # * top to bottom, a removed row never moves the index of a lower one
+        for y in sorted(rows):
+            for layer, empty in ((self.cells, 0), (self.locked_colors, [None] * self.columns), (self.locked_words, [None] * self.columns)):
+                del layer[y]
+                layer.insert(0, empty)
+
+        # * every moved cell changes key, a clear is rare enough to hash from scratch
+        self.state_hash = self.rehash()
+        self.board_state = None
+
+        # * tops above the first cleared row only sink, the rest are looked up again
+        self.tops = [top + len(rows) if top < first else self._column_top(x) for x, top in enumerate(self.tops)]
+
+
+    def rehash(self) -> int:
+        """ Hash of the cells from scratch, O(filled cells), for checking state_hash """
+        state_hash = 0
+        for row, keys in zip(self.cells, self.zobrist):
+            while row:
+                low = row & -row
+                state_hash ^= keys[low.bit_length() - 1]
+                row ^= low
+        return state_hash
     
 
     def update(self) -> None:
@@ -37,11 +174,15 @@ class BitLogicGrid:
 
 class BitLogicTetrominoGridSpawner:
     """ Basically just a spawner 🤓☝️"""
-    def __init__(self, engine, grid_logic: BitLogicGrid, next_piece_logic: BitLogicNextPiece, tick_speed: int = 500):
+    def __init__(self, engine, grid_logic: BitLogicGrid, next_piece_logic: BitLogicNextPiece, tick_speed: int = 500, predictor = None, hints: bool = True, clock = None, rng = None):
         self.engine = engine 
 
         self.tick_speed = tick_speed
 
+        # * simulation clock the pieces fall on and the random stream they spawn from, real time and the random module when not given
+        self.clock = clock
+        self.rng = rng if rng is not None else random
+
         self.grid_logic = grid_logic
         
         self.next_piece_logic: BitLogicNextPiece = next_piece_logic
@@ -53,8 +194,13 @@ class BitLogicTetrominoGridSpawner:
         self.tetromino_border_color = None
         self.tetromino_indicator_color = "white"
 
-        # * predictor handles write_pattern and predict
-        self.predictor = PatternNGrams()
+        # * predictor handles write_pattern and predict, headless self play passes in its own recorder
+        self.predictor = predictor if predictor is not None else PatternNGrams()
+
+        # * hints are computed off the game thread, the future is checked once per frame
+        self.predictor_worker = PatternPredictorWorker(self.predictor) if hints else None
+        self.pending_suggestion = None
+        self.pending_tetromino = None
 
         self.spawn_test = True
         self.spawn_num = 0
@@ -72,33 +218,45 @@ class BitLogicTetrominoGridSpawner:
         return
 
 
+    def close(self) -> None:
+        """ Stops the hint worker and folds the predictor's pattern journal into its snapshot """
+        if self.predictor_worker is not None:
+            self.predictor_worker.close()
+
+        if self.predictor is not None:
+            self.predictor.close()
+
+
     def update(self) -> None:
+        self.collect_suggestion()
+
         # * Spawn once only for testing
         if not self.spawned_tetromino or self.spawned_tetromino.landed:
             if self.spawned_tetromino:
                 # * Use PatternNGrams' write_pattern instead of local one
                 landed_coords = self.spawned_tetromino.coordinates
                 piece = self.spawned_tetromino.piece_shape
-                rotation = self.controller.rotation_index
+                # * the geometry table rotation the cells landed in, the one predict and the players read
+                rotation = self.spawned_tetromino.orientation.rotation
 
                 
-                # * count cleared lines
-                lines_cleared = 0
-                for y in range(self.grid_logic.rows):
-                    if all(self.grid_logic.cell_coordinates[y][x] != 0
-                           for x in range(self.grid_logic.columns)):
-                        lines_cleared += 1
+                # * count cleared lines, only the rows the piece landed on can be full
+                lines_cleared = len(self.predictor.cleared_rows(self.grid_logic.get_board_state(), landed_coords, self.grid_logic.rows, self.grid_logic.columns))
 
                 # * get the next queue from next_piece_logic
                 next_queue = self.next_piece_logic.peek_next()
 
+                # * board surface the piece landed on, without the piece itself
+                surface = surface_signature(self.grid_logic.get_board_state(), self.grid_logic.columns, self.grid_logic.rows, exclude = landed_coords)
+
                 self.predictor.write_pattern(
                     piece=piece,
                     landed_coords=landed_coords,
                     rotation=rotation,
                     lines_cleared=lines_cleared,
                     next_queue=next_queue,
-                    reason="auto"
+                    reason="auto",
+                    surface=surface
                 )
 
             self.spawn(self.next_piece_logic.get_piece())
@@ -109,31 +267,16 @@ class BitLogicTetrominoGridSpawner:
         """ spawns tetromino pieces on the grid """
             
         piece_shape = piece_shape.upper()
-        predictor = getattr(self, "predictor", None)
-        print(f"[spawn] piece={piece_shape} | predictor attached? {'yes' if predictor else 'no'}")
 
         created_tetromino: BitLogicTetromino = self.create(piece_shape)
 
-        # Ask predictor where it *should* go
-        if self.predictor is not None:
-            try:
-                board_state = self.grid_logic.get_board_state()
-                suggestion = self.predictor.predict(
-                    board_state,
-                    piece_shape,
-                    columns=self.grid_logic.columns,
-                    rows=self.grid_logic.rows
-                )
-                print(f"[spawn] predictor suggestion={suggestion}")
-
-                if suggestion:
-                    created_tetromino.suggested_position = suggestion
-            except Exception as e:
-                print(f"[spawn] predictor error: {e}")
+        # * Ask predictor where it *should* go, the answer is attached once it arrives
+        if self.predictor_worker is not None:
+            self.request_suggestion(created_tetromino)
                 
         # * I make this because, Iwant the tetromino to spawn within in any area of the spawn 🫡
         if x is None:
-            start_x = random.randint(0, self.grid_logic.columns)
+            start_x = self.rng.randint(0, self.grid_logic.columns)
         else:
             start_x = x
         
@@ -149,21 +292,54 @@ class BitLogicTetrominoGridSpawner:
         # * Change tetromino coordinates base on grid
         tetromino_coordinates = [(x + start_x, y + start_y) for x, y in created_tetromino.coordinates]
        
-        # * Position Tetromino on the grid
-        for x, y in tetromino_coordinates:
-            self.grid_logic.cell_coordinates[y][x] = 1
-
         created_tetromino.coordinates = tetromino_coordinates
 
         self.spawned_tetromino = created_tetromino
 
 
+    def request_suggestion(self, tetromino: BitLogicTetromino) -> None:
+        """ Sends a board snapshot to the predictor worker, any older request is superseded """
+        if self.pending_suggestion is not None:
+            self.predictor_worker.discard(self.pending_suggestion)
+
+        self.pending_suggestion = self.predictor_worker.submit(
+            self.grid_logic.get_board_state(),
+            tetromino.piece_shape,
+            columns=self.grid_logic.columns,
+            rows=self.grid_logic.rows,
+            next_queue=self.next_piece_logic.peek_next()
+        )
+        self.pending_tetromino = tetromino
+
+
+    def collect_suggestion(self) -> None:
+        """ Attaches a finished suggestion to its piece, results for a piece that is gone are dropped """
+        if self.pending_suggestion is None or not self.pending_suggestion.done():
+            return
+
+        future, tetromino = self.pending_suggestion, self.pending_tetromino
+        self.pending_suggestion = None
+        self.pending_tetromino = None
+
+        suggestion, error = self.predictor_worker.result(future)
+        if error is not None:
+            print(f"[spawn] predictor error: {error}")
+            return
+
+        if tetromino is not self.spawned_tetromino or tetromino.landed:
+            self.predictor_worker.discard(future)
+            return
+
+        if suggestion:
+            tetromino.suggested_position = suggestion
+
+
     def format_board(self, board):
         return ["[" + ",".join(str(c) for c in row) + "]" for row in board]
 
 
     def write_pattern(self, board, pieces, save_path="pattern.json"):
-        board_copy = copy.deepcopy(board)
+        board_copy = [list(row) for row in board]
 
         for tetro in pieces:
             if tetro.landed:
@@ -200,14 +376,22 @@ class BitLogicTetrominoGridSpawner:
     def create(self, piece_shape: Literal["0", "I"]) -> BitLogicTetromino:
         """ Creates the tetromino peice coordinates or its piece shape """
 
-        coordinates = self.next_piece_logic.piece.get(piece_shape)
+        coordinates = list(self.next_piece_logic.piece.get(piece_shape))
 
-        created_logic_tetromino: BitLogicTetromino = self.tetromino_logic(self.grid_logic, piece_shape, coordinates, self.tick_speed)
+        created_logic_tetromino: BitLogicTetromino = self.tetromino_logic(self.grid_logic, piece_shape, coordinates, self.tick_speed, self.clock)
 
         # * ADDS TO THE WINDOW SURFACE
         self.engine.add_object(created_logic_tetromino)
+
+        # * headless games have nothing to draw
+        if self.tetromino_interface is None:
+            return created_logic_tetromino
+
         tetromino_interface = self.tetromino_interface(created_logic_tetromino, self.tetromino_colors)
 
+        # * the grid keeps drawing it in this color once it locked
+        created_logic_tetromino.color = tetromino_interface.chosen_color
+
         tetromino_interface.border_color = self.tetromino_border_color
         tetromino_interface.indicator_color = self.tetromino_indicator_color
 
@@ -230,38 +414,44 @@ class BitLogicLineCleaner:
 
 
     def update(self) -> None:
-        self.tetrominoes = self.engine.get_objects("BitLogicTetromino")
+        # * nothing locked since the last frame, so nothing can have filled up
+        if not self.grid_logic.lock_events:
+            return
         self.check_clearing()
 
 
     def check_clearing(self) -> None:
-        """ Checks for possible row clearing """
-        landed_coords = set()
-        for tet in self.tetrominoes:
-            if tet.landed:
-                landed_coords.update(tet.coordinates)
+        """ Checks for possible row clearing, only the rows the newly locked pieces touched can be full """
+        locked = self.grid_logic.take_lock_events()
+        self.release(locked)
 
-        rows_to_clear = []
-
-        for y in range(self.grid_logic.rows):
-            if all((x, y) in landed_coords for x in range(self.grid_logic.columns)):
-                rows_to_clear.append(y)
+        touched = {y for tetromino in locked for _, y in tetromino.coordinates}
+        rows_to_clear = self.grid_logic.full_rows(touched)
             
         if rows_to_clear:
             self.num_cleared_rows = len(rows_to_clear)
             self.clear_rows(rows_to_clear)
+
+
+    def release(self, locked: List[BitLogicTetromino]) -> None:
+        """ Locked pieces live on in the grid, their objects and the interfaces drawing them leave the game loop """
+        if not locked:
+            return
+
+        for game_object in list(self.engine.get_objects()):
+            if any(game_object is tetromino or getattr(game_object, "tetromino_logic", None) is tetromino for tetromino in locked):
+                self.engine.remove_object(game_object)
     
 
     def clear_rows(self, rows_to_clear: List[int]) -> None:
         """ Clears a set of line of rows """
         rows_to_clear = set(rows_to_clear)
 
+        # * everything locked is in the grid's layer, a piece still falling is above the stack and keeps its cells
+        self.tetrominoes = [tetro for tetro in self.engine.get_objects("BitLogicTetromino") if tetro.landed]
+
+        self.grid_logic.clear_rows(rows_to_clear)
+
         for tetro in self.tetrominoes:
             tetro.remove_rows(rows_to_clear)
-            
-        for tetro in self.tetrominoes:
             tetro.shift_down(rows_to_clear)
-
-        for tetro in self.tetrominoes:
-            for (x, y) in tetro.coordinates:
-                self.grid_logic.cell_coordinates[y][x] = 1
@@ -1,20 +1,18 @@
 import random 
 
-from typing import Dict, List, Tuple
+from typing import Mapping, Tuple
+
+from ..geometry import PIECE_SHAPES
 
 class BitLogicNextPiece:
-    def __init__(self, max_piece_queue: int = 3):
+    def __init__(self, max_piece_queue: int = 3, rng = None):
         self.max_piece_queue = max_piece_queue
 
-        self.piece: Dict[str, List[Tuple[int, int]]] = {
-            "O": [(0, 0), (1, 0), (0, 1), (1, 1)],
-            "I": [(0, 0), (1, 0), (2, 0), (3, 0)],
-            "T": [(1, 0), (0, 1), (1, 1), (2, 1)],
-            "L": [(0, 0), (0, 1), (0, 2), (1, 2)],
-            "J": [(1, 0), (1, 1), (1, 2), (0, 2)],
-            "S": [(1, 0), (2, 0), (0, 1), (1, 1)],
-            "Z": [(0, 0), (1, 0), (1, 1), (2, 1)]
-        }
+        # * the engine's seeded random stream, the random module when there is none
+        self.rng = rng if rng is not None else random
+
+        # * read only templates from the shared geometry table
+        self.piece: Mapping[str, Tuple[Tuple[int, int], ...]] = PIECE_SHAPES
 
         self.piece_queue = []
 
@@ -35,7 +33,7 @@ class BitLogicNextPiece:
 
     def insert_piece(self) -> None:
         """ insert on the last piece """
-        new_piece = random.choice(list(self.piece.keys()))
+        new_piece = self.rng.choice(list(self.piece.keys()))
         self.piece_queue.append(new_piece)
 
         if len(self.piece_queue) > self.max_piece_queue:
@@ -1,15 +1,19 @@
-import pygame
-
 from typing import List, Tuple, Literal
 
+from ..geometry import PIECE_GEOMETRY, pivot
+from ..simulation import SystemClock
+
 class BitLogicTetromino:
     """ Tetromino functionalities """
-    def __init__(self, grid_logic, piece_shape: str, coordinates: List[Tuple[int, int]], tick_speed: int = 500) -> None:
+    def __init__(self, grid_logic, piece_shape: str, coordinates: List[Tuple[int, int]], tick_speed: int = 500, clock = None) -> None:
         self.grid_logic = grid_logic
 
         # * For n grams
         self.word = None
 
+        # * fill color the interface picked, the grid's locked layer keeps it
+        self.color = None
+
         self.width = 0
         self.height = 0
 
@@ -23,14 +27,25 @@ class BitLogicTetromino:
         # * Piece Name
         self.piece_shape = piece_shape
 
+        # * Current rotation from the shared geometry table, and the grid cell of its top left corner
+        self.orientation = PIECE_GEOMETRY[piece_shape][0]
+        self.origin: Tuple[int, int] = (0, 0)
+
+        # * False once a line clear took cells away, the table no longer describes the piece
+        self.intact = True
+
         self.coordinates: List[Tuple[int, int]] = coordinates
 
         self.landed = False
         self.indicator = False
 
-        # * Gravity timing
+        # * ghost cells with the coordinates and board hash they were worked out for
+        self.ghost = None
+
+        # * Gravity timing, on the engine's simulation clock when it has one
+        self.clock = clock if clock is not None else SystemClock()
         self.gravity_delay = tick_speed  # * milliseconds on falling
-        self.last_gravity_time = pygame.time.get_ticks()
+        self.last_gravity_time = self.clock.now()
 
         self.falling_skip = 3
 
@@ -42,13 +57,43 @@ class BitLogicTetromino:
         self._get_height()
 
 
+    @property
+    def coordinates(self) -> List[Tuple[int, int]]:
+        return self._coordinates
+
+
+    @coordinates.setter
+    def coordinates(self, coordinates: List[Tuple[int, int]]) -> None:
+        """ Cells keep the table order, so the first cell is enough to locate the piece """
+        self._coordinates = coordinates
+
+        if self.intact and coordinates:
+            cell_x, cell_y = self.orientation.cells[0]
+            x, y = coordinates[0]
+            self.origin = (x - cell_x, y - cell_y)
+
+
+    def bounding_box(self, coordinates: List[Tuple[int, int]] = None) -> Tuple[int, int, int, int]:
+        """ min x, min y, width and height of the piece, or of a shifted copy of it like the ghost """
+        if coordinates is None:
+            coordinates = self.coordinates
+
+        if self.intact and len(coordinates) == len(self.orientation.cells):
+            cell_x, cell_y = self.orientation.cells[0]
+            x, y = coordinates[0]
+            return x - cell_x, y - cell_y, self.orientation.width, self.orientation.height
+
+        xs = [x for x, _ in coordinates]
+        ys = [y for _, y in coordinates]
+        return min(xs), min(ys), max(xs) - min(xs) + 1, max(ys) - min(ys) + 1
+
+
     def _get_height(self) -> None:
         """ gets latest tetromino height """
         if not self.coordinates:
             return
         
-        ys = [y for _, y in self.coordinates]
-        self.height = max(ys) - min(ys) + 1
+        self.height = self.bounding_box()[3]
 
 
     def _get_width(self) -> None:
@@ -56,39 +101,32 @@ class BitLogicTetromino:
         if not self.coordinates:
             return 
         
-        xs = [x for x, _ in self.coordinates]
-        self.width = max(xs) - min(xs) + 1
+        self.width = self.bounding_box()[2]
     
 
     def _get_block_pivot(self) -> Tuple[int, int]:
         """ Return a piece center pivot """
-        xs = [x for x, _ in self.coordinates]
-        ys = [y for _, y in self.coordinates]
-
-        self.min_x, self.max_x = min(xs), max(xs)
-        self.min_y, self.max_y = min(ys), max(ys)
+        self.min_x, self.min_y, width, height = self.bounding_box()
+        self.max_x = self.min_x + width - 1
+        self.max_y = self.min_y + height - 1
 
-        center_x = (self.min_x + self.max_x) / 2
-        center_y = (self.min_y + self.max_y) / 2
+        if self.intact:
+            return pivot(self.orientation, self.min_x, self.min_y)
 
         # * snap to nearest block, decimals are not allowed because of block or grid
-        pivot_x = round(center_x)
-        pivot_y = round(center_y)
+        return (round((self.min_x + self.max_x) / 2), round((self.min_y + self.max_y) / 2))
 
-        return (pivot_x, pivot_y)
 
-
-    def change_coordinates(self, new_coordinates: List[Tuple[int, int]],dx: int = 0, dy: int = 1) -> None:
-        """ Change tetromino coordinates state """
-        for x, y in self.coordinates:
-            self.grid_logic.cell_coordinates[y][x] = 0
+    def change_coordinates(self, new_coordinates: List[Tuple[int, int]], dx: int = 0, dy: int = 1, orientation = None) -> None:
+        """ Change tetromino coordinates state, the grid only learns about the piece once it locks """
+        if self.landed:
+            return
 
         if not self.check_collision(self.coordinates, dx = dx, dy = dy):
+            if orientation is not None:
+                self.orientation = orientation
             self.coordinates = new_coordinates
 
-        for x, y in self.coordinates:
-            self.grid_logic.cell_coordinates[y][x] = 1
-
 
     def update(self) -> None:
         """ Update tetromino state """
@@ -101,7 +139,7 @@ class BitLogicTetromino:
         if not self.coordinates:
             return 
         
-        now = pygame.time.get_ticks()
+        now = self.clock.now()
 
         if now - self.last_gravity_time >= self.gravity_delay:
 
@@ -111,127 +149,178 @@ class BitLogicTetromino:
 
 
     def check_collision(self, coordinates: List[Tuple[int, int]], dx: int = 0, dy: int = 0) -> bool:
-        """ collision logic """
-        for x, y in coordinates:
-            new_x = x + dx
-            new_y = y + dy
+        """ collision logic, running into the floor or falling onto a block lands the piece """
+        if self.intact and coordinates is self._coordinates:
+            x, y = self.origin
+            hit = self.collides(self.orientation, x + dx, y + dy)
+        else:
+            hit = self._hit_cells(coordinates, dx, dy)
 
-            # * Check left edges and right edges
-            if new_x < 0 or new_x >= self.grid_logic.columns:
-                return True
-                          
-            # * Check bottom edge
-            if new_y >= self.grid_logic.rows:
-                self.landed = True
-                self.indicator = False
-                return True
-            
-            # * Check collision with other blocks (ignore current piece's own cells)
-            if self.grid_logic.cell_coordinates[new_y][new_x] != 0 and (new_x, new_y) not in self.coordinates:
-                if dy > 0:
-                    self.landed = True
-                    self.indicator = False
-                return True
-            
-        return False
+        if hit == "floor" or (hit == "block" and dy > 0):
+            self.land()
+
+        return hit is not None
+
+
+    def land(self) -> None:
+        """ Stops the piece, the grid gets one lock event per piece """
+        if not self.landed:
+            self.grid_logic.lock(self)
+
+        self.landed = True
+        self.indicator = False
     
 
     def see_collision(self, coordinates: List[Tuple[int, int]], dx: int = 0, dy: int = 0) -> bool:
         """ just collision logic without changing attributes """
+        if self.intact and coordinates is self._coordinates:
+            x, y = self.origin
+            return self.collides(self.orientation, x + dx, y + dy) is not None
+        return self._hit_cells(coordinates, dx, dy) is not None
+
+
+    def collides(self, orientation, x: int, y: int) -> str | None:
+        """ What the piece turned to `orientation` with its corner at x, y runs into, "wall", "floor", "block" or None """
+        grid = self.grid_logic
+
+        if x < 0 or x + orientation.width > grid.columns:
+            return "wall"
+        
+        if y + orientation.height > grid.rows:
+            return "floor"
+        
+        # * the grid only holds locked cells, a few row ANDs cover the whole piece
+        cells = grid.cells
+        for row in orientation.row_masks:
+            if y >= 0 and cells[y] & (row << x):
+                return "block"
+            y += 1
+        
+        return None
+
+
+    def _hit_cells(self, coordinates: List[Tuple[int, int]], dx: int, dy: int) -> str | None:
+        """ collides cell by cell, for coordinates that are not the whole table piece where it is """
+        cells, columns, rows = self.grid_logic.cells, self.grid_logic.columns, self.grid_logic.rows
+
         for x, y in coordinates:
             new_x = x + dx
             new_y = y + dy
 
             # * Check left edges and right edges
-            if new_x < 0 or new_x >= self.grid_logic.columns:
-                return True
+            if new_x < 0 or new_x >= columns:
+                return "wall"
                           
             # * Check bottom edge
-            if new_y >= self.grid_logic.rows:
-                return True
+            if new_y >= rows:
+                return "floor"
             
-            # * Check collision with other blocks (ignore current piece's own cells)
-            if self.grid_logic.cell_coordinates[new_y][new_x] != 0 and (new_x, new_y) not in self.coordinates:
-                return True
+            # * Check collision with other blocks, rows above the grid are empty
+            if new_y >= 0 and cells[new_y] >> new_x & 1:
+                return "block"
             
-        return False
+        return None
     
 
     def rotate(self, direction: Literal["clock_wise", "counter_clock_wise"] = "clock_wise") -> None:
         """ Rotates tetromino counter or in clockwise turn """
-        if not self.coordinates:
+        if not self.coordinates or not self.intact:
             return
         
         # * find's pivot or center point
         px, py = self._get_block_pivot()
 
-        new_coords = []
+        current = self.orientation
+        rotations = PIECE_GEOMETRY[self.piece_shape]
 
-        for x, y in self.coordinates:
-            dx = x - px
-            dy = y - py
-        
-            if direction == "clock_wise":
-                new_x = px + dy
-                new_y = py - dx
-            
-            if direction == "counter_clock_wise":
-                new_x = px - dy
-                new_y = py + dx
+        # * turning every cell around the pivot lands the next table rotation at a known corner
+        if direction == "clock_wise":
+            target = rotations[(current.rotation - 1) % 4]
+            corner_x = px - py + self.min_y
+            corner_y = py + px - self.max_x
         
-            new_coords.append((new_x, new_y))
+        if direction == "counter_clock_wise":
+            target = rotations[(current.rotation + 1) % 4]
+            corner_x = px + py - self.max_y
+            corner_y = py - px + self.min_x
+
+        new_coords = [(x + corner_x, y + corner_y) for x, y in target.cells]
 
         if not self.check_collision(new_coords):
-            self.change_coordinates(new_coords)
+            self.change_coordinates(new_coords, orientation = target)
 
     
     def hard_drop(self) -> None:
         """ Rapid drop of the tetromino, kinda like slamdunk in tetris 🔥 """
-        while not self.check_collision(self.coordinates, dy = 1):
-            self.change_coordinates([(x, y + 1) for x, y in self.coordinates])
+        if self.landed:
+            return
+
+        distance = self.drop_distance()
+        if distance:
+            self.coordinates = [(x, y + distance) for x, y in self.coordinates]
         
-        self.landed = True
-        self.indicator = False
+        self.land()
+
+
+    def drop_distance(self) -> int:
+        """ Rows the piece can still fall """
+        distance = 0
+
+        # * a line clear can take every cell, nothing is left to fall
+        if not self.coordinates:
+            return distance
+
+        if self.intact:
+            x, y = self.origin
+            tops = self.grid_logic.tops
+
+            # * straight onto the skyline under the piece's bottom profile, unless it sits under an overhang
+            distance = min(tops[x + dx] - 1 - low for dx, low in enumerate(self.orientation.bottom)) - y
+            if distance >= 0:
+                return distance
+
+            distance = 0
+            while self.collides(self.orientation, x, y + distance + 1) is None:
+                distance += 1
+            return distance
+
+        while not self.see_collision(self.coordinates, dy = distance + 1):
+            distance += 1
+        return distance
 
 
     def remove_rows(self, rows: set[int]) -> None:
-            """ Removes specific rows in a tetrominoes coordinates """
-            self.coordinates = [(x, y) for (x, y) in self.coordinates if y not in rows]
+            """ Removes specific rows in a tetrominoes coordinates, the line cleaner moves the grid cells """
+            remaining = [(x, y) for (x, y) in self.coordinates if y not in rows]
 
-            for y in rows:
-                for x in range(self.grid_logic.columns):
-                    self.grid_logic.cell_coordinates[y][x] = 0
+            if len(remaining) != len(self.coordinates):
+                self.intact = False
+
+            self.coordinates = remaining
 
     
     def shift_down(self, rows: set[int]) -> None:
-        """ Shifts down block """        
+        """ Shifts down block, the line cleaner moves the grid cells """        
         new_coords = []
 
         for (x, y) in self.coordinates:
             shift = sum(1 for row in rows if row >= y)
             new_coords.append((x, y + shift))
 
-        for x, y in self.coordinates:
-            self.grid_logic.cell_coordinates[y][x] = 0
-
         self.coordinates = new_coords
 
-        for x, y in self.coordinates:
-            self.grid_logic.cell_coordinates[y][x] = 1
-
 
     def get_ghost_coords(self) -> list[tuple[int, int]]:
         """ Tetromino indicator """
         if not self.indicator:
             return 
         
-        ghost_coords = self.coordinates.copy()
-        while True:
-            test_coords = [(x, y + 1) for (x, y) in ghost_coords]
-            if self.see_collision(test_coords):
-                break
-            ghost_coords = test_coords
-        return ghost_coords
+        # * every move, turn or clear hands the piece a new coordinates list, every board write a new hash
+        coordinates, board = self._coordinates, self.grid_logic.state_hash
+        if self.ghost is None or self.ghost[0] is not coordinates or self.ghost[1] != board:
+            distance = self.drop_distance()
+            self.ghost = (coordinates, board, [(x, y + distance) for (x, y) in coordinates])
+        return self.ghost[2]
 
 
     def __debug(self, piece_name: str, string: str) -> None:
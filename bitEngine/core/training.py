@@ -0,0 +1,47 @@
+# training.py
+import os
+from concurrent.futures import ProcessPoolExecutor
+from functools import reduce
+from itertools import repeat
+
+from .ngram_model import ColumnCounts, ColumnNGramModel
+from ..utils import BitPatternFileManager, BitPatternRecords
+
+
+def shard_bounds(count, shards):
+    """(start, stop) of `shards` contiguous, near-equal runs covering records 0 .. count."""
+    shards = max(1, min(shards, count))
+    return [(count * i // shards, count * (i + 1) // shards) for i in range(shards)]
+
+
+def count_shard(store_file, start, stop):
+    """ColumnCounts of stored records start .. stop, each worker maps the store on its own."""
+    records = BitPatternRecords(BitPatternFileManager(store_file).open_columns())
+    return ColumnCounts.from_columns(records.slice_columns(start, stop), start)
+
+
+def train_column_model(store_file="data/training_data/pattern.bin", workers=None, shards=None):
+    """Offline rebuild of the (prev_piece, cur_piece) -> Counter(col) model from the binary store.
+
+    The store is split into shards counted in a process pool, the partial counts are merged
+    in corpus order. Same counts, tie order and last_piece as ColumnNGramModel.rebuild over
+    the stored entries. Journaled landings are not in the store, compact before training.
+    """
+    store = BitPatternFileManager(store_file)
+    columns = store.open_columns()
+    if not store.verify(columns):
+        raise ValueError(f"{store_file} is truncated or corrupted, checksum mismatch.")
+
+    workers = workers or os.cpu_count() or 1
+    bounds = shard_bounds(columns["count"], shards or 4 * workers)
+    starts, stops = [start for start, _ in bounds], [stop for _, stop in bounds]
+
+    if workers == 1:
+        partials = list(map(count_shard, repeat(store_file), starts, stops))
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            partials = list(pool.map(count_shard, repeat(store_file), starts, stops))
+
+    model = ColumnNGramModel()
+    reduce(ColumnCounts.merge, partials, ColumnCounts.empty()).apply(model)
+    return model
@@ -3,6 +3,7 @@ Basically the heart of the engine
 """
 
 import sys
+import random
 import pygame
 
 from .ui import *
@@ -13,6 +14,7 @@ from typing import Callable, List
 
 from .interface import BitInterfaceMaker
 from .tetris_maker import BitTetrisMaker
+from .core.simulation import FixedStepScheduler
 
 class BruhTheresNoWindows(Exception):
     """ Raised when the window object is missing. """
@@ -101,7 +103,7 @@ class BitPageManager:
 
 class Bit:
     """ The Bit's mighty Assembler """
-    def __init__(self):
+    def __init__(self, seed: int = None, clock = None, step_ms: float = 1000 / 120, fps: int = 120):
         self.window = None
 
         self.__running = False
@@ -111,6 +113,14 @@ class Bit:
 
         self.game_objects = []
 
+        # * game logic runs in fixed steps of simulated time on its own random stream, the same seed and inputs play out the same
+        self.scheduler = FixedStepScheduler(step_ms, clock)
+        self.rng = random.Random(seed)
+        self.pending_events = []
+
+        # * frames drawn per second, independent from the simulation steps
+        self.fps = fps
+
         # * BIT PAGE MANAGING ENGINE
         self.__page_manager = BitPageManager(self)
 
@@ -173,11 +183,24 @@ class Bit:
         return object
     
 
+    def remove_object(self, object: object) -> None:
+        """ Takes the object out of the gameloop, a frame already running still finishes with it """
+        self.game_objects = [game_object for game_object in self.game_objects if game_object is not object]
+
+
     def clear_objects(self) -> None:
         """ Clears the entire game objects """
+        self.close_objects()
         self.game_objects = []
 
 
+    def close_objects(self) -> None:
+        """ Lets game objects release what they hold, like pattern journals """
+        for game_object in self.game_objects:
+            if hasattr(game_object, "close"):
+                game_object.close()
+
+
     def get_objects(self, name: str = None) -> List[object]:
         """ Returns objects you want to get """
         if name is None:
@@ -185,6 +208,20 @@ class Bit:
         return [obj for obj in self.game_objects if obj.__class__.__name__ == name]
 
 
+    def simulate(self, events: List = ()) -> None:
+        """ Runs one fixed step of game logic, headless runs and tests can call it directly """
+        self.scheduler.step()
+
+        for game_object in self.game_objects:
+            # * For logic updates objects
+            if hasattr(game_object, "update"):
+                game_object.update()
+
+            # * For logic controller game_objects
+            if hasattr(game_object, "control"):
+                game_object.control(events)
+
+
     @require_window
     def _gameloop(self) -> None:
         """ Performs the whole gameloop of the game """
@@ -209,18 +246,19 @@ class Bit:
             
             # * UPDATES ONLY WHEN NOT PAUSED 🤓☝️
             if not self.paused:
+                # * key presses wait for the next step, a frame that owes no step keeps them
+                self.pending_events.extend(self.events)
+
+                for _ in range(self.scheduler.due()):
+                    self.simulate(self.pending_events)
+                    self.pending_events = []
+
                 for game_object in self.game_objects:
-                    # * For logic updates objects
-                    if hasattr(game_object, "update"):
-                        game_object.update()
-
-                    # * For logic controller game_objects
-                    if hasattr(game_object, "control"):
-                        game_object.control(self.events)
-                        
                     # * For interface renderings game_objects
                     if hasattr(game_object, "render"):
                         game_object.render(target_surface)
+            else:
+                self.scheduler.hold()
                      
 
             # * FOR THE PAGE MANAGER
@@ -240,7 +278,7 @@ class Bit:
             
             pygame.display.flip()
             # * Frame per Seconds
-            clock.tick(120)
+            clock.tick(self.fps)
 
     
     def play(self) -> None:
@@ -248,11 +286,13 @@ class Bit:
         self.window = self.__ui_maker.create_window()
         self.window.render()
         self._gameloop()
+        self.close_objects()
 
     
     def exit(self) -> None:
         """ exit bit engine windows """
         self.__running = False
+        self.close_objects()
         print("Goodbye and Thanks!, much love from BitEngine <3")
         pygame.quit()
         sys.exit()
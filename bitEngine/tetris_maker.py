@@ -23,7 +23,7 @@ class BitTetrisMaker:
         if background_color is None:
             background_color = self.window.background_color
             
-        piece_view_logic: BitLogicNextPiece = BitLogicNextPiece(max_piece_queue)
+        piece_view_logic: BitLogicNextPiece = BitLogicNextPiece(max_piece_queue, self.__engine.rng)
         piece_view_interface: BitInterfaceNextPieceView = BitInterfaceNextPieceView(piece_view_logic, width, height, cell_size, position_x, position_y, border_color, border_thickness, num_piece_display, background_color)
 
         self.__engine.add_object(piece_view_logic)
@@ -39,7 +39,7 @@ class BitTetrisMaker:
         """ Creates a tetris board or grid """
 
         grid_logic: BitLogicGrid = self.__engine.add_object(BitLogicGrid(self.window, rows, columns))
-        grid_spawner: BitLogicTetrominoGridSpawner = self.__engine.add_object(BitLogicTetrominoGridSpawner(self.__engine, grid_logic, piece_view["piece_view_logic"], self.tick_speed)) 
+        grid_spawner: BitLogicTetrominoGridSpawner = self.__engine.add_object(BitLogicTetrominoGridSpawner(self.__engine, grid_logic, piece_view["piece_view_logic"], self.tick_speed, clock = self.__engine.scheduler, rng = self.__engine.rng)) 
 
         line_cleaner: BitLogicLineCleaner = self.__engine.add_object(BitLogicLineCleaner(self.__engine, grid_logic, grid_logic.rows))
 
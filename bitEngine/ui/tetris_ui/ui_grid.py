@@ -3,7 +3,7 @@ from typing import Set, Any
 
 class BitInterfaceGrid:
     """ Renders a grid or tetris board interface """
-    def __init__(self, grid_logic, cell_size: int = 30, display_grid: bool = False, border_color: Set[int] = (100, 100, 100), border_width: int = 1, position_x: int = 0, position_y: int = 0) -> None:
+    def __init__(self, grid_logic, cell_size: int = 30, display_grid: bool = False, border_color: Set[int] = (100, 100, 100), border_width: int = 1, position_x: int = 0, position_y: int = 0, locked_border_color: Set[int] = (0, 0, 0)) -> None:
         """ Tetris board """
         # * internal logics
         self.grid_logic = grid_logic
@@ -14,6 +14,9 @@ class BitInterfaceGrid:
         self.border_color = border_color
         self.border_width = border_width
 
+        # * outline of the cells locked pieces left in the grid
+        self.locked_border_color = locked_border_color
+
         self.cell_coordinates = []
 
         self.position_x = position_x
@@ -48,6 +51,9 @@ class BitInterfaceGrid:
 
         self._get_cell_coordinates()
 
+        # * locked pieces first, the board lines go on top of them
+        self.draw_locked_cells(screen)
+
         # * For board row
         for row in range(self.grid_logic.rows + 1):
             if row in [0, self.grid_logic.rows] and not self.display_grid:
@@ -69,6 +75,25 @@ class BitInterfaceGrid:
                     screen, self.offset_x, self.offset_y, column, self.board_height, self.border_color)
                 
 
+    def draw_locked_cells(self, screen: pygame.Surface) -> None:
+        """ Draws every cell the locked pieces left in the grid, in the color of its piece """
+        for y, row in enumerate(self.grid_logic.locked_colors):
+            for x, color in enumerate(row):
+                if color is None:
+                    continue
+
+                rect = pygame.Rect(
+                    self.offset_x + x * self.cell_size,
+                    self.offset_y + y * self.cell_size,
+                    self.cell_size,
+                    self.cell_size
+                )
+                pygame.draw.rect(screen, color, rect)
+
+                if self.locked_border_color:
+                    pygame.draw.rect(screen, self.locked_border_color, rect, width = 1)
+
+
     def draw_vertical_line(self, screen: pygame.Surface, offset_x: float, offset_y: float, row: int, board_width: int, color: Set[int] = (100, 100, 100), width: int = 1) -> None:
         """ Draws a perfect line base within its coordinate """
         pygame.draw.line(
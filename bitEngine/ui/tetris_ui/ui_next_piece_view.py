@@ -1,5 +1,7 @@
 import pygame
 
+from bitEngine.core.geometry import PIECE_GEOMETRY
+
 class BitInterfaceNextPieceView:
     def __init__(self, next_piece_logic, width: int, height: int , cell_size: int = 30, position_x: int = 0, position_y: int = 0, border_color: str = "blue", border_thickness: int = 1,  num_piece_display: int = 1, background_color: str | set = None):
         self.next_piece_logic = next_piece_logic
@@ -53,18 +55,16 @@ class BitInterfaceNextPieceView:
         vertical_space = self.height // n
 
         for i, piece_key in enumerate(next_pieces):
-            piece_coords = self.next_piece_logic.piece[piece_key]
+            geometry = PIECE_GEOMETRY[piece_key][0]
+            piece_coords = geometry.cells
             color = getattr(self.next_piece_logic, 'color', (255, 255, 255))
             border_color = (0, 0, 0)
 
-            # Bounding box of the piece
-            xs = [x for x, _ in piece_coords]
-            ys = [y for _, y in piece_coords]
-            min_x, max_x = min(xs), max(xs)
-            min_y, max_y = min(ys), max(ys)
+            # Bounding box of the piece, table cells already start at the top left corner
+            min_x = min_y = 0
 
-            piece_width = max_x - min_x + 1
-            piece_height = max_y - min_y + 1
+            piece_width = geometry.width
+            piece_height = geometry.height
 
             # Center offsets
             offset_x = (self.width - piece_width * self.cell_size) // 2
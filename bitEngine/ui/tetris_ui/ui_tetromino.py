@@ -34,13 +34,10 @@ class BitInterfaceTetromino:
         if not coordinates:
             return
         
-        xs = [x for x, _ in coordinates]
-        ys = [y for _, y in coordinates]
-        min_x, max_x = min(xs), max(xs)
-        min_y, max_y = min(ys), max(ys)
+        min_x, min_y, columns, rows = self.tetromino_logic.bounding_box(coordinates)
 
-        width = (max_x - min_x + 1) * self.cell_size
-        height = (max_y - min_y + 1) * self.cell_size
+        width = columns * self.cell_size
+        height = rows * self.cell_size
 
         temp_surface = pygame.Surface((width, height), pygame.SRCALPHA)
         
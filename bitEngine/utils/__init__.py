@@ -1,7 +1,12 @@
 from .file import BitFileManager
 from .pickle_file import BitPickleFileManager
+from .journal_file import BitJournalFileManager
+from .pattern_file import BitPatternFileManager, BitPatternRecords
 
 __all__ = [
     "BitFileManager",
-    "BitPickleFileManager"
-]
\ No newline at end of file
+    "BitPickleFileManager",
+    "BitJournalFileManager",
+    "BitPatternFileManager",
+    "BitPatternRecords"
+]
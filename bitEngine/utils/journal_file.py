@@ -0,0 +1,117 @@
+import os
+import json
+import threading
+
+from typing import Any, Dict, Iterator, List, Literal
+
+
+class BitJournalFileManager:
+    """ Append-only journal, one json record per line """
+    def __init__(self, file_name: str, fsync_policy: Literal["always", "interval", "never"] = "interval", fsync_interval: int = 32) -> None:
+        if fsync_policy not in ("always", "interval", "never"):
+            raise ValueError(f"Unknown fsync policy '{fsync_policy}', use 'always', 'interval' or 'never'.")
+
+        self.file_name = file_name
+
+        self.fsync_policy = fsync_policy
+        self.fsync_interval = max(1, fsync_interval)
+
+        # * records written on the live journal since it was opened or rotated
+        self.num_records = 0
+        self.__unsynced = 0
+
+        self.__lock = threading.Lock()
+
+        directory = os.path.dirname(file_name)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self.__file = open(self.file_name, "a", encoding="utf-8")
+
+
+    def append(self, record: Dict[str, Any]) -> None:
+        """ Appends one record, cost does not depend on the journal size """
+        line = json.dumps(record, separators=(",", ":")) + "\n"
+
+        with self.__lock:
+            self.__file.write(line)
+            self.__file.flush()
+
+            self.num_records += 1
+            self.__unsynced += 1
+
+            if self.fsync_policy == "always" or (self.fsync_policy == "interval" and self.__unsynced >= self.fsync_interval):
+                os.fsync(self.__file.fileno())
+                self.__unsynced = 0
+
+
+    def rotate(self) -> List[str]:
+        """ Moves the live journal aside and opens a fresh one, returns every rotated journal waiting for compaction """
+        with self.__lock:
+            self.__file.flush()
+            os.fsync(self.__file.fileno())
+            self.__file.close()
+
+            if os.path.getsize(self.file_name) > 0:
+                rotated = self.pending_files()
+                suffix = int(rotated[-1].rsplit(".", 1)[-1]) + 1 if rotated else 1
+                os.replace(self.file_name, f"{self.file_name}.{suffix}")
+
+            self.__file = open(self.file_name, "a", encoding="utf-8")
+            self.num_records = 0
+            self.__unsynced = 0
+
+            return self.pending_files()
+
+
+    def pending_files(self) -> List[str]:
+        """ Rotated journals that are not folded into the snapshot yet, oldest first """
+        directory = os.path.dirname(self.file_name) or "."
+        prefix = os.path.basename(self.file_name) + "."
+
+        rotated = [name for name in os.listdir(directory) if name.startswith(prefix) and name[len(prefix):].isdigit()]
+        rotated.sort(key=lambda name: int(name[len(prefix):]))
+
+        return [os.path.join(directory, name) for name in rotated]
+
+
+    def replay(self) -> Iterator[Dict[str, Any]]:
+        """ Yields every journaled record, rotated journals first then the live one """
+        for file_name in self.pending_files() + [self.file_name]:
+            if not os.path.exists(file_name):
+                continue
+
+            with open(file_name, "r", encoding="utf-8") as file:
+                for line in file:
+                    line = line.strip()
+                    if not line:
+                        continue
+
+                    try:
+                        yield json.loads(line)
+                    except json.JSONDecodeError:
+                        # * torn tail from a crash mid-append, everything before it is intact
+                        break
+
+
+    def discard(self, file_names: List[str]) -> None:
+        """ Deletes rotated journals once their records are safe inside the snapshot """
+        for file_name in file_names:
+            if os.path.exists(file_name):
+                os.remove(file_name)
+
+
+    def close(self) -> None:
+        """ Flushes and closes the live journal """
+        with self.__lock:
+            if self.__file.closed:
+                return
+
+            self.__file.flush()
+            if self.fsync_policy != "never":
+                os.fsync(self.__file.fileno())
+            self.__file.close()
+
+
+if __name__ == "__main__":
+      pass
@@ -0,0 +1,504 @@
+import gc
+import os
+import mmap
+import zlib
+import struct
+
+import numpy as np
+
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterator, List, Tuple
+
+
+class BitPatternFileManager:
+    """ Columnar binary pattern store, one bulk read instead of a json / pickle list of dicts
+
+    Layout, little endian:
+        header   magic, version, flags, record count, payload size, crc32 of the payload
+        payload  one column per field, every column starts on an 8 byte boundary
+
+    Columns, N records, C coordinate cells, Q queued pieces, S surface digits:
+        piece u1[N] (ascii letter), rotation u1[N], lines_cleared u1[N], cells u1[N],
+        queue_length u1[N], surface_length u1[N] (255 = no surface), reason u1[N],
+        timestamp i8[N] (microseconds since 1970-01-01, naive), coordinates i2[C, 2],
+        queue u1[Q] (ascii letters), surface u1[S] (ascii digits), reasons (u2 count, then u2 length + utf-8 each)
+
+    encode raises ValueError for a record that does not fit these columns, like a surface of 255 digits.
+    """
+
+    MAGIC = b"BITPAT\x00\x01"
+    VERSION = 1
+    HEADER = struct.Struct("<8sHHQQI")
+
+    RECORD_COLUMNS = (
+        ("piece", np.uint8), ("rotation", np.uint8), ("lines_cleared", np.uint8), ("cells", np.uint8),
+        ("queue_length", np.uint8), ("surface_length", np.uint8), ("reason", np.uint8), ("timestamp", np.int64)
+    )
+    RAGGED_COLUMNS = (("coordinates", np.int16), ("queue", np.uint8), ("surface", np.uint8))
+
+    NO_SURFACE = 255
+    NO_TIMESTAMP = np.iinfo(np.int64).min
+
+    EPOCH = datetime(1970, 1, 1)
+
+    # * windows cannot replace a file that is still mapped, it gets one bulk read there instead
+    MAP_FILES = os.name != "nt"
+
+    def __init__(self, file_name: str) -> None:
+        self.file_name = file_name
+
+        directory = os.path.dirname(file_name)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+
+    def exists(self) -> bool:
+        return os.path.exists(self.file_name)
+
+
+    # * ---------- Writing ----------
+    def save(self, patterns) -> int:
+        """ Writes a list of pattern dicts or a BitPatternRecords atomically, returns the file size in bytes """
+        parts = patterns.column_parts() if isinstance(patterns, BitPatternRecords) else [self.encode(patterns)]
+        count = sum(part["count"] for part in parts)
+        reasons = parts[0]["reasons"]
+
+        reason_table = struct.pack("<H", len(reasons))
+        for reason in reasons:
+            encoded = reason.encode("utf-8")
+            reason_table += struct.pack("<H", len(encoded)) + encoded
+
+        # * every column is written straight from its parts with the crc carried across them, the payload is
+        # * never joined in memory and a compaction thread saving it leaves the GIL free while it writes
+        size = checksum = 0
+        with open(self.file_name + ".tmp", "wb") as file:
+            def put(data) -> None:
+                nonlocal size, checksum
+                file.write(data)
+                checksum = zlib.crc32(data, checksum)
+                size += len(data)
+
+            file.write(self.HEADER.pack(self.MAGIC, self.VERSION, 0, count, 0, 0))
+            for name, dtype in self.RECORD_COLUMNS + self.RAGGED_COLUMNS:
+                written = 0
+                for part in parts:
+                    block = np.ascontiguousarray(part[name], dtype=dtype).view(np.uint8).reshape(-1)
+                    put(block)
+                    written += block.nbytes
+                put(b"\x00" * (self.__padded(written) - written))
+            put(reason_table)
+
+            file.seek(0)
+            file.write(self.HEADER.pack(self.MAGIC, self.VERSION, 0, count, size, checksum))
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(self.file_name + ".tmp", self.file_name)
+
+        return self.HEADER.size + size
+
+
+    @classmethod
+    def encode(cls, patterns: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """ Pattern dicts -> columns, shaped like the ones read_columns returns """
+        reasons: Dict[str, int] = {}
+
+        cells, queues, surfaces = [], [], []
+        cell_counts, queue_lengths, surface_lengths = [], [], []
+        pieces, rotations, lines, reason_codes, timestamps = [], [], [], [], []
+
+        for entry in patterns:
+            pieces.append(ord(entry["piece"]))
+            rotations.append(int(entry.get("rotation", 0)))
+            lines.append(int(entry.get("lines_cleared", 0)))
+
+            coordinates = entry.get("landed_coordinates") or []
+            cell_counts.append(len(coordinates))
+            for x, y in coordinates:
+                cells.append((x, y))
+
+            queue = "".join(entry.get("next_pieces_queue") or [])
+            queue_lengths.append(len(queue))
+            queues.append(queue)
+
+            surface = entry.get("surface")
+            surface_lengths.append(cls.NO_SURFACE if surface is None else len(surface))
+            surfaces.append(surface or "")
+
+            reason = entry.get("reason") or ""
+            reason_codes.append(reasons.setdefault(reason, len(reasons)))
+
+            timestamp = entry.get("timestamp")
+            timestamps.append(cls.NO_TIMESTAMP if not timestamp else (datetime.fromisoformat(timestamp) - cls.EPOCH) // timedelta(microseconds=1))
+
+        # * one byte per field, a value past it would wrap into another one and 255 marks a missing surface
+        cls.__check_range("piece", pieces, 255)
+        cls.__check_range("rotation", rotations, 255)
+        cls.__check_range("lines_cleared", lines, 255)
+        cls.__check_range("landed_coordinates length", cell_counts, 255)
+        cls.__check_range("next_pieces_queue length", queue_lengths, 255)
+        cls.__check_range("surface length", list(map(len, surfaces)), cls.NO_SURFACE - 1)
+        cls.__check_range("reason code", reason_codes, 255)
+        coordinates = np.array(cells, dtype=np.int64).reshape(-1, 2)
+        cls.__check_range("landed_coordinates", [coordinates.min(), coordinates.max()] if coordinates.size else [], 32767, -32768)
+
+        return {
+            "count": len(pieces),
+            "piece": np.array(pieces, dtype=np.uint8),
+            "rotation": np.array(rotations, dtype=np.uint8),
+            "lines_cleared": np.array(lines, dtype=np.uint8),
+            "cells": np.array(cell_counts, dtype=np.uint8),
+            "queue_length": np.array(queue_lengths, dtype=np.uint8),
+            "surface_length": np.array(surface_lengths, dtype=np.uint8),
+            "reason": np.array(reason_codes, dtype=np.uint8),
+            "timestamp": np.array(timestamps, dtype=np.int64),
+            "coordinates": coordinates.astype(np.int16),
+            "queue": np.frombuffer("".join(queues).encode("ascii"), dtype=np.uint8),
+            "surface": np.frombuffer("".join(surfaces).encode("ascii"), dtype=np.uint8),
+            "reasons": list(reasons)
+        }
+
+
+    @staticmethod
+    def __check_range(name: str, values: List[int], highest: int, lowest: int = 0) -> None:
+        if values and (max(values) > highest or min(values) < lowest):
+            raise ValueError(f"{name} out of range for a pattern file, {min(values)} to {max(values)} does not fit {lowest} to {highest}.")
+
+
+    @classmethod
+    def join(cls, first: Dict[str, Any], second: Dict[str, Any]) -> Dict[str, Any]:
+        """ Columns of `first` followed by those of `second`, both reason tables merged into one """
+        first, second = cls.share_reasons(first, second)
+
+        joined = {"count": first["count"] + second["count"], "reasons": first["reasons"]}
+        for name, _ in cls.RECORD_COLUMNS + cls.RAGGED_COLUMNS:
+            joined[name] = np.concatenate([first[name], second[name]])
+        return joined
+
+
+    @staticmethod
+    def share_reasons(first: Dict[str, Any], second: Dict[str, Any]) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+        """ Both column sets on one merged reason table, only the codes of `second` are rewritten """
+        reasons = list(first["reasons"])
+        remap = []
+        for reason in second["reasons"]:
+            if reason not in reasons:
+                reasons.append(reason)
+            remap.append(reasons.index(reason))
+
+        if len(reasons) > 256:
+            raise ValueError(f"{len(reasons)} distinct reasons, a pattern file holds at most 256.")
+
+        second = dict(second, reasons=reasons)
+        if second["count"]:
+            second["reason"] = np.array(remap, dtype=np.uint8)[second["reason"]]
+        return dict(first, reasons=reasons), second
+
+
+    # * ---------- Reading ----------
+    def read_columns(self) -> Dict[str, Any]:
+        """ One bulk read, checks the header and checksum, returns every column as a numpy array """
+        with open(self.file_name, "rb") as file:
+            data = file.read()
+        return self.decode_columns(data)
+
+
+    def open_columns(self) -> Dict[str, Any]:
+        """ Maps the store read-only, pages are only read in as columns are touched
+
+        Opening reads the header and the three length columns, the checksum is left to verify().
+        """
+        with open(self.file_name, "rb") as file:
+            if not self.MAP_FILES or os.fstat(file.fileno()).st_size == 0:
+                return self.decode_columns(file.read(), verify=False)
+            data = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        return self.decode_columns(data, verify=False)
+
+
+    @staticmethod
+    def verify(columns: Dict[str, Any]) -> bool:
+        """ Checks opened columns against the checksum in their header """
+        return zlib.crc32(columns["payload"]) == columns["checksum"]
+
+
+    def decode_columns(self, data, verify: bool = True) -> Dict[str, Any]:
+        """ Columns of an in-memory (bytes, mmap) pattern file, arrays are views into `data` """
+        if len(data) < self.HEADER.size:
+            raise ValueError(f"{self.file_name} is too short to be a pattern file.")
+
+        magic, version, _, count, size, checksum = self.HEADER.unpack_from(data, 0)
+        if magic != self.MAGIC:
+            raise ValueError(f"{self.file_name} is not a pattern file.")
+        if version != self.VERSION:
+            raise ValueError(f"{self.file_name} has version {version}, expected {self.VERSION}.")
+
+        payload = memoryview(data)[self.HEADER.size:self.HEADER.size + size]
+        if len(payload) != size or (verify and zlib.crc32(payload) != checksum):
+            raise ValueError(f"{self.file_name} is truncated or corrupted, checksum mismatch.")
+
+        # * the payload view keeps a mapping open for as long as the columns live
+        columns: Dict[str, Any] = {"count": count, "payload": payload, "checksum": checksum}
+        offset = 0
+
+        def take(name: str, dtype, length: int) -> np.ndarray:
+            nonlocal offset
+            column = np.frombuffer(payload, dtype=dtype, count=length, offset=offset)
+            offset += self.__padded(column.nbytes)
+            columns[name] = column
+            return column
+
+        for name, dtype in self.RECORD_COLUMNS:
+            take(name, dtype, count)
+
+        surface_lengths = columns["surface_length"]
+        columns["coordinates"] = take("coordinates", np.int16, 2 * int(columns["cells"].sum(dtype=np.int64))).reshape(-1, 2)
+        take("queue", np.uint8, int(columns["queue_length"].sum(dtype=np.int64)))
+        take("surface", np.uint8, int(surface_lengths[surface_lengths != self.NO_SURFACE].sum(dtype=np.int64)))
+
+        reasons = []
+        (num_reasons,) = struct.unpack_from("<H", payload, offset)
+        offset += 2
+        for _ in range(num_reasons):
+            (length,) = struct.unpack_from("<H", payload, offset)
+            reasons.append(bytes(payload[offset + 2:offset + 2 + length]).decode("utf-8"))
+            offset += 2 + length
+        columns["reasons"] = reasons
+
+        return columns
+
+
+    def load(self) -> List[Dict[str, Any]]:
+        """ Every pattern as the same dicts write_pattern produces """
+        return self.to_patterns(self.read_columns())
+
+
+    @classmethod
+    def to_patterns(cls, columns: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """ Columns -> pattern dicts, list building is done in bulk per column """
+        if not columns["count"]:
+            return []
+
+        # * millions of fresh containers would set off the cyclic gc over and over, none of them can form a cycle
+        collecting = gc.isenabled()
+        gc.disable()
+        try:
+            return cls.__build_patterns(columns)
+        finally:
+            if collecting:
+                gc.enable()
+
+
+    @classmethod
+    def __build_patterns(cls, columns: Dict[str, Any]) -> List[Dict[str, Any]]:
+        pieces = columns["piece"].tobytes().decode("ascii")
+        rotations = columns["rotation"].tolist()
+        lines = columns["lines_cleared"].tolist()
+        reasons = [columns["reasons"][code] for code in columns["reason"].tolist()]
+
+        cells = columns["coordinates"].reshape(-1, 2)
+        coordinates = list(zip(cells[:, 0].tolist(), cells[:, 1].tolist()))
+        cell_ends = np.cumsum(columns["cells"], dtype=np.int64).tolist()
+
+        queue = columns["queue"].tobytes().decode("ascii")
+        queue_ends = np.cumsum(columns["queue_length"], dtype=np.int64).tolist()
+
+        surface = columns["surface"].tobytes().decode("ascii")
+        surface_lengths = columns["surface_length"]
+        surface_ends = np.cumsum(np.where(surface_lengths == cls.NO_SURFACE, 0, surface_lengths), dtype=np.int64).tolist()
+        missing_surface = (surface_lengths == cls.NO_SURFACE).tolist()
+
+        timestamps = cls.__timestamps(columns["timestamp"])
+
+        patterns = []
+        cell_start = queue_start = surface_start = 0
+        for i in range(columns["count"]):
+            patterns.append({
+                "piece": pieces[i],
+                "landed_coordinates": coordinates[cell_start:cell_ends[i]],
+                "rotation": rotations[i],
+                "lines_cleared": lines[i],
+                "next_pieces_queue": list(queue[queue_start:queue_ends[i]]),
+                "surface": None if missing_surface[i] else surface[surface_start:surface_ends[i]],
+                "timestamp": timestamps[i],
+                "reason": reasons[i]
+            })
+            cell_start, queue_start, surface_start = cell_ends[i], queue_ends[i], surface_ends[i]
+
+        return patterns
+
+
+    @classmethod
+    def __timestamps(cls, timestamps: np.ndarray) -> List[str | None]:
+        """ int64 microseconds -> datetime.isoformat() strings """
+        text = timestamps.astype("datetime64[us]").astype(str).tolist()
+
+        # * isoformat() leaves out whole-second microseconds, numpy always prints them
+        for i in np.nonzero(timestamps % 1_000_000 == 0)[0].tolist():
+            text[i] = text[i][:-7]
+        for i in np.nonzero(timestamps == cls.NO_TIMESTAMP)[0].tolist():
+            text[i] = None
+        return text
+
+
+    @staticmethod
+    def __padded(size: int) -> int:
+        return (size + 7) & ~7
+
+
+class BitPatternRecords:
+    """ Pattern corpus as stored columns plus the records appended since, a dict is only built when a record is read
+
+    Evicted records are skipped, not removed: `start` is the first live stored row and `evicted`
+    counts every record dropped so far, the next store rewrite leaves them out for good.
+    """
+    CHUNK = 4096
+
+    def __init__(self, columns: Dict[str, Any] = None, tail: List[Dict[str, Any]] = None, start: int = 0, evicted: int = 0) -> None:
+        self.base = columns if columns is not None else BitPatternFileManager.encode([])
+        self.tail = list(tail or [])
+
+        self.start = start
+        self.evicted = evicted
+
+
+    def __len__(self) -> int:
+        return self.base["count"] - self.start + len(self.tail)
+
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("pattern index out of range")
+
+        row = self.start + index
+        if row >= self.base["count"]:
+            return self.tail[row - self.base["count"]]
+        return BitPatternFileManager.to_patterns(self.slice_columns(row, row + 1))[0]
+
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        """ Live stored records a chunk at a time, then the appended ones """
+        count = self.base["count"]
+        for row in range(self.start, count, self.CHUNK):
+            yield from BitPatternFileManager.to_patterns(self.slice_columns(row, min(row + self.CHUNK, count)))
+        yield from list(self.tail)
+
+
+    def head(self, count: int) -> List[Dict[str, Any]]:
+        """ The oldest `count` live records as dicts, stored ones decoded in one go """
+        stop = min(self.start + count, self.base["count"])
+        stored = BitPatternFileManager.to_patterns(self.slice_columns(self.start, stop))
+        return stored + self.tail[:count - len(stored)]
+
+
+    def append(self, entry: Dict[str, Any]) -> None:
+        self.tail.append(entry)
+
+
+    def drop(self, count: int) -> None:
+        """ Evicts the oldest `count` live records """
+        count = min(count, len(self))
+        stored = min(count, self.base["count"] - self.start)
+
+        self.start += stored
+        del self.tail[:count - stored]
+        self.evicted += count
+
+
+    def expired(self, cutoff: datetime) -> int:
+        """ Number of oldest live records stamped before `cutoff`, records are kept in landing order """
+        stamps = self.base["timestamp"][self.start:]
+        stored = int(np.searchsorted(stamps, (cutoff - BitPatternFileManager.EPOCH) // timedelta(microseconds=1)))
+        if stored < len(stamps):
+            return stored
+
+        for i, entry in enumerate(self.tail):
+            if entry.get("timestamp") and datetime.fromisoformat(entry["timestamp"]) >= cutoff:
+                return stored + i
+        return stored + len(self.tail)
+
+
+    def snapshot(self) -> "BitPatternRecords":
+        """ Point-in-time copy, shares the stored columns and copies the appended records """
+        return BitPatternRecords(self.base, self.tail, self.start, self.evicted)
+
+
+    def columns(self) -> Dict[str, Any]:
+        """ Every live record as columns, the stored ones are never decoded """
+        live = self.slice_columns(self.start, self.base["count"]) if self.start else self.base
+        if not self.tail:
+            return live
+        return BitPatternFileManager.join(live, BitPatternFileManager.encode(self.tail))
+
+
+    def column_parts(self) -> List[Dict[str, Any]]:
+        """ columns() as the stored live rows and the appended records on one reason table, without joining them """
+        live = self.slice_columns(self.start, self.base["count"]) if self.start else self.base
+        if not self.tail:
+            return [live]
+        return list(BitPatternFileManager.share_reasons(live, BitPatternFileManager.encode(self.tail)))
+
+
+    def rebase(self, columns: Dict[str, Any], snapshot: "BitPatternRecords") -> "BitPatternRecords":
+        """ Same live records on top of a newer store holding every live record of `snapshot` """
+        saved = len(snapshot)
+        stored = self.base["count"] - self.start
+
+        # * records evicted since the snapshot are skipped in the new store, the tail keeps what came after it
+        start = min(self.evicted - snapshot.evicted, saved)
+        tail = self.tail[max(0, snapshot.evicted + saved - self.evicted - stored):]
+        return BitPatternRecords(columns, tail, start, self.evicted)
+
+
+    def checksum(self, count: int) -> int:
+        """ crc32 of the first `count` stored rows, column by column, names an exact store prefix """
+        columns = self.slice_columns(0, count)
+
+        checksum = 0
+        for name, dtype in BitPatternFileManager.RECORD_COLUMNS + BitPatternFileManager.RAGGED_COLUMNS:
+            checksum = zlib.crc32(np.ascontiguousarray(columns[name], dtype=dtype), checksum)
+        return checksum
+
+
+    def placements(self) -> Iterator[Tuple[str, List[Tuple[int, int]], int]]:
+        """ (piece, landed coordinates, rotation) of every live record, without building the dicts """
+        live = self.slice_columns(self.start, self.base["count"])
+        if live["count"]:
+            pieces = live["piece"].tobytes().decode("ascii")
+            cells = live["coordinates"]
+            coordinates = list(zip(cells[:, 0].tolist(), cells[:, 1].tolist()))
+            ends = np.cumsum(live["cells"], dtype=np.int64).tolist()
+
+            start = 0
+            for piece, rotation, end in zip(pieces, live["rotation"].tolist(), ends):
+                yield piece, coordinates[start:end], rotation
+                start = end
+
+        for entry in list(self.tail):
+            yield entry["piece"], entry["landed_coordinates"], entry["rotation"]
+
+
+    def slice_columns(self, start: int, stop: int) -> Dict[str, Any]:
+        """ Stored rows [start, stop) as columns, views into the store """
+        base = self.base
+        if "offsets" not in base:
+            # * kept on the columns themselves, so snapshots and rebased copies share them
+            surface_lengths = np.where(base["surface_length"] == BitPatternFileManager.NO_SURFACE, 0, base["surface_length"])
+            base["offsets"] = {
+                name: np.concatenate([[0], np.cumsum(lengths, dtype=np.int64)])
+                for name, lengths in (("coordinates", base["cells"]), ("queue", base["queue_length"]), ("surface", surface_lengths))
+            }
+
+        sliced = {"count": stop - start, "reasons": base["reasons"]}
+        for name, _ in BitPatternFileManager.RECORD_COLUMNS:
+            sliced[name] = base[name][start:stop]
+        for name, starts in base["offsets"].items():
+            sliced[name] = base[name][starts[start]:starts[stop]]
+        return sliced
+
+
+if __name__ == "__main__":
+      pass
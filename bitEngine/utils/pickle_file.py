@@ -1,16 +1,52 @@
+import os
 import pickle
 
+from typing import Any, Dict
+
 class BitPickleFileManager:
-    def __init__(self):
-        pass
+    """ Trained n-gram model snapshots, pickled with a format version, a corpus checksum and a high-water mark """
+    VERSION = 1
+
+    def __init__(self, file_name: str = "data/pickles/ngrams.pkl") -> None:
+        self.file_name = file_name
+
+        directory = os.path.dirname(file_name)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+
+    def save_processed_ngrams(self, models: Dict[str, Any], checksum: int, high_water_mark: int) -> None:
+        """ Atomically saves models trained on the first `high_water_mark` stored patterns, `checksum` identifies those patterns """
+        snapshot = {
+            "version": self.VERSION,
+            "checksum": checksum,
+            "high_water_mark": high_water_mark,
+            "models": models
+        }
+
+        with open(self.file_name + ".tmp", "wb") as file:
+            pickle.dump(snapshot, file, protocol = pickle.HIGHEST_PROTOCOL)
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(self.file_name + ".tmp", self.file_name)
+
+
+    def load_processed_ngrams(self) -> Dict[str, Any] | None:
+        """ The saved snapshot, None when it is missing, unreadable or written by another format version """
+        if not os.path.exists(self.file_name):
+            return None
 
-    def save_processed_ngrams(self) -> None:
-         pass
-    
+        try:
+            with open(self.file_name, "rb") as file:
+                snapshot = pickle.load(file)
+        except (OSError, EOFError, pickle.UnpicklingError, AttributeError, ImportError):
+            # * a snapshot is only a cache of the corpus, anything wrong with it means retraining
+            return None
 
-    def load_processed_ngrams(self) -> None:
-        pass
+        if not isinstance(snapshot, dict) or snapshot.get("version") != self.VERSION:
+            return None
+        return snapshot
 
 
 if __name__ == "__main__":
-      pass
\ No newline at end of file
+      pass
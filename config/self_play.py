@@ -0,0 +1,46 @@
+import os
+import sys
+import time
+import argparse
+
+from pathlib import Path
+
+# * Current solution
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+# * worker processes import pygame again, keep its banner out of the output
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+
+from bitEngine.core.self_play import PLAYERS, generate
+
+def self_play(args) -> int:
+    options = {"player": args.player, "explore": args.explore, "max_pieces": args.max_pieces}
+    if args.player != "random":
+        options["lookahead"] = args.lookahead
+    if args.player == "model":
+        options["model_file"] = args.model
+
+    start = time.perf_counter()
+    added = generate(args.store, args.landings, args.workers, args.chunk, args.checkpoint, args.seed, **options)
+    elapsed = time.perf_counter() - start
+
+    print(f"Stored {added} landings in {elapsed:.1f}s, {added / elapsed:.0f} per second, {added / elapsed * 3600 / 1e6:.2f}M per hour.")
+    return added
+
+if __name__ == "__main__":
+      parser = argparse.ArgumentParser(description = "Headless self play, appends its landings to the pattern store. Run it with the game closed.")
+      parser.add_argument("--store", default = "data/training_data/pattern.bin")
+      parser.add_argument("--landings", type = int, default = 100_000)
+      parser.add_argument("--workers", type = int, default = None)
+      parser.add_argument("--chunk", type = int, default = 10_000, help = "landings per worker task")
+      parser.add_argument("--checkpoint", type = int, default = 100_000, help = "landings between store rewrites")
+      parser.add_argument("--seed", type = int, default = 0)
+      parser.add_argument("--player", choices = sorted(PLAYERS), default = "greedy")
+      parser.add_argument("--lookahead", type = int, default = 0, help = "queued pieces the planner looks at")
+      parser.add_argument("--explore", type = float, default = 0.0, help = "share of pieces dropped at random")
+      parser.add_argument("--max-pieces", type = int, default = None, help = "pieces before a game restarts")
+      parser.add_argument("--model", default = "data/pickles/ngrams.pkl", help = "model snapshot of the model player")
+      args = parser.parse_args()
+
+      self_play(args)
+      print("Self Play Done 🎉.")
@@ -0,0 +1,41 @@
+import sys
+import time
+import argparse
+
+from pathlib import Path
+
+# * Current solution
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from bitEngine.core.ngram_model import ColumnNGramModel
+from bitEngine.core.training import train_column_model
+from bitEngine.utils import BitPatternFileManager
+
+def train(store_file: str, workers: int | None, check: bool) -> bool:
+    start = time.perf_counter()
+    model = train_column_model(store_file, workers)
+    print(f"Trained {len(model.counts)} piece pairs in {time.perf_counter() - start:.2f}s.")
+
+    if not check:
+        return True
+
+    # ! Loads every entry as a dict, slow on big corpora
+    sequential = ColumnNGramModel()
+    sequential.rebuild(BitPatternFileManager(store_file).load())
+    return (
+        list(sequential.counts) == list(model.counts)
+        and all(list(sequential.counts[key].items()) == list(model.counts[key].items()) for key in model.counts)
+        and sequential.last_piece == model.last_piece
+    )
+
+if __name__ == "__main__":
+      parser = argparse.ArgumentParser(description = "Offline column model training over the pattern store.")
+      parser.add_argument("--store", default = "data/training_data/pattern.bin")
+      parser.add_argument("--workers", type = int, default = None)
+      parser.add_argument("--check", action = "store_true", help = "compare against the sequential build")
+      args = parser.parse_args()
+
+      if train(args.store, args.workers, args.check):
+           print("Training Done 🎉.")
+      else:
+           print("Sharded model differs from the sequential build.")
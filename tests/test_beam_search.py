@@ -0,0 +1,47 @@
+from bitEngine.core.beam_search import BeamSearchPlanner
+from bitEngine.core.bitboard import BitBoard
+
+
+def well_board():
+    """Four full bottom rows but for a one-wide well in the last column."""
+    return BitBoard(20, 10, [0] * 16 + [0b0111111111] * 4)
+
+
+def frozen_planner(**options):
+    # * a clock that never moves, only the node cap can cut the search short
+    return BeamSearchPlanner(clock = lambda: 0.0, **options)
+
+
+def test_planner_drops_the_i_into_the_well():
+    planner = frozen_planner()
+
+    steps = planner.search(well_board(), ["I"])
+
+    assert len(steps) == 1
+    assert steps[0]["piece"] == "I"
+    assert steps[0]["lines_cleared"] == 4
+    assert sorted(steps[0]["placement"]) == [(9, 16), (9, 17), (9, 18), (9, 19)]
+
+
+def test_planner_keeps_the_well_open_for_the_queued_i():
+    planner = frozen_planner(max_nodes = None)
+
+    steps = planner.search(well_board(), ["O", "I"])
+
+    assert [step["piece"] for step in steps] == ["O", "I"]
+    assert all(x < 9 for x, _ in steps[0]["placement"])
+    assert steps[1]["lines_cleared"] == 4
+    assert planner.searched_depth == 2
+    assert not planner.capped
+
+
+def test_node_cap_cuts_the_search_short():
+    planner = frozen_planner(max_nodes = 20)
+
+    steps = planner.search(well_board(), ["T", "I", "O"])
+
+    stats = planner.stats()
+    assert stats["nodes"] == 20 and stats["capped"] and not stats["timed_out"]
+    # * the cap hit inside the first level, the plan is the best of the boards it did place
+    assert stats["searched_depth"] == 1
+    assert len(steps) == 1 and steps[0]["piece"] == "T"
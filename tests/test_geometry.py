@@ -0,0 +1,100 @@
+import pytest
+
+from bitEngine.core.geometry import DISTINCT_ROTATIONS, PIECE_GEOMETRY, PIECE_SHAPES, pivot
+from bitEngine.core.simulation import ManualClock
+from bitEngine.core.tetris_logic.core_grid import BitLogicGrid
+from bitEngine.core.tetris_logic.core_tetromino import BitLogicTetromino
+
+PIECES = sorted(PIECE_SHAPES)
+
+
+# --- The per-piece rotation code the table replaced ---
+def old_rotate(coords):
+    rotated = [(-y, x) for (x, y) in coords]
+    min_x = min(x for x, _ in rotated)
+    min_y = min(y for _, y in rotated)
+    return [(x - min_x, y - min_y) for x, y in rotated]
+
+
+def old_mask(cells):
+    width = max(x for x, _ in cells) + 1
+    height = max(y for _, y in cells) + 1
+    row_masks = [0] * height
+    bottom = [0] * width
+    for x, y in cells:
+        row_masks[y] |= 1 << x
+        bottom[x] = max(bottom[x], y)
+    return tuple(cells), width, height, tuple(row_masks), tuple(bottom)
+
+
+def old_orientations(shape):
+    orientations = []
+    cells = list(shape)
+    for _ in range(4):
+        orientations.append(old_mask(cells))
+        cells = old_rotate(cells)
+    return orientations
+
+
+def old_pivot(coordinates):
+    xs = [x for x, _ in coordinates]
+    ys = [y for _, y in coordinates]
+    return round((min(xs) + max(xs)) / 2), round((min(ys) + max(ys)) / 2)
+
+
+def old_turn(coordinates, direction):
+    px, py = old_pivot(coordinates)
+    if direction == "clock_wise":
+        return [(px + (y - py), py - (x - px)) for x, y in coordinates]
+    return [(px - (y - py), py + (x - px)) for x, y in coordinates]
+
+
+# --- Tests ---
+@pytest.mark.parametrize("piece", PIECES)
+def test_table_matches_the_old_rotations(piece):
+    for rotation, (cells, width, height, row_masks, bottom) in enumerate(old_orientations(PIECE_SHAPES[piece])):
+        orientation = PIECE_GEOMETRY[piece][rotation]
+        assert orientation.rotation == rotation
+        assert orientation.cells == cells
+        assert (orientation.width, orientation.height) == (width, height)
+        assert orientation.row_masks == row_masks
+        assert orientation.bottom == bottom
+
+
+def test_distinct_rotations_match_the_old_cell_sets():
+    for piece in PIECES:
+        old = [set(cells) for cells, *_ in old_orientations(PIECE_SHAPES[piece])]
+        assert DISTINCT_ROTATIONS[piece] == tuple(r for r in range(4) if old[r] not in old[:r])
+    assert {piece: len(rotations) for piece, rotations in DISTINCT_ROTATIONS.items()} == {"O": 1, "I": 2, "S": 2, "Z": 2, "T": 4, "L": 4, "J": 4}
+
+
+@pytest.mark.parametrize("piece", PIECES)
+def test_pivot_matches_the_old_rounded_center(piece):
+    for orientation in PIECE_GEOMETRY[piece]:
+        # * both parities of the corner, round() snaps halves to even
+        for origin_x in range(4):
+            for origin_y in range(4):
+                coordinates = [(origin_x + x, origin_y + y) for x, y in orientation.cells]
+                assert pivot(orientation, origin_x, origin_y) == old_pivot(coordinates)
+
+
+@pytest.mark.parametrize("piece", PIECES)
+@pytest.mark.parametrize("direction", ["clock_wise", "counter_clock_wise"])
+def test_rotate_lands_where_the_old_cell_turn_did(piece, direction):
+    grid = BitLogicGrid(None, 20, 10)
+    for orientation in PIECE_GEOMETRY[piece]:
+        for origin_x in range(3, 5):
+            for origin_y in range(5, 7):
+                coordinates = [(origin_x + x, origin_y + y) for x, y in orientation.cells]
+                tetromino = BitLogicTetromino(grid, piece, coordinates, clock = ManualClock())
+                tetromino.orientation = orientation
+                tetromino.coordinates = coordinates
+
+                tetromino.rotate(direction)
+
+                assert sorted(tetromino.coordinates) == sorted(old_turn(coordinates, direction))
+                # * and the piece knows which table rotation it is in now
+                turned = orientation.rotation + (-1 if direction == "clock_wise" else 1)
+                assert tetromino.orientation is PIECE_GEOMETRY[piece][turned % 4]
+                left, top = min(x for x, _ in tetromino.coordinates), min(y for _, y in tetromino.coordinates)
+                assert sorted((x - left, y - top) for x, y in tetromino.coordinates) == sorted(tetromino.orientation.cells)
@@ -0,0 +1,82 @@
+import random
+
+from bitEngine.core.geometry import PIECE_GEOMETRY
+from bitEngine.core.self_play import HeadlessEngine, SelfPlayGame, make_player
+from bitEngine.core.simulation import ManualClock
+from bitEngine.core.tetris_logic.core_grid import BitLogicGrid, BitLogicLineCleaner
+from bitEngine.core.tetris_logic.core_tetromino import BitLogicTetromino
+
+
+def test_lock_at_the_spawn_rows_leaves_the_bottom_rows_alone():
+    grid = BitLogicGrid(None, 20, 10)
+    for y in range(2, 18):
+        grid.set_cell(4, y, 1)
+    # * the bottom rows are where negative rows would wrap to
+    grid.set_cell(0, 18, 1)
+    grid.set_cell(0, 19, 1)
+    cells = list(grid.cells)
+
+    # * a vertical I over the full column, its top half still above the grid
+    orientation = PIECE_GEOMETRY["I"][1]
+    (cell_x, _), low = orientation.cells[0], min(y for _, y in orientation.cells)
+    coordinates = [(4 - cell_x + x, -2 - low + y) for x, y in orientation.cells]
+    tetromino = BitLogicTetromino(grid, "I", coordinates, clock = ManualClock())
+    tetromino.orientation = orientation
+    tetromino.coordinates = coordinates
+    tetromino.color = "red"
+    assert sorted(tetromino.coordinates) == [(4, -2), (4, -1), (4, 0), (4, 1)]
+
+    tetromino.hard_drop()
+
+    assert tetromino.landed
+    assert grid.cells[2:] == cells[2:]
+    assert grid.cells[0] == grid.cells[1] == 1 << 4
+    assert grid.tops == [grid._column_top(x) for x in range(grid.columns)]
+    assert grid.state_hash == grid.rehash()
+    assert grid.locked_colors[-1] == [None] * grid.columns
+
+    # * written straight to the grid, rows above it are ignored as well
+    grid.set_cells([(5, -1), (5, 0)])
+    assert grid.tops[5] == grid._column_top(5) == 0
+
+
+def test_recorded_rotation_matches_the_landed_cells():
+    random.seed(3)
+    game = SelfPlayGame(make_player("random"))
+    for _ in range(300):
+        game.step()
+        tetromino = game.controller.object
+        assert game.controller.rotation_index == tetromino.orientation.rotation
+
+    entries = game.recorder.entries
+    assert len({entry["rotation"] for entry in entries if entry["piece"] in "TLJ"}) == 4
+    for entry in entries:
+        cells = entry["landed_coordinates"]
+        left, top = min(x for x, _ in cells), min(y for _, y in cells)
+        landed = sorted((x - left, y - top) for x, y in cells)
+        assert landed == sorted(PIECE_GEOMETRY[entry["piece"]][entry["rotation"]].cells), entry
+
+
+def test_line_clear_leaves_the_falling_piece_alone():
+    engine = HeadlessEngine()
+    grid = BitLogicGrid(None, 20, 10)
+    cleaner = BitLogicLineCleaner(engine, grid, grid.rows)
+    for x in range(2, 10):
+        grid.set_cell(x, 19, 1)
+
+    # * the next piece spawned before the landing's lines are cleared, like the spawner does
+    falling = engine.add_object(BitLogicTetromino(grid, "T", [(x + 4, y) for x, y in PIECE_GEOMETRY["T"][0].cells], clock = ManualClock()))
+    spawned = list(falling.coordinates)
+    landing = engine.add_object(BitLogicTetromino(grid, "O", [(x, y) for x, y in PIECE_GEOMETRY["O"][0].cells], clock = ManualClock()))
+    landing.color = "red"
+    landing.hard_drop()
+
+    cleaner.update()
+
+    assert cleaner.num_cleared_rows == 1
+    assert grid.cells[19] == 0b11
+    assert falling.coordinates == spawned
+    assert falling.intact and not falling.landed
+
+    falling.rotate("clock_wise")
+    assert falling.orientation.rotation == 3
@@ -0,0 +1,231 @@
+import json
+import pickle
+import threading
+
+import pytest
+
+from bitEngine.core.ngrams import PatternNGrams, pattern_entry
+from bitEngine.core.retention import RetentionPolicy
+from bitEngine.utils import BitPatternFileManager
+
+
+def make_predictor(directory, **options):
+    return PatternNGrams(
+        corpus_file = str(directory / "pattern.json"),
+        pickle_file = str(directory / "pattern.pkl"),
+        journal_file = str(directory / "pattern.journal"),
+        index_file = str(directory / "pattern_index.pkl"),
+        model_file = str(directory / "ngrams.pkl"),
+        store_file = str(directory / "pattern.bin"),
+        fsync_policy = "never",
+        **options
+    )
+
+
+def landing(i):
+    piece = "IOTSZJL"[i % 7]
+    return pattern_entry(piece, [(x + 100 + i, y) for x, y in PatternNGrams.SHAPES[piece]], i % 4, i % 3,
+                         ["IOTSZJL"[(i + 1) % 7]], "test", "2" * (i % 10))
+
+
+def write(predictor, count, offset = 0):
+    for i in range(offset, offset + count):
+        entry = landing(i)
+        predictor.write_pattern(entry["piece"], entry["landed_coordinates"], entry["rotation"], entry["lines_cleared"],
+                                entry["next_pieces_queue"], entry["reason"], entry["surface"])
+
+
+def records(predictor):
+    """ (piece, cells, rotation, queue, surface) of every live record, comparable across a reload """
+    return [(entry["piece"], [tuple(cell) for cell in entry["landed_coordinates"]], entry["rotation"],
+             list(entry["next_pieces_queue"]), entry["surface"]) for entry in predictor.patterns]
+
+
+def test_close_while_background_compaction_runs(tmp_path):
+    predictor = make_predictor(tmp_path, compact_threshold = 8)
+    predictor.wait_ready()
+
+    # * hold the fold in its save until close() is already waiting on it
+    folding, release = threading.Event(), threading.Event()
+    save = predictor._save
+
+    def slow_save(*args):
+        folding.set()
+        release.wait(5)
+        save(*args)
+
+    predictor._save = slow_save
+    write(predictor, 8)
+    assert folding.wait(5)
+    write(predictor, 3, offset = 8)
+
+    closing = threading.Thread(target = predictor.close, daemon = True)
+    closing.start()
+    # * give close() time to reach the running compaction before the fold may finish
+    closing.join(0.2)
+    release.set()
+    closing.join(10)
+    assert not closing.is_alive()
+
+    reloaded = make_predictor(tmp_path)
+    reloaded.wait_ready()
+    assert len(reloaded.patterns) == 11
+    assert reloaded.verify_model()
+    reloaded.close()
+
+
+def test_eviction_without_piece_history(tmp_path):
+    predictor = make_predictor(tmp_path, order = 0, retention = RetentionPolicy(max_records = 5))
+    predictor.wait_ready()
+    write(predictor, 12)
+    assert len(predictor.patterns) == 5
+    assert predictor.verify_model()
+    predictor.close()
+
+
+@pytest.mark.parametrize("order", [0, 1, 2, 3])
+def test_write_evict_compact_reload_round_trip(tmp_path, order):
+    retention = RetentionPolicy(max_records = 20)
+    predictor = make_predictor(tmp_path, order = order, retention = retention, compact_threshold = 16)
+    predictor.wait_ready()
+    write(predictor, 30)
+    predictor.compact()
+    # * these stay in the journal only
+    write(predictor, 7, offset = 30)
+
+    expected = records(predictor)
+    assert len(expected) == 20
+    assert predictor.verify_model()
+    predictor.close()
+
+    reloaded = make_predictor(tmp_path, order = order, retention = retention)
+    reloaded.wait_ready()
+    assert records(reloaded) == expected
+    assert reloaded.verify_model()
+    assert all(reloaded.has_seen(piece, cells, rotation) for piece, cells, rotation, _, _ in expected)
+    evicted = landing(0)
+    assert not reloaded.has_seen(evicted["piece"], evicted["landed_coordinates"], evicted["rotation"])
+    reloaded.close()
+
+
+def test_journal_replay_after_a_crash(tmp_path):
+    predictor = make_predictor(tmp_path)
+    predictor.wait_ready()
+    write(predictor, 6)
+    predictor.compact()
+    write(predictor, 4, offset = 6)
+    # * a compaction that rotated the journal and died before folding it in
+    assert predictor.journal.rotate()
+    write(predictor, 3, offset = 10)
+    expected = records(predictor)
+
+    # * no close(), nothing is folded into the store
+    predictor.journal.close()
+    with open(tmp_path / "pattern.journal", "a", encoding = "utf-8") as f:
+        f.write('{"piece": "T", "landed_coor')
+
+    reloaded = make_predictor(tmp_path)
+    reloaded.wait_ready()
+    assert records(reloaded) == expected
+    assert reloaded.verify_model()
+
+    reloaded.compact()
+    assert reloaded.journal.pending_files() == []
+    reloaded.close()
+
+
+@pytest.mark.parametrize("legacy", ["json", "pickle"])
+def test_legacy_corpus_migrates_to_the_store(tmp_path, legacy):
+    entries = [landing(i) for i in range(12)]
+    if legacy == "json":
+        with open(tmp_path / "pattern.json", "w", encoding = "utf-8") as f:
+            json.dump(entries, f)
+    else:
+        with open(tmp_path / "pattern.pkl", "wb") as f:
+            pickle.dump(entries, f)
+
+    predictor = make_predictor(tmp_path)
+    predictor.wait_ready()
+    expected = records(predictor)
+    assert [record[:3] for record in expected] == [(e["piece"], e["landed_coordinates"], e["rotation"]) for e in entries]
+    assert predictor.verify_model()
+    predictor.close()
+    assert BitPatternFileManager(str(tmp_path / "pattern.bin")).exists()
+
+    # * once migrated the store alone is enough
+    (tmp_path / ("pattern.json" if legacy == "json" else "pattern.pkl")).unlink()
+    reloaded = make_predictor(tmp_path)
+    reloaded.wait_ready()
+    assert records(reloaded) == expected
+    reloaded.close()
+
+
+def corrupt_store(directory):
+    store = directory / "pattern.bin"
+    data = bytearray(store.read_bytes())
+    data[BitPatternFileManager.HEADER.size] ^= 0xFF
+    store.write_bytes(bytes(data))
+
+
+def test_corrupted_store_is_an_error_without_a_legacy_corpus(tmp_path):
+    predictor = make_predictor(tmp_path)
+    predictor.wait_ready()
+    write(predictor, 10)
+    predictor.close()
+    corrupt_store(tmp_path)
+
+    reloaded = make_predictor(tmp_path)
+    with pytest.raises(ValueError, match = "checksum"):
+        reloaded.wait_ready()
+    reloaded.close()
+
+
+def test_close_after_a_failed_warm_up_keeps_the_store_and_journal(tmp_path, capsys):
+    predictor = make_predictor(tmp_path)
+    predictor.wait_ready()
+    write(predictor, 10)
+    predictor.close()
+    corrupt_store(tmp_path)
+    corrupted = (tmp_path / "pattern.bin").read_bytes()
+
+    reloaded = make_predictor(tmp_path)
+    reloaded.ready.wait()
+    write(reloaded, 3, offset = 10)
+    reloaded.close()
+
+    assert "Warm-up failed" in capsys.readouterr().out
+    # * nothing was folded over the unreadable store, the new landings wait in the journal
+    assert (tmp_path / "pattern.bin").read_bytes() == corrupted
+    assert len((tmp_path / "pattern.journal").read_text(encoding = "utf-8").splitlines()) == 3
+    with pytest.raises(ValueError):
+        reloaded.journal.append(landing(13))
+
+
+def test_corrupted_store_falls_back_to_the_legacy_corpus(tmp_path):
+    entries = [landing(i) for i in range(5)]
+    with open(tmp_path / "pattern.json", "w", encoding = "utf-8") as f:
+        json.dump(entries, f)
+    predictor = make_predictor(tmp_path)
+    predictor.wait_ready()
+    predictor.close()
+    corrupt_store(tmp_path)
+
+    reloaded = make_predictor(tmp_path)
+    reloaded.wait_ready()
+    assert [record[:3] for record in records(reloaded)] == [(e["piece"], e["landed_coordinates"], e["rotation"]) for e in entries]
+    reloaded.close()
+
+
+def test_suggested_column_is_the_one_the_piece_fits_in(tmp_path):
+    predictor = make_predictor(tmp_path)
+    predictor.wait_ready()
+    # * the column model learned a column a flat I no longer fits in, 10 columns wide
+    predictor.col_model[("T", "I")][9] += 1
+    board = [[0] * 10 for _ in range(20)]
+
+    suggestion = predictor.predict(board, "I", 10, 20, prev_piece = "T")
+
+    assert suggestion["reason"] == "ngram_fallback"
+    assert suggestion["column"] == 6 == min(x for x, _ in suggestion["placement"])
+    assert predictor.predict_batch([board], ["I"], ["T"]).chosen[0]["column"] == 6
+    predictor.close()
@@ -0,0 +1,50 @@
+import pytest
+
+from bitEngine.core.ngrams import pattern_entry
+from bitEngine.utils import BitPatternFileManager
+
+
+def entry(**fields):
+    return dict(pattern_entry("T", [(1, 0), (0, 1), (1, 1), (2, 1)], 0, 0, ["I"], "test", "0"), **fields)
+
+
+def test_fields_at_their_limits_round_trip(tmp_path):
+    store = BitPatternFileManager(str(tmp_path / "pattern.bin"))
+    patterns = [
+        entry(surface = "9" * 254, rotation = 255, lines_cleared = 255, next_pieces_queue = ["I"] * 255),
+        entry(surface = None, landed_coordinates = [(32767, -32768)]),
+    ]
+
+    store.save(patterns)
+    decoded = BitPatternFileManager.to_patterns(store.read_columns())
+
+    assert decoded[0]["surface"] == "9" * 254
+    assert (decoded[0]["rotation"], decoded[0]["lines_cleared"], len(decoded[0]["next_pieces_queue"])) == (255, 255, 255)
+    assert decoded[1]["surface"] is None
+    assert [tuple(cell) for cell in decoded[1]["landed_coordinates"]] == [(32767, -32768)]
+
+
+@pytest.mark.parametrize("fields", [
+    # * 255 digits would read back as "no surface"
+    {"surface": "9" * 255},
+    {"rotation": 256},
+    {"lines_cleared": -1},
+    {"next_pieces_queue": ["I"] * 256},
+    {"landed_coordinates": [(0, 0)] * 256},
+    {"landed_coordinates": [(40000, 0)]},
+], ids = ["surface", "rotation", "lines_cleared", "queue", "cells", "coordinates"])
+def test_encode_rejects_what_does_not_fit(fields):
+    with pytest.raises(ValueError):
+        BitPatternFileManager.encode([entry(), entry(**fields)])
+
+
+def test_reason_table_is_limited_to_one_byte_codes():
+    BitPatternFileManager.encode([entry(reason = f"reason {n}") for n in range(256)])
+    with pytest.raises(ValueError):
+        BitPatternFileManager.encode([entry(reason = f"reason {n}") for n in range(257)])
+
+    # * two tables that each fit can still overflow once merged
+    first = BitPatternFileManager.encode([entry(reason = f"first {n}") for n in range(200)])
+    second = BitPatternFileManager.encode([entry(reason = f"second {n}") for n in range(100)])
+    with pytest.raises(ValueError):
+        BitPatternFileManager.join(first, second)